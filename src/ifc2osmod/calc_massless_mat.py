@@ -5,7 +5,9 @@ from pathlib import Path
 
 import ifcopenshell
 import ifcopenshell.util.unit
+import ifcopenshell.util.element
 import ifc_utils.ifcopenshell_utils as ifcopenshell_utils
+from .utils import ifcpset_utils
 #===================================================================================================
 # region: FUNCTIONS
 #===================================================================================================
@@ -53,7 +55,34 @@ def calc_massless(ifc_path: str, pset_name: str, res_path: str) -> str:
     '''
     #------------------------------------------------------------------------------------------------------
     model = ifcopenshell.open(ifc_path)
-    mls_psets = ifcopenshell_utils.extract_mat_layer_sets_pset(model, pset_name, is_calc_massless=True)
+    return calc_massless_frm_model(model, pset_name, res_path)
+    #------------------------------------------------------------------------------------------------------
+
+def calc_massless_frm_model(model: ifcopenshell.file, pset_name: str, res_path: str, pset_index: dict = None) -> str:
+    '''
+    Calculate the massless material of the envelope of an opened ifc model.
+
+    Parameters
+    ----------
+    model : ifcopenshell.file
+        The ifc model.
+
+    pset_name : str
+        The name of the pset.
+    
+    res_path: str
+        the path of the generated result.
+
+    pset_index: dict, optional
+        the index from utils.ifcpset_utils.get_pset_index(). Default None, the index of the materials is built.
+
+    Returns
+    -------
+    str
+        The file path of the resultant file
+    '''
+    #------------------------------------------------------------------------------------------------------
+    mls_psets = ifcpset_utils.extract_mat_layer_sets_pset(model, pset_name, is_calc_massless=True, pset_index=pset_index)
     envlp_json, csv_str = ifcopenshell_utils.extract_envlp_mat_layer_pset(model, mls_psets)
 
     res_path_obj = Path(res_path)
@@ -64,7 +93,7 @@ def calc_massless(ifc_path: str, pset_name: str, res_path: str) -> str:
     envlp_json_str = json.dumps(envlp_json, indent=4)
     with open(res_path, 'w') as f:
         f.write(envlp_json_str)
-
+    return res_path
     #------------------------------------------------------------------------------------------------------
 
 def main():
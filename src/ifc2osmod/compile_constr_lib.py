@@ -0,0 +1,77 @@
+import sys
+import argparse
+from pathlib import Path
+
+from .utils import constrlib_utils
+#===================================================================================================
+# region: FUNCTIONS
+#===================================================================================================
+def parse_args():
+    # create parser object
+    parser = argparse.ArgumentParser(description = "Compile a construction library into fixed-width arrays for the nearest neighbour matching of ifcarch2osmod")
+
+    parser.add_argument('-l', '--lib', type = str,
+                        metavar = 'FILE',
+                        help = 'The path of the construction library json from extract_osmod_opq_constr or extract_osmod_smpl_glz_constr')
+
+    parser.add_argument('-r', '--res', type = str, default = None,
+                        metavar = 'FILE',
+                        help = 'The file path of the compiled npz library, default <lib stem>.npz next to the library')
+
+    parser.add_argument('-p', '--process', action = 'store_true',
+                        default=False, help = 'turn it on if piping in the library filepath')
+
+    # parse the arguments from standard input
+    args = parser.parse_args()
+    return args
+
+def compile_constr_lib(lib_path: str, res_path: str) -> str:
+    '''
+    Compile the construction library into a npz file.
+
+    Parameters
+    ----------
+    lib_path : str
+        The file path of the construction library json.
+
+    res_path: str
+        the path of the compiled library.
+
+    Returns
+    -------
+    str
+        the path of the compiled library.
+    '''
+    #------------------------------------------------------------------------------------------------------
+    clib = constrlib_utils.compile_constr_lib(lib_path)
+    constrlib_utils.write_constr_lib(clib, res_path)
+    return res_path
+    #------------------------------------------------------------------------------------------------------
+def main():
+    args = parse_args()
+    pipe_input = args.process
+    if pipe_input == False:
+        lib_path = args.lib
+    else:
+        lines = list(sys.stdin)
+        lib_path = lines[0].strip()
+
+    res_path = args.res
+    if res_path == None:
+        res_path = Path(lib_path).with_suffix('.npz')
+    res_path = str(Path(res_path).resolve())
+    compile_constr_lib(lib_path, res_path)
+    # make sure this output can be piped into another command on the cmd
+    print(res_path)
+    sys.stdout.flush()
+#===================================================================================================
+# endregion: FUNCTIONS
+#===================================================================================================
+#===================================================================================================
+# region: Main
+#===================================================================================================
+if __name__=='__main__':
+    main()
+#===================================================================================================
+# endregion: Main
+#===================================================================================================
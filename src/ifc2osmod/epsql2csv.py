@@ -1,12 +1,21 @@
 import sys
 import csv
+import json
+import shutil
+import sqlite3
 import argparse
 import datetime
+import tempfile
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+import numpy as np
 from dateutil.parser import parse
 
 from ladybug.sql import SQLiteResult
+
+from .utils import epsql_utils
 #===================================================================================================
 # region: FUNCTIONS
 #===================================================================================================
@@ -18,12 +27,59 @@ def parse_args():
                         metavar = 'FILE',
                         help = 'The path of the EP+ sql file')
     
+    parser.add_argument('-d', '--dir', type = str,
+                        metavar = 'DIR',
+                        help = 'Extract all the eplusout.sql files found in this directory into one long format dataset')
+
+    parser.add_argument('-m', '--manifest', type = str,
+                        metavar = 'FILE',
+                        help = 'Extract all the sql files listed in this text file into one long format dataset, one path or run_id,path per line')
+
+    parser.add_argument('-j', '--jobs', type = int, default=1,
+                        metavar = 'INT',
+                        help = 'The number of worker processes used to extract the sql files of -d or -m')
+
     parser.add_argument('-r', '--res', type = str,
                         metavar = 'DIR',
                         help = 'The directory path of the resultant file')
 
     parser.add_argument('-p', '--process', action = 'store_true',
                         default=False, help = 'turn it on if piping in the idf filepath')
+
+    parser.add_argument('-l', '--ladybug', action = 'store_true',
+                        default=False, help = 'turn it on to read the sql file through ladybug data collections instead of the bulk sql queries')
+
+    parser.add_argument('-cs', '--chunk_size', type = int, default=100000,
+                        metavar = 'INT',
+                        help = 'The number of values read from the sql file and written to the csv at a time')
+
+    parser.add_argument('-f', '--format', type = str, default='csv', choices=['csv', 'npz', 'npy'],
+                        help = 'csv writes a csv file for each analysis period, npz a npz file and npy a directory of memory-mappable npy files')
+
+    parser.add_argument('-a', '--aggregate', type = str, choices=['monthly', 'annual'],
+                        help = 'Only write the count, sum, mean, max and min of each variable for each month or for the whole run period, calculated in the sql query')
+
+    parser.add_argument('-vn', '--variable', type = str, nargs='+',
+                        metavar = 'PATTERN',
+                        help = 'Only extract the variables with names matching these case insensitive glob patterns, e.g. "Zone Mean Air Temperature" "Electricity:*"')
+
+    parser.add_argument('-k', '--key', type = str, nargs='+',
+                        metavar = 'PATTERN',
+                        help = 'Only extract the variables with key values matching these case insensitive glob patterns, e.g. "THERMAL ZONE *"')
+
+    parser.add_argument('-fq', '--frequency', type = str, nargs='+', choices=list(epsql_utils.INTERVAL_FREQS.values()),
+                        help = 'Only extract the variables reported at these frequencies')
+
+    parser.add_argument('-st', '--start', type = str,
+                        metavar = 'MM-DD[THH:MM]',
+                        help = 'Only extract the timesteps starting from this datetime, e.g. 07-01')
+
+    parser.add_argument('-en', '--end', type = str,
+                        metavar = 'MM-DD[THH:MM]',
+                        help = 'Only extract the timesteps up to and including this datetime, e.g. 07-31')
+
+    parser.add_argument('-t', '--time_format', type = str, default='iso', choices=['iso', 'epoch'],
+                        help = 'iso writes ISO 8601 datetimes with the utc offset of the location, epoch writes the seconds since 1970-01-01 UTC')
     
     # parse the arguments from standard input
     args = parser.parse_args()
@@ -107,14 +163,481 @@ def extract_sql_info(sql_path: str, res_dir: str):
     for item in items:
         key = item[0]
         val = item[1]
-        key = key.replace('/', '_')
-        key = key.replace(' ', '_')
-        key = key.replace('@', 'at')
-        res_path = Path(res_dir).joinpath(f"{proj_name}_{key}.csv")
+        res_path = get_period_path(res_dir, proj_name, key)
         write2csv(val, res_path)
 
+def get_period_path(res_dir: str, proj_name: str, period_key: str, suffix: str = '.csv') -> Path:
+    '''
+    Get the path of the result file of an analysis period.
+
+    Parameters
+    ----------
+    res_dir : str
+        the directory of the generated results.
+
+    proj_name : str
+        the project name.
+
+    period_key : str
+        the analysis period string.
+
+    suffix : str, optional
+        the suffix of the file, empty for a directory. Default .csv.
+
+    Returns
+    -------
+    Path
+        the path of the result file.
+    '''
+    period_key = period_key.replace('/', '_')
+    period_key = period_key.replace(' ', '_')
+    period_key = period_key.replace('@', 'at')
+    res_path = Path(res_dir).joinpath(f"{proj_name}_{period_key}{suffix}")
+    return res_path
+
+def extract_sql_data(sql_path: str, res_dir: str, chunk_size: int = 100000, time_format: str = 'iso', report_filter: dict = None):
+    '''
+    Extract all the report data from sql into a csv file for each analysis period. The data is read in chunks and each chunk is written as soon as it is read, so the memory used is bounded by the chunk size and not the length of the run.
+
+    Parameters
+    ----------
+    sql_path : str
+        The sql file path.
+    
+    res_dir: str
+        the directory of the generated results.
+
+    chunk_size: int, optional
+        the number of values read from the sql at a time. Default 100000.
+
+    report_filter: dict, optional
+        the variables, keys, frequencies and datetime range to extract, refer to utils.epsql_utils.select_report_data(). Default None extracts all the report data.
+
+    time_format: str, optional
+        iso for ISO 8601 datetimes with the utc offset of the location, epoch for the seconds since 1970-01-01 UTC. Default iso.
+    
+    '''
+    parent_dir = Path(sql_path).parent.parent
+    proj_name = parent_dir.stem
+    utc_offset = epsql_utils.get_time_zone(sql_path)
+    if time_format == 'epoch':
+        time_header = 'epoch'
+    else:
+        time_header = 'datetime'
+    csv_files = {}
+    conn = sqlite3.connect(sql_path)
+    try:
+        time_arr, blocks = epsql_utils.get_report_blocks(conn, report_filter=report_filter)
+        for block_id, datetimes, values in epsql_utils.iter_report_chunks(conn, time_arr, blocks, chunk_size=chunk_size, report_filter=report_filter):
+            if block_id not in csv_files.keys():
+                block = blocks[block_id]
+                res_path = get_period_path(res_dir, proj_name, block['key'])
+                csvfile = open(res_path, 'w', newline='')
+                csvwriter = csv.writer(csvfile)
+                csvwriter.writerow([time_header] + block['names'])
+                csv_files[block_id] = (csvfile, csvwriter)
+            csvwriter = csv_files[block_id][1]
+            dtstrs = epsql_utils.format_datetimes(datetimes, utc_offset, time_format=time_format).tolist()
+            for dtstr, vals in zip(dtstrs, values.tolist()):
+                csvwriter.writerow([dtstr] + vals)
+    finally:
+        conn.close()
+        for csvfile, _ in csv_files.values():
+            csvfile.close()
+
+def extract_sql_npz(sql_path: str, res_dir: str, chunk_size: int = 100000, report_filter: dict = None):
+    '''
+    Extract all the report data from sql into a npz file for each analysis period with the arrays header (json string), datetimes and values.
+
+    Parameters
+    ----------
+    sql_path : str
+        The sql file path.
+    
+    res_dir: str
+        the directory of the generated results.
+
+    chunk_size: int, optional
+        the number of values read from the sql at a time. Default 100000.
+
+    report_filter: dict, optional
+        the variables, keys, frequencies and datetime range to extract, refer to utils.epsql_utils.select_report_data(). Default None extracts all the report data.
+    
+    '''
+    parent_dir = Path(sql_path).parent.parent
+    proj_name = parent_dir.stem
+    utc_offset = epsql_utils.get_time_zone(sql_path)
+    report_data = epsql_utils.read_report_data(sql_path, chunk_size=chunk_size, report_filter=report_filter)
+    for period_key, block in report_data.items():
+        header = epsql_utils.make_block_header(period_key, block, utc_offset, len(block['datetimes']))
+        res_path = get_period_path(res_dir, proj_name, period_key, suffix='.npz')
+        np.savez(res_path, header=np.array(json.dumps(header)), datetimes=block['datetimes'], values=block['values'])
+
+def extract_sql_npy(sql_path: str, res_dir: str, chunk_size: int = 100000, report_filter: dict = None):
+    '''
+    Extract all the report data from sql into a directory for each analysis period with a header.json, datetimes.npy and values.npy.
+    The values are stored column by column (fortran order) so a single column can be memory-mapped without reading the others. The chunks are written straight into the memory-mapped files.
+
+    Parameters
+    ----------
+    sql_path : str
+        The sql file path.
+    
+    res_dir: str
+        the directory of the generated results.
+
+    chunk_size: int, optional
+        the number of values read from the sql at a time. Default 100000.
+
+    report_filter: dict, optional
+        the variables, keys, frequencies and datetime range to extract, refer to utils.epsql_utils.select_report_data(). Default None extracts all the report data.
+    
+    '''
+    parent_dir = Path(sql_path).parent.parent
+    proj_name = parent_dir.stem
+    utc_offset = epsql_utils.get_time_zone(sql_path)
+    memmaps = {}
+    conn = sqlite3.connect(sql_path)
+    try:
+        time_arr, blocks = epsql_utils.get_report_blocks(conn, report_filter=report_filter)
+        for block_id, datetimes, values in epsql_utils.iter_report_chunks(conn, time_arr, blocks, chunk_size=chunk_size, report_filter=report_filter):
+            block = blocks[block_id]
+            if block_id not in memmaps.keys():
+                block_dir = get_period_path(res_dir, proj_name, block['key'], suffix='')
+                block_dir.mkdir(parents=True, exist_ok=True)
+                nrows = len(block['datetimes'])
+                header = epsql_utils.make_block_header(block['key'], block, utc_offset, nrows)
+                with open(block_dir.joinpath('header.json'), 'w') as f:
+                    f.write(json.dumps(header, indent=4))
+                np.save(block_dir.joinpath('datetimes.npy'), block['datetimes'])
+                # timesteps without values stay nan
+                memmap = np.lib.format.open_memmap(block_dir.joinpath('values.npy'), mode='w+', dtype=np.float64,
+                                                    shape=(nrows, len(block['names'])), fortran_order=True)
+                memmap[:] = np.nan
+                memmaps[block_id] = memmap
+            row_idxs = np.searchsorted(block['datetimes'], datetimes)
+            memmaps[block_id][row_idxs] = values
+    finally:
+        conn.close()
+        for memmap in memmaps.values():
+            memmap.flush()
+
+def extract_sql_summary(sql_path: str, res_dir: str, period: str = 'monthly', report_filter: dict = None) -> str:
+    '''
+    Write the monthly or annual count, sum, mean, max and min of each variable into a csv file.
+
+    Parameters
+    ----------
+    sql_path : str
+        The sql file path.
+    
+    res_dir: str
+        the directory of the generated results.
+
+    period: str, optional
+        monthly or annual. Default monthly.
+
+    report_filter: dict, optional
+        the variables, keys, frequencies and datetime range to aggregate, refer to utils.epsql_utils.select_report_data(). Default None aggregates all the report data.
+
+    Returns
+    -------
+    str
+        the path of the csv file.
+    '''
+    parent_dir = Path(sql_path).parent.parent
+    proj_name = parent_dir.stem
+    stats = epsql_utils.aggregate_report_data(sql_path, period=period, report_filter=report_filter)
+    header = ['environment', 'variable', 'key', 'units', 'frequency']
+    if period == 'monthly':
+        header.append('month')
+    header.extend(['count', 'sum', 'mean', 'max', 'min'])
+    rows2d = [header]
+    for stat in stats:
+        rows2d.append([stat[col_name] for col_name in header])
+    res_path = str(Path(res_dir).joinpath(f"{proj_name}_{period}_summary.csv"))
+    write2csv(rows2d, res_path)
+    return res_path
+
+def extract_sql_long(sql_path: str, part_path: str, report_filter: dict = None, chunk_size: int = 100000) -> int:
+    '''
+    Extract the report data of a sql file into a npz file of long format arrays, a row for each value.
+
+    Parameters
+    ----------
+    sql_path : str
+        The sql file path.
+
+    part_path : str
+        the path of the npz file.
+
+    report_filter: dict, optional
+        the variables, keys, frequencies and datetime range to extract, refer to utils.epsql_utils.select_report_data(). Default None extracts all the report data.
+
+    chunk_size: int, optional
+        the number of values read from the sql at a time. Default 100000.
+
+    Returns
+    -------
+    int
+        the number of values extracted.
+    '''
+    utc_offset = epsql_utils.get_time_zone(sql_path)
+    report_data = epsql_utils.read_report_data(sql_path, chunk_size=chunk_size, report_filter=report_filter)
+    # the strings are stored once in the tables and referenced by their index in the code arrays
+    tables = {'environment': [], 'variable': [], 'key': [], 'unit': [], 'frequency': []}
+    cols = {'environment': [], 'timestamp': [], 'variable': [], 'key': [], 'unit': [], 'frequency': [], 'value': []}
+    for block in report_data.values():
+        timestamps = epsql_utils.format_datetimes(block['datetimes'], utc_offset, time_format='epoch')
+        values = block['values']
+        rows, col_idxs = np.nonzero(~np.isnan(values))
+        cols['timestamp'].append(timestamps[rows])
+        cols['value'].append(values[rows, col_idxs])
+        for col_name, block_strs in [('environment', [block['environment']]*len(block['names'])), ('variable', block['variables']), ('key', block['key_values']), ('unit', block['units']),
+                                     ('frequency', [block['frequency']]*len(block['names']))]:
+            table = tables[col_name]
+            codes = []
+            for block_str in block_strs:
+                if block_str not in table:
+                    table.append(block_str)
+                codes.append(table.index(block_str))
+            cols[col_name].append(np.array(codes, dtype=np.int32)[col_idxs])
+
+    arrays = {}
+    for col_name, col_chunks in cols.items():
+        if len(col_chunks) == 0:
+            col_chunks = [np.empty(0)]
+        arrays[col_name] = np.concatenate(col_chunks)
+    for col_name, table in tables.items():
+        arrays[f"{col_name}_table"] = np.array(table, dtype=str)
+    np.savez(part_path, **arrays)
+    return len(arrays['value'])
+
+def find_sql_files(sql_dir: str) -> list[str]:
+    '''
+    Find all the eplusout.sql files in the directory.
+
+    Parameters
+    ----------
+    sql_dir : str
+        the directory to search recursively.
+
+    Returns
+    -------
+    list[str]
+        the sorted sql file paths.
+    '''
+    return sorted([str(sql_path.resolve()) for sql_path in Path(sql_dir).rglob('eplusout.sql')])
+
+def read_manifest(manifest_path: str) -> tuple[list[str], list[str]]:
+    '''
+    Read the sql file paths and their run ids from the manifest.
+
+    Parameters
+    ----------
+    manifest_path : str
+        the text file with one path or run_id,path per line. Relative paths are relative to the manifest.
+
+    Returns
+    -------
+    tuple[list[str], list[str]]
+        the sql file paths and the run ids, None for the lines without a run id.
+    '''
+    sql_paths = []
+    run_ids = []
+    manifest_dir = Path(manifest_path).parent
+    with open(manifest_path) as f:
+        for line in f:
+            line = line.strip()
+            if line == '' or line.startswith('#'):
+                continue
+            if ',' in line:
+                run_id, sql_path = [item.strip() for item in line.split(',', 1)]
+            else:
+                run_id, sql_path = None, line
+            sql_paths.append(str(manifest_dir.joinpath(sql_path).resolve()))
+            run_ids.append(run_id)
+    return sql_paths, run_ids
+
+def get_run_ids(sql_paths: list[str], run_ids: list[str] = None) -> list[str]:
+    '''
+    Name the runs by their project name, the name of the directory above the run directory, the same as the csv files. Runs with the same project name are named by their path instead.
+
+    Parameters
+    ----------
+    sql_paths : list[str]
+        the sql file paths.
+
+    run_ids : list[str], optional
+        the given run ids, None for the runs to name.
+
+    Returns
+    -------
+    list[str]
+        the run id of each sql file.
+    '''
+    if run_ids is None:
+        run_ids = [None]*len(sql_paths)
+    proj_names = [Path(sql_path).parent.parent.stem for sql_path in sql_paths]
+    named_ids = []
+    for cnt, sql_path in enumerate(sql_paths):
+        if run_ids[cnt] is not None:
+            named_ids.append(run_ids[cnt])
+        elif proj_names.count(proj_names[cnt]) == 1:
+            named_ids.append(proj_names[cnt])
+        else:
+            named_ids.append(str(Path(sql_path).parent.parent))
+    return named_ids
+
+def merge_long_parts(part_paths: list[str], run_ids: list[str], res_dir: str, header: dict):
+    '''
+    Merge the npz files of extract_sql_long() into one directory of memory-mappable npy columns with a header.json. One part is loaded at a time.
+
+    Parameters
+    ----------
+    part_paths : list[str]
+        the npz files of the runs.
+
+    run_ids : list[str]
+        the run id of each npz file.
+
+    res_dir : str
+        the directory of the dataset.
+
+    header : dict
+        the information written into the header.json together with the string tables of the code columns.
+    '''
+    nvalues = 0
+    for part_path in part_paths:
+        with np.load(part_path) as part:
+            nvalues += part['value'].shape[0]
+
+    Path(res_dir).mkdir(parents=True, exist_ok=True)
+    dtypes = {'run': np.int32, 'environment': np.int32, 'timestamp': np.int64, 'variable': np.int32, 'key': np.int32, 'unit': np.int32, 'frequency': np.int32,
+              'value': np.float64}
+    memmaps = {}
+    for col_name, dtype in dtypes.items():
+        memmaps[col_name] = np.lib.format.open_memmap(Path(res_dir).joinpath(f"{col_name}.npy"), mode='w+', dtype=dtype, shape=(nvalues,))
+
+    tables = {'run': list(run_ids), 'environment': [], 'variable': [], 'key': [], 'unit': [], 'frequency': []}
+    start = 0
+    for cnt, part_path in enumerate(part_paths):
+        with np.load(part_path) as part:
+            end = start + part['value'].shape[0]
+            memmaps['run'][start:end] = cnt
+            memmaps['timestamp'][start:end] = part['timestamp']
+            memmaps['value'][start:end] = part['value']
+            for col_name in ['environment', 'variable', 'key', 'unit', 'frequency']:
+                # map the codes of the part to the codes of the dataset
+                table = tables[col_name]
+                lookup = []
+                for part_str in part[f"{col_name}_table"].tolist():
+                    if part_str not in table:
+                        table.append(part_str)
+                    lookup.append(table.index(part_str))
+                lookup = np.array(lookup, dtype=np.int32)
+                if len(lookup) != 0:
+                    memmaps[col_name][start:end] = lookup[part[col_name]]
+        start = end
+
+    for memmap in memmaps.values():
+        memmap.flush()
+    header = dict(header)
+    header['nrows'] = nvalues
+    header['columns'] = {'run': 'index into tables/run', 'environment': 'index into tables/environment, e.g. DD WINTER or RUN PERIOD 1', 'timestamp': 'seconds since 1970-01-01 UTC of the start of the interval',
+                         'variable': 'index into tables/variable', 'key': 'index into tables/key', 'unit': 'index into tables/unit',
+                         'frequency': 'index into tables/frequency', 'value': 'value, J is converted to kWh'}
+    header['tables'] = tables
+    with open(Path(res_dir).joinpath('header.json'), 'w') as f:
+        f.write(json.dumps(header, indent=4))
+
+def extract_sqls_long(sql_paths: list[str], run_ids: list[str], res_dir: str, jobs: int = 1, report_filter: dict = None,
+                      chunk_size: int = 100000) -> str:
+    '''
+    Extract the report data of many sql files in parallel worker processes into one long format dataset with the columns run, environment, timestamp, variable, key, unit, frequency and value.
+
+    Parameters
+    ----------
+    sql_paths : list[str]
+        the sql file paths.
+
+    run_ids : list[str]
+        the run id of each sql file.
+
+    res_dir : str
+        the directory of the generated results, the dataset is written into the report_data_long directory in it.
+
+    jobs : int, optional
+        the number of worker processes. Default 1.
+
+    report_filter: dict, optional
+        the variables, keys, frequencies and datetime range to extract, refer to utils.epsql_utils.select_report_data(). Default None extracts all the report data.
+
+    chunk_size: int, optional
+        the number of values read from the sql at a time. Default 100000.
+
+    Returns
+    -------
+    str
+        the directory of the dataset.
+    '''
+    Path(res_dir).mkdir(parents=True, exist_ok=True)
+    part_dir = tempfile.mkdtemp(dir=res_dir)
+    nsqls = len(sql_paths)
+    runs = {}
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {}
+            for cnt, sql_path in enumerate(sql_paths):
+                part_path = str(Path(part_dir).joinpath(f"{cnt}.npz"))
+                future = executor.submit(extract_sql_long, sql_path, part_path, report_filter=report_filter, chunk_size=chunk_size)
+                futures[future] = (cnt, part_path)
+            for ndone, future in enumerate(as_completed(futures), start=1):
+                cnt, part_path = futures[future]
+                run_id = run_ids[cnt]
+                try:
+                    nvalues = future.result()
+                    runs[cnt] = {'run_id': run_id, 'sql_path': sql_paths[cnt], 'status': 'done', 'nvalues': nvalues, 'part_path': part_path}
+                    print(f"[{ndone}/{nsqls}] {run_id}: {nvalues} values")
+                except Exception:
+                    error = traceback.format_exc()
+                    runs[cnt] = {'run_id': run_id, 'sql_path': sql_paths[cnt], 'status': 'failed', 'error': error}
+                    print(f"[{ndone}/{nsqls}] {run_id}: failed, {error.strip().splitlines()[-1]}")
+                sys.stdout.flush()
+
+        done_cnts = [cnt for cnt in sorted(runs.keys()) if runs[cnt]['status'] == 'done']
+        failed = [runs[cnt] for cnt in sorted(runs.keys()) if runs[cnt]['status'] == 'failed']
+        for run in failed:
+            print(f"failed to extract {run['sql_path']}")
+        long_dir = str(Path(res_dir).joinpath('report_data_long'))
+        header = {'report_filter': report_filter, 'failed': [{'run_id': run['run_id'], 'sql_path': run['sql_path'], 'error': run['error']} for run in failed],
+                  'sql_paths': [runs[cnt]['sql_path'] for cnt in done_cnts]}
+        merge_long_parts([runs[cnt]['part_path'] for cnt in done_cnts], [runs[cnt]['run_id'] for cnt in done_cnts], long_dir, header)
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+    return long_dir
+
 def main():
     args = parse_args()
+    res_dir_str = args.res
+    res_dir = Path(res_dir_str).resolve()
+    res_dir_str = str(res_dir)
+    report_filter = {'variables': args.variable, 'keys': args.key, 'frequencies': args.frequency, 'start': args.start, 'end': args.end}
+    if not any(report_filter.values()):
+        report_filter = None
+
+    if args.dir is not None or args.manifest is not None:
+        if args.manifest is not None:
+            sql_paths, run_ids = read_manifest(args.manifest)
+        else:
+            sql_paths = find_sql_files(args.dir)
+            run_ids = None
+        run_ids = get_run_ids(sql_paths, run_ids)
+        long_dir = extract_sqls_long(sql_paths, run_ids, res_dir_str, jobs=args.jobs, report_filter=report_filter, chunk_size=args.chunk_size)
+        print(long_dir)
+        sys.stdout.flush()
+        return
+
     pipe_input = args.process
     if pipe_input == False:
         sql_filepath = args.sql
@@ -122,10 +645,18 @@ def main():
         lines = list(sys.stdin)
         sql_filepath = lines[0].strip()
 
-    res_dir_str = args.res
-    res_dir = Path(res_dir_str).resolve()
-    res_dir_str = str(res_dir)
-    extract_sql_info(sql_filepath, res_dir_str)
+    if args.aggregate is not None:
+        extract_sql_summary(sql_filepath, res_dir_str, period=args.aggregate, report_filter=report_filter)
+    elif args.ladybug:
+        if report_filter is not None:
+            print('the filters are not applied when reading through ladybug')
+        extract_sql_info(sql_filepath, res_dir_str)
+    elif args.format == 'npz':
+        extract_sql_npz(sql_filepath, res_dir_str, chunk_size=args.chunk_size, report_filter=report_filter)
+    elif args.format == 'npy':
+        extract_sql_npy(sql_filepath, res_dir_str, chunk_size=args.chunk_size, report_filter=report_filter)
+    else:
+        extract_sql_data(sql_filepath, res_dir_str, chunk_size=args.chunk_size, time_format=args.time_format, report_filter=report_filter)
     print(res_dir_str)
     sys.stdout.flush()
 #===================================================================================================
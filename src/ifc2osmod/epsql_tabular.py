@@ -0,0 +1,143 @@
+import sys
+import csv
+import json
+import sqlite3
+import argparse
+from pathlib import Path
+
+from .utils import epsql_utils
+from .epsql2csv import find_sql_files, get_run_ids
+#===================================================================================================
+# region: FUNCTIONS
+#===================================================================================================
+def parse_args():
+    # create parser object
+    parser = argparse.ArgumentParser(description = "Extract the cells of the tabular reports (e.g. site EUI, end uses, unmet hours) from epsql files into a json or csv file")
+
+    parser.add_argument('-s', '--sql', type = str, nargs='+',
+                        metavar = 'FILE',
+                        help = 'The paths of the EP+ sql files')
+
+    parser.add_argument('-d', '--dir', type = str,
+                        metavar = 'DIR',
+                        help = 'Extract from all the eplusout.sql files found in this directory')
+
+    parser.add_argument('-r', '--res', type = str,
+                        metavar = 'FILE',
+                        help = 'The path of the resultant json or csv file')
+
+    parser.add_argument('-k', '--kpi', type = str, nargs='+', choices=list(epsql_utils.TABULAR_KPIS.keys()),
+                        help = 'Extract these headline tables')
+
+    parser.add_argument('-rn', '--report', type = str, nargs='+',
+                        metavar = 'NAME',
+                        help = 'Extract the tables of these reports, e.g. AnnualBuildingUtilityPerformanceSummary')
+
+    parser.add_argument('-tn', '--table', type = str, nargs='+',
+                        metavar = 'NAME',
+                        help = 'Extract these tables, e.g. "End Uses"')
+
+    parser.add_argument('-rw', '--row', type = str, nargs='+',
+                        metavar = 'NAME',
+                        help = 'Extract these rows, e.g. "Total End Uses". With -k only the rows of the headline tables are extracted')
+
+    parser.add_argument('-cl', '--column', type = str, nargs='+',
+                        metavar = 'NAME',
+                        help = 'Extract these columns, e.g. Electricity. With -k only the columns of the headline tables are extracted')
+
+    parser.add_argument('-rf', '--report_for', type = str, nargs='+',
+                        metavar = 'NAME',
+                        help = 'Extract the reports for these, e.g. "Entire Facility"')
+
+    parser.add_argument('-c', '--csv', action = 'store_true',
+                        default=False, help = 'turn it on to write a csv file instead of json')
+
+    parser.add_argument('-p', '--process', action = 'store_true',
+                        default=False, help = 'turn it on if piping in the sql filepath')
+
+    # parse the arguments from standard input
+    args = parser.parse_args()
+    return args
+
+def extract_tabular(sql_path: str, selections: list[dict]) -> list[dict]:
+    '''
+    Extract the cells of the tabular reports from the sql file. The helper indexes are created in the sql file if they are missing.
+
+    Parameters
+    ----------
+    sql_path : str
+        The sql file path.
+
+    selections : list[dict]
+        each selection is a dictionary of the keyword arguments of utils.epsql_utils.query_tabular_data(): reports, tables, rows, columns and report_fors.
+
+    Returns
+    -------
+    list[dict]
+        the cells of all the selections, refer to utils.epsql_utils.query_tabular_data().
+    '''
+    conn = sqlite3.connect(sql_path)
+    try:
+        epsql_utils.create_tabular_indexes(conn)
+        cells = []
+        for selection in selections:
+            cells.extend(epsql_utils.query_tabular_data(conn, **selection))
+    finally:
+        conn.close()
+    return cells
+
+def main():
+    args = parse_args()
+    pipe_input = args.process
+    if args.dir is not None:
+        sql_paths = find_sql_files(args.dir)
+    elif pipe_input == False:
+        sql_paths = [str(Path(sql_path).resolve()) for sql_path in args.sql]
+    else:
+        lines = list(sys.stdin)
+        sql_paths = [str(Path(lines[0].strip()).resolve())]
+    run_ids = get_run_ids(sql_paths)
+
+    selections = []
+    if args.kpi is not None:
+        for kpi in args.kpi:
+            report, table = epsql_utils.TABULAR_KPIS[kpi]
+            selections.append({'reports': [report], 'tables': [table], 'rows': args.row, 'columns': args.column, 'report_fors': args.report_for})
+    # with -k the rows and columns filter the headline tables, they only select from all the tables without -k
+    is_kpi_filter = args.kpi is not None and args.report is None and args.table is None
+    if (args.report is not None or args.table is not None or args.row is not None or args.column is not None) and not is_kpi_filter:
+        selections.append({'reports': args.report, 'tables': args.table, 'rows': args.row, 'columns': args.column,
+                           'report_fors': args.report_for})
+    if len(selections) == 0:
+        selections.append({'report_fors': args.report_for})
+
+    cells = []
+    for cnt, sql_path in enumerate(sql_paths):
+        for cell in extract_tabular(sql_path, selections):
+            cell = dict(run=run_ids[cnt], **cell)
+            cells.append(cell)
+
+    res_path = str(Path(args.res).resolve())
+    if args.csv:
+        header = ['run', 'report', 'report_for', 'table', 'row', 'column', 'units', 'value']
+        with open(res_path, 'w', newline='') as csvfile:
+            csvwriter = csv.writer(csvfile)
+            csvwriter.writerow(header)
+            csvwriter.writerows([[cell[col_name] for col_name in header] for cell in cells])
+    else:
+        with open(res_path, 'w') as f:
+            f.write(json.dumps(cells, indent=4))
+
+    print(res_path)
+    sys.stdout.flush()
+#===================================================================================================
+# endregion: FUNCTIONS
+#===================================================================================================
+#===================================================================================================
+# region: Main
+#===================================================================================================
+if __name__=='__main__':
+    main()
+#===================================================================================================
+# endregion: Main
+#===================================================================================================
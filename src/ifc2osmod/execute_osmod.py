@@ -1,10 +1,13 @@
 import sys
 import json
+import time
 import argparse
 from pathlib import Path
 import openstudio
 from openstudio import model as osmod
 from .utils import openstudio_utils
+from .utils import epsql_utils
+from .utils import spool_utils
 #===================================================================================================
 # region: FUNCTIONS
 def parse_args():
@@ -31,6 +34,26 @@ def parse_args():
                         metavar = 'DIR', 
                         help = 'The output directory path')
     
+    parser.add_argument('-f', '--fast', type = str, default=None, choices = ['month', 'season'],
+                        help = 'estimate the monthly and annual energy by only simulating the typical week of each month or season')
+
+    parser.add_argument('-rs', '--ref_sql', type = str, default=None,
+                        metavar = 'FILE',
+                        help = 'The file path of the eplusout.sql of a full annual run to compare the fast estimate against')
+
+    parser.add_argument('-sp', '--profile', type = str, default=None, choices = ['draft', 'standard', 'final'],
+                        help = 'the simulation fidelity profile, draft is the fastest and final the most accurate')
+
+    parser.add_argument('-b', '--benchmark', action = 'store_true', default=False,
+                        help = 'run the model with every fidelity profile and report the runtime and deviation of each profile against final')
+
+    parser.add_argument('-w', '--osw', action = 'store_true', default=False,
+                        help = 'turn it on to run the model through the openstudio workflow even when no measures are applied')
+
+    parser.add_argument('-q', '--enqueue', type = str, default=None,
+                        metavar = 'DIR',
+                        help = 'The spool directory path, if given the job is put into the spool to be executed by osmod_worker instead of executing it')
+
     parser.add_argument('-p', '--process', action = 'store_true', default=False,
                         help = 'turn it on if piping in the osm filepath')
     
@@ -38,7 +61,125 @@ def parse_args():
     args = parser.parse_args()
     return args
 
-def execute(osm_filepath: str, res_dir: str, epw_path: str, ddy_path: str, measure_path: str) -> str:
+def calc_fast_estimate(sql_path: str, rep_weeks: list[dict], ref_sql_path: str = None) -> dict:
+    '''
+    Scale the facility meters of the representative weeks up to monthly and annual totals.
+
+    Parameters
+    ----------
+    sql_path : str
+        The file path of the eplusout.sql of the fast run.
+
+    rep_weeks : list[dict]
+        the representative weeks from openstudio_utils.get_representative_weeks().
+
+    ref_sql_path : str, optional
+        The file path of the eplusout.sql of a full annual run. If given, the deviation of the estimate from it is calculated.
+
+    Returns
+    -------
+    dict
+        - dictionary with the following keys
+        - weeks: the representative weeks simulated
+        - units: units of the energy values
+        - monthly: the meter name as key and a list of 12 monthly estimates as value
+        - annual: the meter name as key and the annual estimate as value
+        - reference: the fuel meter name as key and the annual value of the full annual run as value, only if ref_sql_path is given
+        - deviation_percent: the fuel meter name as key and the deviation of the estimate from the full annual run as value, only if ref_sql_path is given
+    '''
+    ndays_mth = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+    meter_dicts = epsql_utils.get_meter_totals(sql_path)
+    monthly = {}
+    for rep_week in rep_weeks:
+        week_meters = meter_dicts.get(rep_week['name'].upper(), {})
+        for meter_name, week_val in week_meters.items():
+            if meter_name not in monthly.keys():
+                monthly[meter_name] = [0.0]*12
+            # the week is 7 days, scale it to the number of days of the months it represents, J -> kWh
+            for mth in rep_week['months']:
+                monthly[meter_name][mth-1] = week_val/3600000 * ndays_mth[mth-1]/7
+
+    annual = {}
+    for meter_name, mth_vals in monthly.items():
+        annual[meter_name] = sum(mth_vals)
+
+    estimate = {'weeks': rep_weeks, 'units': 'kWh', 'monthly': monthly, 'annual': annual}
+    if ref_sql_path is not None:
+        end_uses = epsql_utils.get_end_use_totals(ref_sql_path)
+        reference = {}
+        deviation = {}
+        for meter_name, fuel_name in epsql_utils.FACILITY_METERS.items():
+            if fuel_name not in end_uses.keys() or meter_name not in annual.keys():
+                continue
+            ref_val = end_uses[fuel_name]
+            reference[meter_name] = ref_val
+            if ref_val != 0:
+                deviation[meter_name] = (annual[meter_name] - ref_val)/ref_val*100
+            else:
+                deviation[meter_name] = None
+        estimate['reference'] = reference
+        estimate['deviation_percent'] = deviation
+    return estimate
+
+def execute_fast(osm_filepath: str, res_dir: str, epw_path: str, ddy_path: str, period_type: str, ref_sql_path: str = None, 
+                 profile_name: str = None) -> str:
+    '''
+    Estimate the monthly and annual energy of the openstudio model by simulating only the typical week of each month or season.
+
+    Parameters
+    ----------
+    osm_filepath : str
+        The file path of the OpenStudio model.
+
+    res_dir : str
+        The output directory path for all the results.
+
+    epw_path : str
+        The file path of the weather file.
+
+    ddy_path : str
+        The file path of the ddy design day file.
+
+    period_type : str
+        month or season.
+
+    ref_sql_path : str, optional
+        The file path of the eplusout.sql of a full annual run to compare the estimate against.
+
+    profile_name : str, optional
+        draft, standard or final. The simulation fidelity profile to apply to the model. Default None, the settings of the model are used.
+
+    Returns
+    -------
+    str
+        The file path of the json estimate report.
+    '''
+    proj_name = str(Path(osm_filepath).stem)
+    proj_name = proj_name.lower()
+
+    m = osmod.Model.load(osm_filepath).get()
+    openstudio_utils.add_design_days_and_weather_file(m, epw_path, ddy_path)
+    sim_control = m.getSimulationControl()
+    sim_control.setDoZoneSizingCalculation(True)
+    sim_control.setRunSimulationforSizingPeriods(False)
+    if profile_name is not None:
+        openstudio_utils.apply_sim_profile(m, profile_name)
+    openstudio_utils.add_facility_meters(m)
+
+    rep_weeks = openstudio_utils.get_representative_weeks(epw_path, period_type)
+    start = time.perf_counter()
+    idf_path = openstudio_utils.save_fast_idf_project(res_dir, m, rep_weeks, proj_name)
+    translation_time = time.perf_counter() - start
+    sql_path = openstudio_utils.execute_energyplus(idf_path, epw_path, str(Path(idf_path).parent), phase_times={'translation': translation_time})
+
+    estimate = calc_fast_estimate(sql_path, rep_weeks, ref_sql_path)
+    report_path = str(Path(res_dir).joinpath(proj_name + '_fast_estimate.json'))
+    with open(report_path, 'w') as f:
+        f.write(json.dumps(estimate, indent=4))
+    return report_path
+
+def execute(osm_filepath: str, res_dir: str, epw_path: str, ddy_path: str, measure_path: str, profile_name: str = None, 
+            force_osw: bool = False) -> str:
     '''
     Adds Packaged Terminal Air-Conditioning (PTAC) Unit to each thermal zone and execute the openstudio model.
 
@@ -59,6 +200,16 @@ def execute(osm_filepath: str, res_dir: str, epw_path: str, ddy_path: str, measu
     measure_path : str
         The file path of the measures that will be applied to the model.
 
+    profile_name : str, optional
+        draft, standard or final. The simulation fidelity profile to apply to the model. Default None, the settings of the model are used.
+
+    force_osw : bool, optional
+        When no measures are applied the model is translated and EnergyPlus executed directly. True runs it through the openstudio workflow instead. Default False.
+
+    Returns
+    -------
+    str
+        The file path of the eplusout.sql.
     '''
     #------------------------------------------------------------------------------------------------------
     # region: setup openstudio model
@@ -80,13 +231,113 @@ def execute(osm_filepath: str, res_dir: str, epw_path: str, ddy_path: str, measu
     
     sim_control = m.getSimulationControl()
     sim_control.setDoZoneSizingCalculation(True)
+    if profile_name is not None:
+        openstudio_utils.apply_sim_profile(m, profile_name)
 
-    wrkflw_path = openstudio_utils.save_osw_project(res_dir, m, measure_list, proj_name)
-    openstudio_utils.execute_workflow(wrkflw_path)
+    start = time.perf_counter()
+    if len(measure_list) == 0 and not force_osw:
+        # nothing for the workflow to do, skip the openstudio cli and run energyplus on the translated model
+        idf_path = openstudio_utils.save_idf_project(res_dir, m, proj_name)
+        translation_time = time.perf_counter() - start
+        sql_path = openstudio_utils.execute_energyplus(idf_path, epw_path, str(Path(idf_path).parent), phase_times={'translation': translation_time})
+        run_type = 'energyplus'
+    else:
+        wrkflw_path = openstudio_utils.save_osw_project(res_dir, m, measure_list, proj_name)
+        openstudio_utils.execute_workflow(wrkflw_path)
+        sql_path = str(Path(wrkflw_path).parent.joinpath('run', 'eplusout.sql'))
+        run_type = 'workflow'
+    print(f"{run_type} execution took {time.perf_counter() - start:.2f}s")
+    return sql_path
     #------------------------------------------------------------------------------------------------------
     # endregion: setup openstudio model
     #------------------------------------------------------------------------------------------------------
 
+def benchmark_profiles(osm_filepath: str, res_dir: str, epw_path: str, ddy_path: str, measure_path: str) -> str:
+    '''
+    Execute the openstudio model with every fidelity profile and report the runtime and the deviation of the annual end uses of each profile against the final profile.
+
+    Parameters
+    ----------
+    osm_filepath : str
+        The file path of the OpenStudio model.
+
+    res_dir : str
+        The output directory path for all the results. The results of each profile are in the profile_<name> directory.
+
+    epw_path : str
+        The file path of the weather file.
+
+    ddy_path : str
+        The file path of the ddy design day file.
+
+    measure_path : str
+        The file path of the measures that will be applied to the model.
+
+    Returns
+    -------
+    str
+        The file path of the json benchmark report.
+    '''
+    proj_name = str(Path(osm_filepath).stem)
+    proj_name = proj_name.lower()
+    # run final first as it is the reference of the other profiles
+    profile_names = ['final', 'standard', 'draft']
+    bench_dicts = {}
+    for profile_name in profile_names:
+        profile_dir = Path(res_dir).joinpath(f"profile_{profile_name}")
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        sql_path = execute(osm_filepath, str(profile_dir), epw_path, ddy_path, measure_path, profile_name=profile_name)
+        runtime = time.perf_counter() - start
+        # sqlite3 would create an empty sql file and fail with no such table
+        if not Path(sql_path).is_file():
+            raise RuntimeError(f"the {profile_name} profile run did not write {sql_path}")
+        end_uses = epsql_utils.get_end_use_totals(sql_path)
+        bench_dicts[profile_name] = {'runtime': runtime, 'end_uses': end_uses}
+
+    ref_dict = bench_dicts['final']
+    for profile_name in profile_names:
+        bench_dict = bench_dicts[profile_name]
+        bench_dict['speedup'] = ref_dict['runtime']/bench_dict['runtime']
+        deviation = {}
+        for fuel_name, val in bench_dict['end_uses'].items():
+            ref_val = ref_dict['end_uses'].get(fuel_name)
+            if ref_val:
+                deviation[fuel_name] = (val - ref_val)/ref_val*100
+        bench_dict['deviation_percent'] = deviation
+        print(f"{profile_name}: {bench_dict['runtime']:.1f}s, speedup {bench_dict['speedup']:.2f}, deviation {deviation}")
+
+    report_path = str(Path(res_dir).joinpath(proj_name + '_profile_benchmark.json'))
+    with open(report_path, 'w') as f:
+        f.write(json.dumps(bench_dicts, indent=4))
+    return report_path
+
+def execute_job(job: dict) -> str:
+    '''
+    Execute a job descriptor, as created by main() with the --enqueue option.
+
+    Parameters
+    ----------
+    job : dict
+        dictionary with the following keys: osm_filepath, res_dir, epw_path, ddy_path, measure_path, fast, ref_sql, profile, benchmark, osw.
+
+    Returns
+    -------
+    str
+        The file path of the result, the eplusout.sql or the json report of the fast and benchmark mode.
+    '''
+    if job['benchmark']:
+        res_path = benchmark_profiles(job['osm_filepath'], job['res_dir'], job['epw_path'], job['ddy_path'], job['measure_path'])
+    elif job['fast'] is not None:
+        if job['measure_path'] is not None:
+            print('MEASURES ARE NOT APPLIED IN FAST MODE')
+        res_path = execute_fast(job['osm_filepath'], job['res_dir'], job['epw_path'], job['ddy_path'], job['fast'], job['ref_sql'], 
+                                job['profile'])
+    else:
+        res_path = execute(job['osm_filepath'], job['res_dir'], job['epw_path'], job['ddy_path'], job['measure_path'], job['profile'], 
+                           job.get('osw', False))
+    return res_path
+
 def main():
     args = parse_args()
     pipe_input = args.process
@@ -96,17 +347,36 @@ def main():
         lines = list(sys.stdin)
         osm_filepath = lines[0].strip()
 
+    osm_filepath = str(Path(osm_filepath).resolve())
     res_dir = args.output
     if res_dir == None:
         res_dir = str(Path(osm_filepath).parent)
+    res_dir = str(Path(res_dir).resolve())
 
     epw_path = args.epw
     epw_path = str(Path(epw_path).resolve())
     ddy_path = args.ddy
     ddy_path = str(Path(ddy_path).resolve())
     measure_path = args.measure
+    if measure_path is not None:
+        measure_path = str(Path(measure_path).resolve())
+    ref_sql_path = args.ref_sql
+    if ref_sql_path is not None:
+        ref_sql_path = str(Path(ref_sql_path).resolve())
 
-    execute(osm_filepath, res_dir, epw_path, ddy_path, measure_path)
+    job = {'osm_filepath': osm_filepath, 'res_dir': res_dir, 'epw_path': epw_path, 'ddy_path': ddy_path, 'measure_path': measure_path,
+           'fast': args.fast, 'ref_sql': ref_sql_path, 'profile': args.profile, 'benchmark': args.benchmark, 'osw': args.osw}
+    
+    if args.enqueue is not None:
+        job_path = spool_utils.enqueue_job(str(Path(args.enqueue).resolve()), job)
+        print(job_path)
+        sys.stdout.flush()
+    elif args.benchmark or args.fast is not None:
+        report_path = execute_job(job)
+        print(report_path)
+        sys.stdout.flush()
+    else:
+        execute_job(job)
 
 # endregion: FUNCTIONS
 #===================================================================================================
@@ -1,12 +1,17 @@
 import sys
 import json
+import time
 import argparse
 from pathlib import Path
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 
+import openstudio
 from openstudio import model as osmod
 
 from .utils import utils
 from .utils import openstudio_utils
+from .utils import osmtext_utils
 #===================================================================================================
 # region: FUNCTIONS
 #===================================================================================================
@@ -25,6 +30,20 @@ def parse_args():
     parser.add_argument('-p', '--process', action = 'store_true',
                         default=False, help = 'turn it on if piping in the idf filepath')
     
+    parser.add_argument('-t', '--text', action = 'store_true',
+                        default=False, help = 'read the materials and constructions directly from the osm text instead of loading the models with openstudio. '
+                        'Models of another openstudio version are loaded with openstudio. The representative construction names and material ids can differ from the openstudio load')
+    
+    parser.add_argument('-b', '--benchmark', action = 'store_true',
+                        default=False, help = 'time the reading of the models and the building of the library and write it into <res stem>_benchmark.json')
+    
+    parser.add_argument('-j', '--jobs', type = int, default=1,
+                        metavar = 'INT',
+                        help = 'The number of worker processes used to read the models')
+    
+    parser.add_argument('-i', '--incremental', action = 'store_true',
+                        default=False, help = 'only read the new or changed models, the contributions of each model are kept in <res stem>_manifest.json')
+    
     # parse the arguments from standard input
     args = parser.parse_args()
     return args
@@ -70,7 +89,52 @@ def calc_constr_resistance(constr_dict: dict, mat_dicts: dict):
     # print('ttl resistances', sum(resistances))
     return sum(resistances)
 
-def extract_calc_envlp_constr(osmod_dir: str, res_path: str) -> str:
+def reduce_osmod(osmod_path: str, text: bool = False) -> list[tuple]:
+    '''
+    Read the openstudio model and reduce it to its constructions and their flatten materials.
+
+    Parameters
+    ----------
+    osmod_path: str
+        The file path of the openstudio model.
+
+    text: bool, optional
+        if True, the materials and constructions are read from the osm text with osmtext_utils instead of loading the model with openstudio. A model written by another openstudio version is loaded with openstudio.
+
+    Returns
+    -------
+    list[tuple]
+        list of (construction name, thermal resistance rounded to 2 decimals, list of dict from utils.flatten_mat_dict() of the layers), in the order of the constructions in the model. 
+        Constructions without a thermal resistance are left out.
+    '''
+    if text:
+        # the text is read with the idd of the installed openstudio, the fields of other versions can be in other places
+        osm_version = osmtext_utils.get_osm_version(str(osmod_path))
+        if osm_version != openstudio.openStudioVersion():
+            print(f"{osmod_path} IS FROM OPENSTUDIO {osm_version}, NOT {openstudio.openStudioVersion()}, IT IS LOADED WITH OPENSTUDIO INSTEAD OF READ AS TEXT")
+            text = False
+    if text:
+        osmod_snapshot = osmtext_utils.get_osm_snapshot(str(osmod_path))
+    else:
+        osmodel = osmod.Model.load(osmod_path).get()
+        # only the materials and constructions are needed, skip the geometry
+        osmod_snapshot = openstudio_utils.get_osmod_snapshot(osmodel, geometry=False)
+    osmod_dicts = openstudio_utils.snapshot2dicts(osmod_snapshot)
+    mat_dicts = osmod_dicts['materials']
+    constr_dicts = osmod_dicts['constructions']
+    constr_entries = []
+    constr_vals = constr_dicts.values()
+    for constr_val in constr_vals:
+        constr_name = constr_val['name']
+        ttl_resistance = calc_constr_resistance(constr_val, mat_dicts)
+        if ttl_resistance is not None:
+            ttl_resistance = round(ttl_resistance, 2)
+            flat_mats = [utils.flatten_mat_dict(mat_dicts[mat_handle]) for mat_handle in constr_val['mat_handles']]
+            constr_entries.append((constr_name, ttl_resistance, flat_mats))
+    return constr_entries
+
+def extract_calc_envlp_constr(osmod_dir: str, res_path: str, text: bool = False, timings: dict = None, jobs: int = 1, 
+                              incremental: bool = False) -> str:
     '''
     Extract envelope construction information from openstudio model.
 
@@ -81,32 +145,81 @@ def extract_calc_envlp_constr(osmod_dir: str, res_path: str) -> str:
     
     res_path: str
         the path of the generated result.
-    
+
+    text: bool, optional
+        if True, the materials and constructions are read from the osm text with osmtext_utils instead of loading the models with openstudio.
+
+    timings: dict, optional
+        if given, the number of models (nfiles), the number of models read (nreduced), the number of models removed from the manifest (nremoved), the number of worker processes (jobs) 
+        and the time in seconds spent reading the models (read_time) and building the library (library_time) are put in it. With more than one job, read_time is the time spent waiting for the workers.
+
+    jobs: int, optional
+        the number of worker processes reading the models with reduce_osmod(). The workers return the models in the order of the directory listing and 
+        they are merged in that order, the result is the same as with one job. Default 1.
+
+    incremental: bool, optional
+        if True, the size, mtime, content hash and the constructions of each model are kept in the manifest from utils.get_constr_lib_manifest_path(). 
+        On the next call only the new or changed models are read, the deleted models are removed from the manifest and the library is merged again 
+        from the manifest in the order of the directory listing, the result is the same as reading all the models. Default False.
+
+    Returns
+    -------
+    str
+        the path of the generated result.
     '''
     #------------------------------------------------------------------------------------------------------
-    osmod_paths = Path(osmod_dir).glob('*.osm')
+    osmod_paths = list(Path(osmod_dir).glob('*.osm'))
     constr_lib = {}
     mat_lib = {}
-    for osmod_path in osmod_paths:
-        osmodel = osmod.Model.load(osmod_path).get()
-        mat_dicts = openstudio_utils.get_osmod_material_info(osmodel)
-        constr_dicts = openstudio_utils.get_osmod_construction_info(osmodel)
-        constr_vals = constr_dicts.values()
-        for constr_val in constr_vals:
-            constr_name = constr_val['name']
-            ttl_resistance = calc_constr_resistance(constr_val, mat_dicts)
-            if ttl_resistance is not None:
-                ttl_resistance = round(ttl_resistance, 2)
-                uniq_ids = utils.get_mat_layers_frm_constr(constr_val, mat_dicts, mat_lib)
-                if ttl_resistance not in constr_lib.keys():
-                    constr_lib[ttl_resistance] = {'name': [constr_name], 'material_layers': [uniq_ids]}
-                else:
-                    uniq_ids_ls = constr_lib[ttl_resistance]['material_layers']
-                    sort_uniq_ids_ls = utils.sort2dls(uniq_ids_ls)
-                    sort_uniq_ls = sorted(uniq_ids)
-                    if sort_uniq_ls not in sort_uniq_ids_ls:
-                        constr_lib[ttl_resistance]['material_layers'].append(uniq_ids)
-                        constr_lib[ttl_resistance]['name'].append(constr_name)
+    # the fingerprints of the materials in mat_lib and the sorted material layers of each key of constr_lib
+    mat_index = {}
+    constr_index = {}
+    nfiles = 0
+    nremoved = 0
+    read_time = 0.0
+    library_time = 0.0
+    start = time.perf_counter()
+    # the constructions of the unchanged models from the manifest
+    cached_entries = {}
+    if incremental:
+        manifest_path = utils.get_constr_lib_manifest_path(res_path)
+        prev_files = utils.read_constr_lib_manifest(manifest_path, text)
+        files = {}
+        for osmod_path in osmod_paths:
+            prev_file = prev_files.get(osmod_path.name)
+            files[osmod_path.name] = utils.get_file_stat(osmod_path, prev_stat=prev_file)
+            if prev_file is not None and prev_file['hash'] == files[osmod_path.name]['hash']:
+                cached_entries[osmod_path.name] = prev_file['constructions']
+        nremoved = len(prev_files.keys() - files.keys())
+    read_time += time.perf_counter() - start
+
+    reduce_paths = [osmod_path for osmod_path in osmod_paths if osmod_path.name not in cached_entries.keys()]
+    executor = None
+    if jobs > 1:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        chunksize = max(1, len(reduce_paths)//(jobs*4))
+        reduced_osmods = executor.map(reduce_osmod, reduce_paths, repeat(text), chunksize=chunksize)
+    else:
+        reduced_osmods = map(reduce_osmod, reduce_paths, repeat(text))
+
+    try:
+        for osmod_path in osmod_paths:
+            start = time.perf_counter()
+            if osmod_path.name in cached_entries.keys():
+                constr_entries = cached_entries[osmod_path.name]
+            else:
+                constr_entries = next(reduced_osmods)
+            if incremental:
+                files[osmod_path.name]['constructions'] = constr_entries
+            read_time += time.perf_counter() - start
+            nfiles += 1
+
+            start = time.perf_counter()
+            utils.add_constrs2lib(constr_entries, constr_lib, constr_index, mat_lib, mat_index)
+            library_time += time.perf_counter() - start
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
     constr_lib = dict(sorted(constr_lib.items()))
     osmod_envlp_info = {'material_library': mat_lib, 'construction_library': constr_lib}
@@ -120,6 +233,12 @@ def extract_calc_envlp_constr(osmod_dir: str, res_path: str) -> str:
         # json.dump(osmod_envlp_info, f)
         f.write(envlp_json_str)
 
+    if incremental:
+        utils.write_constr_lib_manifest(manifest_path, osmod_dir, text, files)
+
+    if timings is not None:
+        timings.update({'nfiles': nfiles, 'nreduced': len(reduce_paths), 'nremoved': nremoved, 'jobs': jobs, 'read_time': read_time, 'library_time': library_time})
+    return res_path
     #------------------------------------------------------------------------------------------------------
 def main():
     args = parse_args()
@@ -133,9 +252,16 @@ def main():
     res_path = args.res
     res_path = str(Path(res_path).resolve())
     osmod_dir = str(Path(osmod_dir).resolve())
-    extract_calc_envlp_constr(osmod_dir, res_path)
+    timings = None
+    if args.benchmark:
+        timings = {}
+    extract_calc_envlp_constr(osmod_dir, res_path, text=args.text, timings=timings, jobs=args.jobs, 
+                              incremental=args.incremental)
     # make sure this output can be piped into another command on the cmd
     print(res_path)
+    if args.benchmark:
+        report_path = utils.write_constr_lib_benchmark(res_path, osmod_dir, timings)
+        print(report_path)
     sys.stdout.flush()
 #===================================================================================================
 # endregion: FUNCTIONS
@@ -11,6 +11,7 @@ from openstudio import model as osmod
 import geomie3d
 import ifc_utils.ifcopenshell_utils as ifcopenshell_utils
 from .utils import openstudio_utils
+from .utils import constrlib_utils
 from . import settings
 #===================================================================================================
 # region: FUNCTIONS
@@ -34,6 +35,9 @@ def parse_args():
     parser.add_argument('-p', '--process', action = 'store_true', default=False,
                         help = 'turn it on if piping in ifc filepath')
     
+    parser.add_argument('-m', '--match', action = 'store_true', default=False,
+                        help = 'match the constructions on all the properties given in the psets with the compiled construction libraries instead of only the R-value or U-value')
+    
     # parse the arguments from standard input
     args = parser.parse_args()
     return args
@@ -204,6 +208,41 @@ def create_ossubsrf(osmodel: osmod, subsrf: geomie3d.topobj.Face, constr_dicts:
 
     return ossubsrf_ls
 
+def create_osmod_mat(osmodel: osmod, mat_dict: dict) -> osmod.Material:
+    '''
+    create openstudio material from the material of the construction library.
+
+    Parameters
+    ----------
+    osmodel: osmod
+        openstudio model
+
+    mat_dict: dict
+        the material from the material library.
+    
+    Returns
+    -------
+    osmod.Material
+        the openstudio material, None if the material cannot be created.
+    '''
+    if mat_dict['ufactor'] is not None:
+        smpl_glz = osmod.SimpleGlazing(osmodel, mat_dict['ufactor'], mat_dict['solarheatgaincoefficient'])
+        smpl_glz.setVisibleTransmittance(mat_dict['visibletransmittance'])
+        return smpl_glz
+    elif mat_dict['conductivity'] is not None:
+        std_opq_mat = osmod.StandardOpaqueMaterial(osmodel, mat_dict['roughness'], mat_dict['thickness'],
+                                                   mat_dict['conductivity'], mat_dict['density'], mat_dict['specificheat'])
+        return std_opq_mat
+    elif mat_dict['thermalresistance'] is not None: # must be a massless material
+        massless_mat = osmod.MasslessOpaqueMaterial(osmodel, mat_dict['roughness'], mat_dict['thermalresistance'])
+        massless_mat.setThermalAbsorptance(mat_dict['thermalabsorptance'])
+        massless_mat.setSolarAbsorptance (mat_dict['solarabsorptance'])
+        massless_mat.setVisibleAbsorptance (mat_dict['visibleabsorptance'])
+        return massless_mat
+    else:
+        print('MATERIAL NOT AVAILABLE')
+        return None
+
 def create_opq_constr(osmodel: osmod, thermal_resistance: float, opq_constr_path: str) -> osmod.Construction:
     '''
     create openstudio construction based on the thermal resistance of the wall.
@@ -251,18 +290,9 @@ def create_opq_constr(osmodel: osmod, thermal_resistance: float, opq_constr_path
     osmod_layers = []
     for ml in chosen_mat_layer:
         mat_dict = mat_lib[str(ml)]
-        if mat_dict['conductivity'] is not None:
-            std_opq_mat = osmod.StandardOpaqueMaterial(osmodel, mat_dict['roughness'], mat_dict['thickness'],
-                                                       mat_dict['conductivity'], mat_dict['density'], mat_dict['specificheat'])
-            osmod_layers.append(std_opq_mat)
-        elif mat_dict['thermalresistance'] is not None: # must be a massless material
-            massless_mat = osmod.MasslessOpaqueMaterial(osmodel, mat_dict['roughness'], mat_dict['thermalresistance'])
-            massless_mat.setThermalAbsorptance(mat_dict['thermalabsorptance'])
-            massless_mat.setSolarAbsorptance (mat_dict['solarabsorptance'])
-            massless_mat.setVisibleAbsorptance (mat_dict['visibleabsorptance'])
-            osmod_layers.append(massless_mat)
-        else:
-            print('MATERIAL NOT AVAILABLE')
+        osmod_mat = create_osmod_mat(osmodel, mat_dict)
+        if osmod_mat is not None:
+            osmod_layers.append(osmod_mat)
 
     
     osmod_constr = osmod.Construction(osmodel)
@@ -318,8 +348,7 @@ def create_smpl_glz_constr(osmodel: osmod, uvalue: float, smpl_glz_constr_path:
     osmod_layers = []
     for ml in chosen_mat_layer:
         mat_dict = mat_lib[str(ml)]
-        smpl_glz = osmod.SimpleGlazing(osmodel, mat_dict['ufactor'], mat_dict['solarheatgaincoefficient'])
-        smpl_glz.setVisibleTransmittance(mat_dict['visibletransmittance'])
+        smpl_glz = create_osmod_mat(osmodel, mat_dict)
         osmod_layers.append(smpl_glz)
     
     osmod_constr = osmod.Construction(osmodel)
@@ -327,7 +356,51 @@ def create_smpl_glz_constr(osmodel: osmod, uvalue: float, smpl_glz_constr_path:
     osmod_constr.setLayers(osmod_layers)
     return osmod_constr
 
-def ifcarch2osmod(ifc_path: str, osmod_path: str, viz: bool, opq_constr_path: str, smpl_glz_constr_path: str) -> str:
+def create_matched_constr(osmodel: osmod, pset: dict, constr_lib_path: str, prefer: tuple[str, str] = None) -> osmod.Construction:
+    '''
+    create openstudio construction nearest to all the properties given in the pset with the compiled construction library.
+
+    Parameters
+    ----------
+    osmodel: osmod
+        openstudio model
+
+    pset: dict
+        the pset of the envelope or window, refer to constrlib_utils.PSET_CONSTR_PROPS for the properties that are matched.
+
+    constr_lib_path: str
+        the path of the construction library, refer to constrlib_utils.load_constr_lib().
+
+    prefer: tuple[str, str], optional
+        (property, min or max) to choose between constructions at the same distance, refer to constrlib_utils.query_constr_lib().
+    
+    Returns
+    -------
+    osmod.Construction
+        the openstudio construction, None if no construction in the library has all the properties of the pset. ValueError is raised if the pset has none of the properties.
+    '''
+    clib = constrlib_utils.load_constr_lib(constr_lib_path)
+    targets = constrlib_utils.get_pset_targets(pset)
+    if len(targets) == 0:
+        raise ValueError(f"the pset has no value for any of {list(constrlib_utils.PSET_CONSTR_PROPS.keys())} to match a construction with")
+    chosen_idx = constrlib_utils.query_constr_lib(clib, targets, prefer=prefer)
+    if chosen_idx == -1:
+        print(f"NO CONSTRUCTION IN {constr_lib_path} HAS ALL OF {list(targets.keys())}")
+        return None
+    chosen_name, mat_dicts = constrlib_utils.get_constr_mats(clib, chosen_idx)
+    # create the construction in osmod
+    osmod_layers = []
+    for mat_dict in mat_dicts:
+        osmod_mat = create_osmod_mat(osmodel, mat_dict)
+        if osmod_mat is not None:
+            osmod_layers.append(osmod_mat)
+
+    osmod_constr = osmod.Construction(osmodel)
+    osmod_constr.setName(chosen_name)
+    osmod_constr.setLayers(osmod_layers)
+    return osmod_constr
+
+def ifcarch2osmod(ifc_path: str, osmod_path: str, viz: bool, opq_constr_path: str, smpl_glz_constr_path: str, match: bool = False) -> str:
     '''
     Converts ifc to openstudio model.
 
@@ -351,6 +424,9 @@ def ifcarch2osmod(ifc_path: str, osmod_path: str, viz: bool, opq_constr_path: st
     smpl_glz_constr_path: str
         path to the JSON file that stores glazing info for openstudio
 
+    match: bool, optional
+        if True, the constructions are matched on all the properties given in the psets with create_matched_constr() instead of only the R-value or U-value. Default False.
+
     Returns
     -------
     str
@@ -396,7 +472,12 @@ def ifcarch2osmod(ifc_path: str, osmod_path: str, viz: bool, opq_constr_path: st
         envlpc_val = envlpc_item[1]
         t_resist = envlpc_val['ThermalResistance']
         # base on this thermal resistance search for the right material
-        opq_constr = create_opq_constr(osmodel, t_resist, opq_constr_path)
+        opq_constr = None
+        if match:
+            opq_constr = create_matched_constr(osmodel, envlpc_val, opq_constr_path, prefer=('thickness', 'min'))
+        # fall back to the thermal resistance if no construction has all the properties
+        if opq_constr is None:
+            opq_constr = create_opq_constr(osmodel, t_resist, opq_constr_path)
         osenvlp_constr_dicts[envlpc_key] = opq_constr
     # endregion: create wall materials and construction
     
@@ -406,10 +487,17 @@ def ifcarch2osmod(ifc_path: str, osmod_path: str, viz: bool, opq_constr_path: st
     for glzc_item in glzc_items:
         glzc_val = glzc_item[1]
         glzc_key = glzc_item[0]
+        subsrf_constr = None
         if 'UFactor' in list(glzc_val.keys()):
-            subsrf_constr = create_smpl_glz_constr(osmodel, glzc_val['UFactor'], smpl_glz_constr_path)
+            if match:
+                subsrf_constr = create_matched_constr(osmodel, glzc_val, smpl_glz_constr_path, prefer=('vt', 'max'))
+            if subsrf_constr is None:
+                subsrf_constr = create_smpl_glz_constr(osmodel, glzc_val['UFactor'], smpl_glz_constr_path)
         elif 'ThermalResistance' in list(glzc_val.keys()):
-            subsrf_constr = create_opq_constr(osmodel, glzc_val['ThermalResistance'], opq_constr_path)
+            if match:
+                subsrf_constr = create_matched_constr(osmodel, glzc_val, opq_constr_path, prefer=('thickness', 'min'))
+            if subsrf_constr is None:
+                subsrf_constr = create_opq_constr(osmodel, glzc_val['ThermalResistance'], opq_constr_path)
         else:
             print('GLAZING MATERIAL NOT ACCOUNTED FOR')
 
@@ -608,7 +696,7 @@ def main():
     osmod_path = Path(osmod_path).resolve()
     opq_constr_path = settings.OSMOD_OPQ_CONSTR_PATH
     smpl_glz_constr_path = settings.OSMOD_SMPL_GLZ_CONSTR_PATH
-    ifcarch2osmod(ifc_path, osmod_path, viz, opq_constr_path, smpl_glz_constr_path)
+    ifcarch2osmod(ifc_path, osmod_path, viz, opq_constr_path, smpl_glz_constr_path, match=args.match)
     # make sure this output can be piped into another command on the cmd
     print(osmod_path)
     sys.stdout.flush()
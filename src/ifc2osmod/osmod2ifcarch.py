@@ -1,5 +1,6 @@
 import sys
 import json
+import time
 import argparse
 from pathlib import Path
 
@@ -12,6 +13,8 @@ from openstudio import model as osmod
 import ifc_utils.ifcopenshell_utils as ifcopenshell_utils
 from . import settings
 from .utils import openstudio_utils
+from .utils import ifcbulk_utils
+from .utils import geom_utils
 #===================================================================================================
 # region: FUNCTIONS
 #===================================================================================================
@@ -27,6 +30,15 @@ def parse_args():
                         metavar = 'FILE',
                         help = 'The file path of the resultant ifc file')
     
+    parser.add_argument('-f', '--fast', action = 'store_true', default=False,
+                        help = 'create the surfaces with direct entity creation and write the type and container relationships in bulk instead of through ifcopenshell.api')
+
+    parser.add_argument('-in', '--instance', action = 'store_true', default=False,
+                        help = 'share one IfcRepresentationMap between the windows and doors with the same shape, thickness and construction and place them with IfcMappedItem')
+
+    parser.add_argument('-b', '--benchmark', action = 'store_true', default=False,
+                        help = 'convert the model with both writers, compare the outputs and report the runtime of each writer')
+
     parser.add_argument('-p', '--process', action = 'store_true',
                         default=False, help = 'turn it on if piping in the osmod filepath')
     
@@ -128,9 +140,9 @@ def srf_verts_2pt_wall(xyzs: np.ndarray | list) -> tuple[np.ndarray, float, floa
     fused_xyzs2d = fused_xyzs2d.tolist()
     return fused_xyzs2d, height, bbox.minz
 
-def create_ifc_srf_style(ifcmodel: ifcopenshell.file, rgb: list[float], transparency: float, representation: ifcopenshell.entity_instance):
+def get_ifc_srf_style(ifcmodel: ifcopenshell.file, rgb: list[float], transparency: float, srf_styles: dict = None) -> ifcopenshell.entity_instance:
     '''
-    define the color and transparency of an ifc representation.
+    get the IfcSurfaceStyle of the color and transparency, create it if it is not in the srf_styles.
 
     Parameters
     ----------
@@ -142,10 +154,19 @@ def create_ifc_srf_style(ifcmodel: ifcopenshell.file, rgb: list[float], transpar
 
     transparency: float
         value of 0-1. 0 being opaque, 1 being transparent.
-    
-    representation: ifcopenshell.entity_instance
-        the ifc representation to assign the style to.
+
+    srf_styles: dict, optional
+        - dictionary of all the styles already created, the (r, g, b, transparency) tuple is used as the key.
+        - with the value of the dictionary is the IfcSurfaceStyle. The style is reused if it is already in the dictionary.
+
+    Returns
+    -------
+    ifcopenshell.entity_instance
+        The IfcSurfaceStyle.
     '''
+    style_key = (float(rgb[0]), float(rgb[1]), float(rgb[2]), float(transparency))
+    if srf_styles is not None and style_key in srf_styles.keys():
+        return srf_styles[style_key]
     # add a style to the material for easy visualization
     style = ifcopenshell.api.run("style.add_style", ifcmodel)
     # Create a simple grey shading colour and transparency.
@@ -154,12 +175,235 @@ def create_ifc_srf_style(ifcmodel: ifcopenshell.file, rgb: list[float], transpar
             "SurfaceColour": { "Name": None, "Red": rgb[0], "Green": rgb[1], "Blue": rgb[2] },
             "Transparency": transparency, # 0 is opaque, 1 is transparent
         })
+    if srf_styles is not None:
+        srf_styles[style_key] = style
+    return style
+
+def create_ifc_srf_style(ifcmodel: ifcopenshell.file, rgb: list[float], transparency: float, representation: ifcopenshell.entity_instance,
+                         srf_styles: dict = None, bulk: dict = None) -> ifcopenshell.entity_instance:
+    '''
+    define the color and transparency of an ifc representation.
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    rgb: list[float]
+        list[shape(3)], [r,g,b]. Values of 0-1
+
+    transparency: float
+        value of 0-1. 0 being opaque, 1 being transparent.
+    
+    representation: ifcopenshell.entity_instance
+        the ifc representation to assign the style to.
+
+    srf_styles: dict, optional
+        - dictionary of all the styles already created, the (r, g, b, transparency) tuple is used as the key.
+        - with the value of the dictionary is the IfcSurfaceStyle. The style is reused if it is already in the dictionary.
+
+    bulk: dict, optional
+        the bulk writer dictionary from create_bulk_writer(). If given, the style is assigned with direct entity creation.
+
+    Returns
+    -------
+    ifcopenshell.entity_instance
+        The IfcSurfaceStyle assigned to the representation.
+    '''
+    style = get_ifc_srf_style(ifcmodel, rgb, transparency, srf_styles=srf_styles)
     # Now any element (like our wall) with a concrete material will have
-    ifcopenshell.api.run("style.assign_representation_styles", ifcmodel, shape_representation=representation, styles=[style])
+    if bulk is not None:
+        ifcbulk_utils.assign_style(ifcmodel, representation, style)
+    else:
+        ifcopenshell.api.run("style.assign_representation_styles", ifcmodel, shape_representation=representation, styles=[style])
+    return style
+
+def create_bulk_writer(ifcmodel: ifcopenshell.file) -> dict:
+    '''
+    create the dictionary that collects the relationships of the fast writer to be written in bulk with write_bulk_rels().
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    Returns
+    -------
+    dict
+        dictionary with the keys: unit_scale, type_objs (the occurrences of each ifc built element type), container_objs (the elements of each building storey).
+    '''
+    return {'unit_scale': ifcbulk_utils.get_unit_scale(ifcmodel), 'type_objs': {}, 'container_objs': {}}
+
+def write_bulk_rels(ifcmodel: ifcopenshell.file, bulk: dict):
+    '''
+    write the type, material usage and spatial container relationships collected by the fast writer.
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    bulk: dict
+        the bulk writer dictionary from create_bulk_writer().
+    '''
+    ifcbulk_utils.write_type_rels(ifcmodel, bulk['type_objs'])
+    ifcbulk_utils.write_container_rels(ifcmodel, bulk['container_objs'])
+
+def calc_srf_meshes(space_dicts: dict, const_dicts: dict):
+    '''
+    compute the meshes of all the surfaces, openings, windows and doors of the spaces before any ifc is written. The extrusions of the whole model are done in batches with geom_utils.extrude_polygons().
+
+    Parameters
+    ----------
+    space_dicts: dict
+        - the space dictionaries from openstudio_utils.snapshot2dicts(), each with the keys surfaces and sub_surfaces.
+        - the surface dictionaries get the keys thickness, mesh_vertices and mesh_faces.
+        - the sub surface dictionaries get the keys mesh_vertices, mesh_faces, opening_vertices and opening_faces.
+
+    const_dicts: dict
+        - nested dictionaries, the osmod handle of the construction is used as the key on the top level
+        - each dictionary has the following keys: ifc_mat_layer_set, thickness, name, mat_names, mat_handles
+    '''
+    # the polygons to extrude, with the extrusion, direction, movement and where to put the mesh
+    ext_xyzs = []
+    ext_mags = []
+    ext_dirs = []
+    ext_mvs = []
+    ext_targets = []
+    def add_srf_mesh(xyzs: list, srf_type: str, srf_const_dict: dict, const_thickness: float, target: dict, prefix: str):
+        if srf_const_dict is not None and const_thickness > 0:
+            ext_xyzs.append(xyzs)
+            ext_mags.append(const_thickness)
+            if srf_type == 'Wall':
+                # walls are extruded on both sides of the surface
+                ext_dirs.append(None)
+                ext_mvs.append(const_thickness/2)
+            elif srf_type == 'RoofCeiling':
+                ext_dirs.append([0,0,1])
+                ext_mvs.append(0)
+            else:
+                ext_dirs.append(None)
+                ext_mvs.append(0)
+            ext_targets.append((target, prefix))
+        else:
+            target[f"{prefix}_vertices"] = xyzs
+            target[f"{prefix}_faces"] = [list(range(len(xyzs)))]
+
+    for space_dict_val in space_dicts.values():
+        # a surface without construction takes the construction of the previous surface of the space
+        surface_dicts = space_dict_val['surfaces']
+        srf_const_dict = None
+        const_thickness = None
+        for surface_dict_val in surface_dicts.values():
+            const_handle = surface_dict_val['construction']
+            if const_handle is not None:
+                srf_const_dict = const_dicts[const_handle]
+                const_thickness = srf_const_dict['thickness']
+            surface_dict_val['thickness'] = const_thickness
+            add_srf_mesh(surface_dict_val['vertices'], surface_dict_val['type'], srf_const_dict, const_thickness, surface_dict_val, 'mesh')
+
+        srf_const_dict = None
+        const_thickness = None
+        for sub_surface_dict_val in space_dict_val['sub_surfaces'].values():
+            ssrf_vertices = sub_surface_dict_val['vertices']
+            # the hole in the wall
+            host_thickness = surface_dicts[sub_surface_dict_val['host']]['thickness']
+            ext_xyzs.append(ssrf_vertices)
+            ext_mags.append(host_thickness*2.5)
+            ext_dirs.append(None)
+            ext_mvs.append(host_thickness)
+            ext_targets.append((sub_surface_dict_val, 'opening'))
+
+            ssrf_const_handle = sub_surface_dict_val['construction']
+            if ssrf_const_handle is not None:
+                srf_const_dict = const_dicts[ssrf_const_handle]
+                const_thickness = srf_const_dict['thickness']
+            add_srf_mesh(ssrf_vertices, sub_surface_dict_val['type'], srf_const_dict, const_thickness, sub_surface_dict_val, 'mesh')
+
+    poly_meshes = geom_utils.extrude_polygons(ext_xyzs, ext_mags, directions=ext_dirs, movements=ext_mvs)
+    for (target, prefix), poly_mesh in zip(ext_targets, poly_meshes):
+        target[f"{prefix}_vertices"] = poly_mesh['vertices']
+        target[f"{prefix}_faces"] = poly_mesh['indices']
+
+def create_instancer(ifcmodel: ifcopenshell.file) -> dict:
+    '''
+    create the dictionary that keeps the IfcRepresentationMap of the window and door shapes for get_ifc_repr_map().
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    Returns
+    -------
+    dict
+        dictionary with the keys: unit_scale, rep_maps (the IfcRepresentationMap of each shape key), transform (the identity IfcCartesianTransformationOperator3D shared by the IfcMappedItem).
+    '''
+    return {'unit_scale': ifcbulk_utils.get_unit_scale(ifcmodel), 'rep_maps': {}, 'transform': ifcbulk_utils.create_identity_transform(ifcmodel)}
+
+def get_ifc_repr_map(ifcmodel: ifcopenshell.file, xyzs: np.ndarray | list, mesh_verts: np.ndarray | list, mesh_faces: list, ifc_class: str,
+                     const_thickness: float, srf_const_dict: dict, body: ifcopenshell.entity_instance,
+                     instances: dict) -> tuple[ifcopenshell.entity_instance, np.ndarray, bool]:
+    '''
+    get the IfcRepresentationMap of the shape of the surface, create it if the shape is new.
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    xyzs: np.ndarray | list
+        np.ndarray[shape(number of points, 3)] the points forming the polygon face to be processed.
+
+    mesh_verts: np.ndarray | list
+        np.ndarray[shape(number of points, 3)] the vertices of the mesh of the surface from calc_srf_meshes().
+
+    mesh_faces: list
+        the faces of the mesh of the surface.
+
+    ifc_class: str
+        the ifc built element class.
+
+    const_thickness: float
+        the thickness of the construction.
+
+    srf_const_dict: dict
+        dictionary has the following keys: ifc_mat_layer_set, thickness, name, mat_names, mat_handles.
+
+    body: ifcopenshell.entity_instance
+        modeling context of the ifc model.
+
+    instances: dict
+        the dictionary from create_instancer().
+
+    Returns
+    -------
+    tuple[ifcopenshell.entity_instance, np.ndarray, bool]
+        - the IfcRepresentationMap.
+        - np.ndarray[shape(4, 4)] the placement matrix of the surface in meters.
+        - True if the IfcRepresentationMap is created by this call.
+    '''
+    matrix, local_xyzs = ifcbulk_utils.calc_local_frame(xyzs)
+    const_name = None
+    thickness = None
+    if srf_const_dict is not None:
+        const_name = srf_const_dict['name']
+        thickness = round(const_thickness, 6)
+    # the shape is the same to 0.1mm
+    shape_key = (ifc_class, const_name, thickness, tuple(np.round(local_xyzs, decimals=4).ravel().tolist()))
+    if shape_key in instances['rep_maps'].keys():
+        return instances['rep_maps'][shape_key], matrix, False
+
+    local_mesh_verts = (np.array(mesh_verts, dtype=float) - matrix[:3, 3]) @ matrix[:3, :3]
+    map_repr = ifcbulk_utils.create_mesh_representation(ifcmodel, body, local_mesh_verts, mesh_faces, instances['unit_scale'])
+    rep_map = ifcbulk_utils.create_representation_map(ifcmodel, map_repr)
+    instances['rep_maps'][shape_key] = rep_map
+    return rep_map, matrix, True
 
 def create_an_ifc_surface(ifcmodel: ifcopenshell.file, xyzs: np.ndarray, name: str, ifc_class: str, const_thickness: float, 
                           surface_dict: dict, body: ifcopenshell.entity_instance, srf_const_dict: dict, const_types: dict, 
-                          ifc_type_class: str, predefined_type: str) -> ifcopenshell.entity_instance:
+                          ifc_type_class: str, predefined_type: str, srf_styles: dict = None, bulk: dict = None,
+                          instances: dict = None) -> ifcopenshell.entity_instance:
     '''
     create IfcSlab or IfcRoof.
 
@@ -181,7 +425,7 @@ def create_an_ifc_surface(ifcmodel: ifcopenshell.file, xyzs: np.ndarray, name: s
         the thickness of the slab or roof.
 
     surface_dict: dict
-        dict has keys: name, vertices, construction, type, thickness
+        dict has keys: name, vertices, construction, type, thickness, mesh_vertices, mesh_faces. The mesh is from calc_srf_meshes().
     
     body: ifcopenshell.entity_instance
         modeling context of the ifc model.
@@ -199,35 +443,50 @@ def create_an_ifc_surface(ifcmodel: ifcopenshell.file, xyzs: np.ndarray, name: s
     predefined_type: str
         the predefined type of the built element type. 
 
+    srf_styles: dict, optional
+        dictionary of the IfcSurfaceStyle already created, keyed by the (r, g, b, transparency) tuple. A style is created once per colour.
+
+    bulk: dict, optional
+        the bulk writer dictionary from create_bulk_writer(). If given, the entities are created directly and the type relationship is collected in it.
+
+    instances: dict, optional
+        the dictionary from create_instancer(). If given, the IfcWindow and IfcDoor instance a shared IfcRepresentationMap of their shape.
+
     Returns
     -------
     ifcopenshell.entity_instance
         The ifc built element that is created.
     '''
-    ifc_surface = ifcopenshell.api.run("root.create_entity", ifcmodel, ifc_class=ifc_class, name=name)
-    if srf_const_dict is not None and const_thickness > 0:
-        if ifc_class == 'IfcWall':
-            poly_mesh_dict = ifcopenshell_utils.mv_extrude_srf(xyzs, const_thickness, const_thickness/2)
-            ifc_repr = ifcopenshell.api.run("geometry.add_mesh_representation", ifcmodel, context=body, 
-                                            vertices=[poly_mesh_dict['vertices'].tolist()], faces=[poly_mesh_dict['indices']])
-            ifcopenshell.api.run("geometry.edit_object_placement", ifcmodel, product=ifc_surface)
-        elif ifc_class == 'IfcRoof':
-            poly_mesh_dict = ifcopenshell_utils.extrude(xyzs, const_thickness, direction=[0,0,1])
-            ifc_repr = ifcopenshell.api.run("geometry.add_mesh_representation", ifcmodel, context=body, 
-                                            vertices=[poly_mesh_dict['vertices'].tolist()], faces=[poly_mesh_dict['indices']])
-            ifcopenshell.api.run("geometry.edit_object_placement", ifcmodel, product=ifc_surface)
+    mesh_verts = surface_dict['mesh_vertices']
+    mesh_faces = surface_dict['mesh_faces']
+    if instances is not None and (ifc_class == 'IfcWindow' or ifc_class == 'IfcDoor'):
+        rep_map, matrix, is_new = get_ifc_repr_map(ifcmodel, xyzs, mesh_verts, mesh_faces, ifc_class, const_thickness, srf_const_dict,
+                                                   body, instances)
+        ifc_repr = ifcbulk_utils.create_mapped_representation(ifcmodel, body, rep_map, instances['transform'])
+        # the instances share the style of the map
+        style_repr = None
+        if is_new:
+            style_repr = rep_map.MappedRepresentation
+    else:
+        matrix = None
+        if bulk is not None:
+            ifc_repr = ifcbulk_utils.create_mesh_representation(ifcmodel, body, mesh_verts, mesh_faces, bulk['unit_scale'])
         else:
-            poly_mesh_dict = ifcopenshell_utils.extrude(xyzs, const_thickness)
-            ifc_repr = ifcopenshell.api.run("geometry.add_mesh_representation", ifcmodel, context=body, 
-                                            vertices=[poly_mesh_dict['vertices'].tolist()], faces=[poly_mesh_dict['indices']])
-            ifcopenshell.api.run("geometry.edit_object_placement", ifcmodel, product=ifc_surface)
+            ifc_repr = ifcopenshell.api.run("geometry.add_mesh_representation", ifcmodel, context=body,
+                                            vertices=[np.asarray(mesh_verts).tolist()], faces=[mesh_faces])
+        style_repr = ifc_repr
+
+    if bulk is not None:
+        ifc_surface = ifcbulk_utils.create_root_entity(ifcmodel, ifc_class, name)
+        ifcbulk_utils.assign_representation(ifcmodel, ifc_surface, ifc_repr, matrix=matrix, unit_scale=bulk['unit_scale'])
     else:
-        faces = [[list(range(len(xyzs)))]]
-        ifc_repr = ifcopenshell.api.run("geometry.add_mesh_representation", ifcmodel, context=body, 
-                                                vertices=[xyzs], faces=faces)
-        ifcopenshell.api.run("geometry.edit_object_placement", ifcmodel, product=ifc_surface)
+        ifc_surface = ifcopenshell.api.run("root.create_entity", ifcmodel, ifc_class=ifc_class, name=name)
+        if matrix is None:
+            ifcopenshell.api.run("geometry.edit_object_placement", ifcmodel, product=ifc_surface)
+        else:
+            ifcopenshell.api.run("geometry.edit_object_placement", ifcmodel, product=ifc_surface, matrix=matrix.copy())
+        ifcopenshell.api.run("geometry.assign_representation", ifcmodel, product=ifc_surface, representation=ifc_repr)
 
-    ifcopenshell.api.run("geometry.assign_representation", ifcmodel, product=ifc_surface, representation=ifc_repr)
     surface_dict['thickness'] = const_thickness
     surface_dict['ifc_surface'] = ifc_surface
 
@@ -248,32 +507,39 @@ def create_an_ifc_surface(ifcmodel: ifcopenshell.file, xyzs: np.ndarray, name: s
             ifc_type.PartitioningType = 'NOTDEFINED'
         elif ifc_type_class == 'IfcDoorType':
             ifc_type.OperationType = 'NOTDEFINED'
-        ifcopenshell.api.run("type.assign_type", ifcmodel, related_object=ifc_surface, relating_type=ifc_type)
+        if bulk is not None:
+            if ifc_type not in bulk['type_objs'].keys():
+                bulk['type_objs'][ifc_type] = []
+            bulk['type_objs'][ifc_type].append(ifc_surface)
+        else:
+            ifcopenshell.api.run("type.assign_type", ifcmodel, related_object=ifc_surface, relating_type=ifc_type)
     
     # color the representation
-    if ifc_class == 'IfcWall' or ifc_class == 'IfcSlab':
-        rgb = [0.5, 0.5, 0.5]
-        transparency = 0
-        create_ifc_srf_style(ifcmodel, rgb, transparency, ifc_repr)
-    elif ifc_class == 'IfcRoof':
-        rgb = [1.0, 0.0, 0.0]
-        transparency = 0
-        create_ifc_srf_style(ifcmodel, rgb, transparency, ifc_repr)
-
-    elif ifc_class == 'IfcWindow':
-        rgb = [1.0, 1.0, 1.0]
-        transparency = 0.8
-        create_ifc_srf_style(ifcmodel, rgb, transparency, ifc_repr)
+    if style_repr is not None:
+        if ifc_class == 'IfcWall' or ifc_class == 'IfcSlab':
+            rgb = [0.5, 0.5, 0.5]
+            transparency = 0
+            create_ifc_srf_style(ifcmodel, rgb, transparency, style_repr, srf_styles=srf_styles, bulk=bulk)
+        elif ifc_class == 'IfcRoof':
+            rgb = [1.0, 0.0, 0.0]
+            transparency = 0
+            create_ifc_srf_style(ifcmodel, rgb, transparency, style_repr, srf_styles=srf_styles, bulk=bulk)
+
+        elif ifc_class == 'IfcWindow':
+            rgb = [1.0, 1.0, 1.0]
+            transparency = 0.8
+            create_ifc_srf_style(ifcmodel, rgb, transparency, style_repr, srf_styles=srf_styles, bulk=bulk)
     
-    elif ifc_class == 'IfcDoor':
-        rgb = [0.5, 0.5, 0.5]
-        transparency = 0.0
-        create_ifc_srf_style(ifcmodel, rgb, transparency, ifc_repr)
+        elif ifc_class == 'IfcDoor':
+            rgb = [0.5, 0.5, 0.5]
+            transparency = 0.0
+            create_ifc_srf_style(ifcmodel, rgb, transparency, style_repr, srf_styles=srf_styles, bulk=bulk)
 
     return ifc_surface
     
 def create_ifc_surfaces(ifcmodel: ifcopenshell.file, surface_dicts: dict, const_dicts: dict, const_types: dict, 
-                        ifc_envelopes: list, body: ifcopenshell.entity_instance):
+                        ifc_envelopes: list, body: ifcopenshell.entity_instance, srf_styles: dict = None,
+                        bulk: dict = None):
     '''
     create IfcBuiltElement of the surfaces from openstudio model.
 
@@ -284,7 +550,7 @@ def create_ifc_surfaces(ifcmodel: ifcopenshell.file, surface_dicts: dict, const_
 
     surface_dicts: dict
         - surfaces: surface dictionaries index by their handles and 
-        - within each dict has keys: name, vertices, construction, type 
+        - within each dict has keys: name, vertices, construction, type, thickness, mesh_vertices, mesh_faces 
     
     const_dicts: dict
         - nested dictionaries, the osmod handle of the construction is used as the key on the top level
@@ -300,6 +566,12 @@ def create_ifc_surfaces(ifcmodel: ifcopenshell.file, surface_dicts: dict, const_
     body: ifcopenshell.entity_instance
         modeling context of the ifc model.
 
+    srf_styles: dict, optional
+        dictionary of the IfcSurfaceStyle already created, keyed by the (r, g, b, transparency) tuple.
+
+    bulk: dict, optional
+        the bulk writer dictionary from create_bulk_writer(). If given, the entities are created directly and the relationships are collected in it.
+
     '''
     surface_dict_vals = surface_dicts.values()
     srf_const_dict = None
@@ -314,18 +586,22 @@ def create_ifc_surfaces(ifcmodel: ifcopenshell.file, surface_dicts: dict, const_
             const_thickness = srf_const_dict['thickness']
         if srf_type == 'Wall':
             ifc_srf = create_an_ifc_surface(ifcmodel, vertices, srf_name, 'IfcWall', const_thickness, surface_dict_val, body, srf_const_dict,
-                                             const_types, 'IfcWallType', 'NOTDEFINED')
+                                             const_types, 'IfcWallType', 'NOTDEFINED', srf_styles=srf_styles,
+                                             bulk=bulk)
             
         elif srf_type == 'Floor':
             ifc_srf = create_an_ifc_surface(ifcmodel, vertices, srf_name, 'IfcSlab', const_thickness, surface_dict_val, body, srf_const_dict,
-                                                 const_types, 'IfcSlabType', 'FLOOR')
+                                                 const_types, 'IfcSlabType', 'FLOOR', srf_styles=srf_styles,
+                                                 bulk=bulk)
         elif srf_type == 'RoofCeiling':
             ifc_srf = create_an_ifc_surface(ifcmodel, vertices, srf_name, 'IfcRoof', const_thickness, surface_dict_val, body, srf_const_dict,
-                                             const_types, 'IfcRoofType', 'NOTDEFINED')
+                                             const_types, 'IfcRoofType', 'NOTDEFINED', srf_styles=srf_styles,
+                                             bulk=bulk)
         ifc_envelopes.append(ifc_srf)
 
 def create_ifc_sub_surfaces(ifcmodel: ifcopenshell.file, sub_surface_dicts: dict, surface_dicts: dict, const_dicts: dict, const_types: dict, 
-                            ifc_envelopes: list, body: ifcopenshell.entity_instance):
+                            ifc_envelopes: list, body: ifcopenshell.entity_instance, srf_styles: dict = None,
+                            bulk: dict = None, instances: dict = None):
     '''
     create IfcBuiltElement of the surfaces from openstudio model.
 
@@ -336,7 +612,7 @@ def create_ifc_sub_surfaces(ifcmodel: ifcopenshell.file, sub_surface_dicts: dict
 
     sub_surface_dicts: dict
         - sub surface dictionaries index by their handles and 
-        - within each dict has keys: name, vertices, construction, type, host
+        - within each dict has keys: name, vertices, construction, type, host, mesh_vertices, mesh_faces, opening_vertices, opening_faces
     
     surface_dicts: dict
         - surfaces: surface dictionaries index by their handles and 
@@ -356,6 +632,15 @@ def create_ifc_sub_surfaces(ifcmodel: ifcopenshell.file, sub_surface_dicts: dict
     body: ifcopenshell.entity_instance
         modeling context of the ifc model.
 
+    srf_styles: dict, optional
+        dictionary of the IfcSurfaceStyle already created, keyed by the (r, g, b, transparency) tuple.
+
+    bulk: dict, optional
+        the bulk writer dictionary from create_bulk_writer(). If given, the entities are created directly and the relationships are collected in it.
+
+    instances: dict, optional
+        the dictionary from create_instancer(). If given, the windows and doors instance a shared IfcRepresentationMap of their shape.
+
     '''
     sub_surface_dict_vals = sub_surface_dicts.values()
     srf_const_dict = None
@@ -365,17 +650,24 @@ def create_ifc_sub_surfaces(ifcmodel: ifcopenshell.file, sub_surface_dicts: dict
         ssrf_vertices = sub_surface_dict_val['vertices']
         sub_srf_type = sub_surface_dict_val['type']
         sub_srf_host = sub_surface_dict_val['host']
-        host_thickness = surface_dicts[sub_srf_host]['thickness']
         ifc_host = surface_dicts[sub_srf_host]['ifc_surface']
-        ifcopening = ifcopenshell.api.run("root.create_entity", ifcmodel, ifc_class="IfcOpeningElement", name=f"{sub_srf_name}_opening")
         # make a hole in the wall
-        extruded_ssrf = ifcopenshell_utils.mv_extrude_srf(ssrf_vertices, host_thickness*2.5, host_thickness)
-        opening_repr = ifcopenshell.api.run("geometry.add_mesh_representation", ifcmodel, context=body, 
-                                            vertices=[extruded_ssrf['vertices'].tolist()], faces=[extruded_ssrf['indices']])
-        ifcopenshell.api.run("geometry.edit_object_placement", ifcmodel, product=ifcopening)
-        ifcopenshell.api.run("geometry.assign_representation", ifcmodel, product=ifcopening, representation=opening_repr)
-        ifcopenshell.api.run("void.add_opening", ifcmodel, opening=ifcopening, element=ifc_host)
-        
+        opening_verts = sub_surface_dict_val['opening_vertices']
+        opening_faces = sub_surface_dict_val['opening_faces']
+        if bulk is not None:
+            ifcopening = ifcbulk_utils.create_root_entity(ifcmodel, "IfcOpeningElement", f"{sub_srf_name}_opening")
+            opening_repr = ifcbulk_utils.create_mesh_representation(ifcmodel, body, opening_verts, opening_faces,
+                                                                    bulk['unit_scale'])
+            ifcbulk_utils.assign_representation(ifcmodel, ifcopening, opening_repr)
+            ifcbulk_utils.add_opening(ifcmodel, ifcopening, ifc_host)
+        else:
+            ifcopening = ifcopenshell.api.run("root.create_entity", ifcmodel, ifc_class="IfcOpeningElement", name=f"{sub_srf_name}_opening")
+            opening_repr = ifcopenshell.api.run("geometry.add_mesh_representation", ifcmodel, context=body,
+                                                vertices=[opening_verts.tolist()], faces=[opening_faces])
+            ifcopenshell.api.run("geometry.edit_object_placement", ifcmodel, product=ifcopening)
+            ifcopenshell.api.run("geometry.assign_representation", ifcmodel, product=ifcopening, representation=opening_repr)
+            ifcopenshell.api.run("void.add_opening", ifcmodel, opening=ifcopening, element=ifc_host)
+
         ssrf_const_handle = sub_surface_dict_val['construction']
         if ssrf_const_handle is not None:
             srf_const_dict = const_dicts[ssrf_const_handle]
@@ -383,15 +675,40 @@ def create_ifc_sub_surfaces(ifcmodel: ifcopenshell.file, sub_surface_dicts: dict
 
         if sub_srf_type == 'FixedWindow':
             ifc_srf = create_an_ifc_surface(ifcmodel, ssrf_vertices, sub_srf_name, 'IfcWindow', const_thickness, sub_surface_dict_val, body, srf_const_dict,
-                                             const_types, 'IfcWindowType', 'NOTDEFINED')
-            ifcopenshell.api.run("void.add_filling", ifcmodel, opening=ifcopening, element=ifc_srf)
+                                             const_types, 'IfcWindowType', 'NOTDEFINED', srf_styles=srf_styles,
+                                             bulk=bulk, instances=instances)
+            add_ifc_filling(ifcmodel, ifcopening, ifc_srf, bulk=bulk)
         elif sub_srf_type == 'Door' or sub_srf_type == 'GlassDoor':
             ifc_srf = create_an_ifc_surface(ifcmodel, ssrf_vertices, sub_srf_name, 'IfcDoor', const_thickness, sub_surface_dict_val, body, srf_const_dict,
-                                             const_types, 'IfcDoorType', 'DOOR')
-            ifcopenshell.api.run("void.add_filling", ifcmodel, opening=ifcopening, element=ifc_srf)
+                                             const_types, 'IfcDoorType', 'DOOR', srf_styles=srf_styles,
+                                             bulk=bulk, instances=instances)
+            add_ifc_filling(ifcmodel, ifcopening, ifc_srf, bulk=bulk)
         ifc_envelopes.append(ifc_srf)
         
-def osmod2ifcarch(osmod_path: str, ifc_path: str, viz: bool) -> str:
+def add_ifc_filling(ifcmodel: ifcopenshell.file, ifcopening: ifcopenshell.entity_instance, ifc_srf: ifcopenshell.entity_instance, bulk: dict = None):
+    '''
+    fill the opening with the window or door.
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    ifcopening: ifcopenshell.entity_instance
+        the IfcOpeningElement.
+
+    ifc_srf: ifcopenshell.entity_instance
+        the IfcWindow or IfcDoor.
+
+    bulk: dict, optional
+        the bulk writer dictionary from create_bulk_writer(). If given, the relationship is created directly.
+    '''
+    if bulk is not None:
+        ifcbulk_utils.add_filling(ifcmodel, ifcopening, ifc_srf)
+    else:
+        ifcopenshell.api.run("void.add_filling", ifcmodel, opening=ifcopening, element=ifc_srf)
+
+def osmod2ifcarch(osmod_path: str, ifc_path: str, viz: bool, fast: bool = False, instance: bool = False) -> str:
     '''
     Converts osmodel to ifc.
 
@@ -406,6 +723,12 @@ def osmod2ifcarch(osmod_path: str, ifc_path: str, viz: bool) -> str:
     viz : bool
         visualize the calculation procedure if turned on.
 
+    fast : bool, optional
+        if True, the surfaces are created with direct entity creation and the type and container relationships are written in bulk.
+
+    instance : bool, optional
+        if True, the windows and doors with the same shape, thickness and construction share one IfcRepresentationMap.
+
     Returns
     -------
     str
@@ -416,18 +739,21 @@ def osmod2ifcarch(osmod_path: str, ifc_path: str, viz: bool) -> str:
     #------------------------------------------------------------------------------------------------------
     osmod_stem = str(Path(osmod_path).stem)
     osmodel = osmod.Model.load(osmod_path).get()
+    # walk the osmodel once
+    osmod_snapshot = openstudio_utils.get_osmod_snapshot(osmodel)
+    osmod_dicts = openstudio_utils.snapshot2dicts(osmod_snapshot)
     # get all the building storys
-    story_dicts = openstudio_utils.get_osmod_story_info(osmodel)
+    story_dicts = osmod_dicts['stories']
     # get all the osmodel spacetypes -> ifcspacetype
-    spacetype_dicts = openstudio_utils.get_osmod_spacetype_info(osmodel)
+    spacetype_dicts = osmod_dicts['spacetypes']
     # get all the materials from osmodel -> ifc material
-    mat_dicts = openstudio_utils.get_osmod_material_info(osmodel)
+    mat_dicts = osmod_dicts['materials']
     # get all the construction from osmodel -> ifc material set
-    const_dicts = openstudio_utils.get_osmod_construction_info(osmodel)
+    const_dicts = osmod_dicts['constructions']
     # get all the osmod thermalzones -> ifczone
-    tzone_dicts = openstudio_utils.get_osmod_tzone_info(osmodel)
+    tzone_dicts = osmod_dicts['tzones']
     # get all the spaces -> ifcspace
-    space_dicts = openstudio_utils.get_osmod_space_info(osmodel)
+    space_dicts = osmod_dicts['spaces']
     #------------------------------------------------------------------------------------------------------
     # endregion: extract data from the osmodel
     #------------------------------------------------------------------------------------------------------
@@ -533,6 +859,16 @@ def osmod2ifcarch(osmod_path: str, ifc_path: str, viz: bool) -> str:
     osmod_space_pset_template = ifcopenshell_utils.create_osmod_pset_template(ifcmodel, osmod_space_schema_path)
 
     const_types = {}
+    # only a handful of colours are used, share one IfcSurfaceStyle per colour
+    srf_styles = {}
+    # compute the geometry of the whole model before writing it
+    calc_srf_meshes(space_dicts, const_dicts)
+    bulk = None
+    if fast:
+        bulk = create_bulk_writer(ifcmodel)
+    instances = None
+    if instance:
+        instances = create_instancer(ifcmodel)
     space_dict_vals = space_dicts.values()
     for space_dict_val in space_dict_vals:
         # create IfcSpatialZone and input its psets
@@ -559,13 +895,22 @@ def osmod2ifcarch(osmod_path: str, ifc_path: str, viz: bool) -> str:
         # convert surfaces
         ifc_envelopes = []
         surface_dicts = space_dict_val['surfaces']
-        create_ifc_surfaces(ifcmodel, surface_dicts, const_dicts, const_types, ifc_envelopes, body)
+        create_ifc_surfaces(ifcmodel, surface_dicts, const_dicts, const_types, ifc_envelopes, body, srf_styles=srf_styles, bulk=bulk)
         # convert subsurfaces
         sub_surface_dicts = space_dict_val['sub_surfaces']
-        create_ifc_sub_surfaces(ifcmodel, sub_surface_dicts, surface_dicts, const_dicts, const_types, ifc_envelopes, body)
+        create_ifc_sub_surfaces(ifcmodel, sub_surface_dicts, surface_dicts, const_dicts, const_types, ifc_envelopes, body, srf_styles=srf_styles, bulk=bulk,
+                                instances=instances)
 
         if len(ifc_envelopes) > 0:
-            ifcopenshell.api.run("spatial.assign_container", ifcmodel, relating_structure=ifc_bldg_story, products=ifc_envelopes)
+            if bulk is not None:
+                if ifc_bldg_story not in bulk['container_objs'].keys():
+                    bulk['container_objs'][ifc_bldg_story] = []
+                bulk['container_objs'][ifc_bldg_story].extend(ifc_envelopes)
+            else:
+                ifcopenshell.api.run("spatial.assign_container", ifcmodel, relating_structure=ifc_bldg_story, products=ifc_envelopes)
+
+    if bulk is not None:
+        write_bulk_rels(ifcmodel, bulk)
     # endregion: setting up ifczone and associating spaces to zones
     
     ifcmodel.write(ifc_path)
@@ -573,6 +918,48 @@ def osmod2ifcarch(osmod_path: str, ifc_path: str, viz: bool) -> str:
     #------------------------------------------------------------------------------------------------------
     # endregion: translate the osmodel data to ifc
     #------------------------------------------------------------------------------------------------------
+    return ifc_path
+
+def benchmark_writers(osmod_path: str, ifc_path: str, instance: bool = False) -> str:
+    '''
+    Convert the osmodel with the ifcopenshell.api writer and the fast writer, compare the elements of the two ifc and report the runtime of each writer.
+
+    Parameters
+    ----------
+    osmod_path : str
+        The file path of the osmodel.
+
+    ifc_path : str
+        The file path of the resultant IFC. The results are written next to it as <stem>_api.ifc and <stem>_fast.ifc.
+
+    instance : bool, optional
+        if True, both writers instance the windows and doors with IfcMappedItem.
+
+    Returns
+    -------
+    str
+        The file path of the json benchmark report.
+    '''
+    ifc_path_obj = Path(ifc_path)
+    bench_dict = {}
+    for writer in ['api', 'fast']:
+        res_path = str(ifc_path_obj.parent.joinpath(f"{ifc_path_obj.stem}_{writer}.ifc"))
+        start = time.perf_counter()
+        osmod2ifcarch(osmod_path, res_path, False, fast=writer == 'fast', instance=instance)
+        runtime = time.perf_counter() - start
+        nentities = len(list(ifcopenshell.open(res_path)))
+        bench_dict[writer] = {'ifc': res_path, 'runtime': runtime, 'entities': nentities, 'file_size': Path(res_path).stat().st_size}
+
+    bench_dict['speedup'] = bench_dict['api']['runtime']/bench_dict['fast']['runtime']
+    diffs = ifcbulk_utils.compare_ifc_elements(bench_dict['api']['ifc'], bench_dict['fast']['ifc'])
+    bench_dict['differences'] = diffs
+    for writer in ['api', 'fast']:
+        print(f"{writer}: {bench_dict[writer]['runtime']:.2f}s, {bench_dict[writer]['entities']} entities")
+    print(f"speedup {bench_dict['speedup']:.2f}, {len(diffs)} element differences")
+    report_path = str(ifc_path_obj.parent.joinpath(f"{ifc_path_obj.stem}_writer_benchmark.json"))
+    with open(report_path, 'w') as f:
+        f.write(json.dumps(bench_dict, indent=4))
+    return report_path
 
 def main():
     args = parse_args()
@@ -586,8 +973,12 @@ def main():
     osmod_path = str(Path(osmod_path).resolve())
     ifc_path = str(Path(args.ifc).resolve())
     
-    osmod2ifcarch(osmod_path, ifc_path, False)
-    print(ifc_path)
+    if args.benchmark:
+        report_path = benchmark_writers(osmod_path, ifc_path, instance=args.instance)
+        print(report_path)
+    else:
+        osmod2ifcarch(osmod_path, ifc_path, False, fast=args.fast, instance=args.instance)
+        print(ifc_path)
     sys.stdout.flush()
 #===================================================================================================
 # endregion: FUNCTIONS
@@ -0,0 +1,148 @@
+import os
+import sys
+import time
+import socket
+import argparse
+import threading
+import traceback
+from pathlib import Path
+
+from . import execute_osmod
+from .utils import spool_utils
+#===================================================================================================
+# region: FUNCTIONS
+#===================================================================================================
+def parse_args():
+    # create parser object
+    parser = argparse.ArgumentParser(description = "Claim and execute the OpenStudio Model jobs put into the spool directory by execute_osmod --enqueue")
+
+    parser.add_argument('-s', '--spool', type = str,
+                        metavar = 'DIR',
+                        help = 'The spool directory path, on a file system shared by all the hosts')
+
+    parser.add_argument('-hb', '--heartbeat', type = float, default=30,
+                        metavar = 'FLOAT',
+                        help = 'The number of seconds between the heartbeats of a running job')
+
+    parser.add_argument('-t', '--timeout', type = float, default=300,
+                        metavar = 'FLOAT',
+                        help = 'The number of seconds without a heartbeat after which a running job is put back into the queue')
+
+    parser.add_argument('-i', '--interval', type = float, default=10,
+                        metavar = 'FLOAT',
+                        help = 'The number of seconds to wait before checking an empty queue again')
+
+    parser.add_argument('-ma', '--max_attempts', type = int, default=3,
+                        metavar = 'INT',
+                        help = 'The number of times a job is claimed before it is considered failed')
+
+    parser.add_argument('-x', '--exit', action = 'store_true', default=False,
+                        help = 'turn it on to exit when the queue is empty instead of waiting for new jobs')
+
+    # parse the arguments from standard input
+    args = parser.parse_args()
+    return args
+
+def send_heartbeats(running_path: str, interval: float, stop_event: threading.Event):
+    '''
+    Send heartbeats for the running job until the stop event is set.
+
+    Parameters
+    ----------
+    running_path : str
+        The file path of the running job.
+
+    interval : float
+        The number of seconds between the heartbeats.
+
+    stop_event : threading.Event
+        set when the job is done.
+    '''
+    while not stop_event.wait(interval):
+        try:
+            spool_utils.heartbeat(running_path)
+        except FileNotFoundError:
+            # the job has been reclaimed by another worker
+            break
+
+def run_worker(spool_dir: str, heartbeat: float, timeout: float, interval: float, max_attempts: int, exit_when_empty: bool) -> int:
+    '''
+    Claim and execute jobs from the spool until the queue is empty and exit_when_empty is True, or forever.
+
+    Parameters
+    ----------
+    spool_dir : str
+        The spool directory path.
+
+    heartbeat : float
+        The number of seconds between the heartbeats of a running job.
+
+    timeout : float
+        The number of seconds without a heartbeat after which a running job is put back into the queue.
+
+    interval : float
+        The number of seconds to wait before checking an empty queue again.
+
+    max_attempts : int
+        The number of times a job is claimed before it is considered failed.
+
+    exit_when_empty : bool
+        True to exit when the queue is empty.
+
+    Returns
+    -------
+    int
+        The number of jobs executed by this worker.
+    '''
+    spool_utils.init_spool(spool_dir)
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    njobs = 0
+    while True:
+        reclaimed = spool_utils.reclaim_stale_jobs(spool_dir, timeout, max_attempts=max_attempts)
+        for job_id in reclaimed:
+            print(f"reclaimed job {job_id}")
+
+        running_path, job = spool_utils.claim_job(spool_dir, worker_id)
+        if running_path is None:
+            if exit_when_empty:
+                break
+            time.sleep(interval)
+            continue
+
+        print(f"{worker_id} executing job {job['job_id']} ...")
+        sys.stdout.flush()
+        stop_event = threading.Event()
+        hb_thread = threading.Thread(target=send_heartbeats, args=(running_path, heartbeat, stop_event), daemon=True)
+        hb_thread.start()
+        failed = False
+        try:
+            job['result'] = execute_osmod.execute_job(job)
+            if not Path(job['result']).exists():
+                raise RuntimeError(f"the job did not write its result {job['result']}")
+        except Exception:
+            job['error'] = traceback.format_exc()
+            failed = True
+        stop_event.set()
+        hb_thread.join()
+        job['runtime'] = time.time() - job['started']
+        finished_path = spool_utils.finish_job(spool_dir, running_path, job, failed=failed)
+        print(finished_path)
+        sys.stdout.flush()
+        njobs += 1
+    return njobs
+
+def main():
+    args = parse_args()
+    spool_dir = str(Path(args.spool).resolve())
+    run_worker(spool_dir, args.heartbeat, args.timeout, args.interval, args.max_attempts, args.exit)
+#===================================================================================================
+# endregion: FUNCTIONS
+#===================================================================================================
+#===================================================================================================
+# region: Main
+#===================================================================================================
+if __name__=='__main__':
+    main()
+#===================================================================================================
+# endregion: Main
+#===================================================================================================
@@ -4,7 +4,9 @@ import argparse
 from pathlib import Path
 
 import ifcopenshell
+import ifcopenshell.util.element
 import ifc_utils.ifcopenshell_utils as ifcopenshell_utils
+from .utils import ifcpset_utils
 #===================================================================================================
 # region: FUNCTIONS
 #===================================================================================================
@@ -59,7 +61,37 @@ def read_ifc_envlp_constr_info(ifc_path: str, pset_name: str, res_path: str, is_
     '''
     #------------------------------------------------------------------------------------------------------
     model = ifcopenshell.open(ifc_path)
-    mls_psets = ifcopenshell_utils.extract_mat_layer_sets_pset(model,pset_name)
+    return read_envlp_constr_info_frm_model(model, pset_name, res_path, is_csv)
+    #------------------------------------------------------------------------------------------------------
+
+def read_envlp_constr_info_frm_model(model: ifcopenshell.file, pset_name: str, res_path: str, is_csv: bool, pset_index: dict = None) -> str:
+    '''
+    Retrieve construction info of the envelope objects of an opened ifc model.
+
+    Parameters
+    ----------
+    model : ifcopenshell.file
+        The ifc model.
+
+    pset_name : str
+        The name of the pset.
+
+    res_path : str
+        The file path of the generated result.
+
+    is_csv : bool
+        True will generate csv file, false will generate json file.
+
+    pset_index: dict, optional
+        the index from utils.ifcpset_utils.get_pset_index(). Default None, the index of the materials is built.
+
+    Returns
+    -------
+    str
+        The file path of the resultant file.
+    '''
+    #------------------------------------------------------------------------------------------------------
+    mls_psets = ifcpset_utils.extract_mat_layer_sets_pset(model, pset_name, pset_index=pset_index)
     envlp_json, csv_str = ifcopenshell_utils.extract_envlp_mat_layer_pset(model, mls_psets)
 
     res_path_obj = Path(res_path)
@@ -74,6 +106,7 @@ def read_ifc_envlp_constr_info(ifc_path: str, pset_name: str, res_path: str, is_
         envlp_json_str = json.dumps(envlp_json, indent=4)
         with open(res_path, 'w') as f:
             f.write(envlp_json_str)
+    return res_path
     #------------------------------------------------------------------------------------------------------
 
 def main():
@@ -1,10 +1,13 @@
 import sys
 import json
+import time
 import argparse
 from pathlib import Path
 
 import ifcopenshell
+import ifcopenshell.util.element
 import ifc_utils.ifcopenshell_utils as ifcopenshell_utils
+from .utils import ifcpset_utils
 #===================================================================================================
 # region: FUNCTIONS
 #===================================================================================================
@@ -30,6 +33,9 @@ def parse_args():
     parser.add_argument('-p', '--process', action = 'store_true',
                         default=False, help = 'turn it on if piping in the ifc path')
     
+    parser.add_argument('-b', '--benchmark', action = 'store_true', default=False,
+                        help = 'time reading the pset of every material and material layer with ifcopenshell.util.element.get_psets and with the pset index and write it into <res stem>_benchmark.json')
+    
     # parse the arguments from standard input
     args = parser.parse_args()
     return args
@@ -59,14 +65,48 @@ def read_ifc_mat_pset(ifc_path: str, pset_name: str, res_path: str, is_csv: bool
     '''
     #------------------------------------------------------------------------------------------------------
     model = ifcopenshell.open(ifc_path)
+    return read_mat_pset_frm_model(model, pset_name, res_path, is_csv)
+    #------------------------------------------------------------------------------------------------------
+
+def read_mat_pset_frm_model(model: ifcopenshell.file, pset_name: str, res_path: str, is_csv: bool, pset_index: dict = None) -> str:
+    '''
+    Extract the pset of all the materials of an opened ifc model. The materials without the pset are skipped.
+
+    Parameters
+    ----------
+    model : ifcopenshell.file
+        The ifc model.
+
+    pset_name : str
+        The name of the pset.
+    
+    res_path: str
+        the path of the generated result.
+
+    is_csv: bool
+        True will generate csv.
+
+    pset_index: dict, optional
+        the index from utils.ifcpset_utils.get_pset_index(). Default None, the index of the materials is built.
+
+    Returns
+    -------
+    str
+        The file path of the resultant file
+    '''
+    #------------------------------------------------------------------------------------------------------
+    if pset_index is None:
+        pset_index = ifcpset_utils.get_pset_index(model, materials_only=True)
     mats = model.by_type('IfcMaterial')
     mat_json = {}
     csv_header_str = ''
     csv_content_str = ''
     for mat in mats:
         mat_name = mat.Name
-        psets = ifcopenshell.util.element.get_psets(mat, psets_only=True)
-        chosen_pset = psets[pset_name]
+        chosen_pset = ifcpset_utils.get_indexed_pset(pset_index, mat, pset_name)
+        if chosen_pset is None:
+            print(f"MATERIAL {mat_name} DOES NOT HAVE THE {pset_name} PSET")
+            continue
         if is_csv:
             chosen_pset['Name'] = mat_name
             chosen_pset = {'Name': chosen_pset.pop('Name'), **chosen_pset}
@@ -91,6 +131,51 @@ def read_ifc_mat_pset(ifc_path: str, pset_name: str, res_path: str, is_csv: bool
     return res_path
     #------------------------------------------------------------------------------------------------------
 
+def benchmark_mat_pset_reads(model: ifcopenshell.file, pset_name: str, res_path: str) -> str:
+    '''
+    Time reading the pset of every material and of the material of every material layer with ifcopenshell.util.element.get_psets and with the pset index,
+    and check that they read the same psets.
+
+    Parameters
+    ----------
+    model : ifcopenshell.file
+        The ifc model.
+
+    pset_name : str
+        The name of the pset.
+    
+    res_path: str
+        the path of the generated result, the report is written into <res stem>_benchmark.json next to it.
+
+    Returns
+    -------
+    str
+        The file path of the report.
+    '''
+    mats = model.by_type('IfcMaterial')
+    layer_mats = [mat_layer.Material for mat_layer in model.by_type('IfcMaterialLayer')]
+    report = {'materials': len(mats), 'material_layers': len(layer_mats)}
+    for read_name, read_mats in [('material', mats), ('layer', layer_mats)]:
+        start = time.perf_counter()
+        get_psets_reads = [ifcopenshell.util.element.get_psets(mat, psets_only=True).get(pset_name) for mat in read_mats]
+        get_psets_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pset_index = ifcpset_utils.get_pset_index(model, materials_only=True)
+        index_time = time.perf_counter() - start
+        start = time.perf_counter()
+        index_reads = [ifcpset_utils.get_indexed_pset(pset_index, mat, pset_name) for mat in read_mats]
+        indexed_time = time.perf_counter() - start
+
+        ndiffs = sum([get_psets_read != index_read for get_psets_read, index_read in zip(get_psets_reads, index_reads)])
+        report[read_name] = {'without_pset': get_psets_reads.count(None), 'differences': ndiffs, 'get_psets_time': get_psets_time,
+                             'index_build_time': index_time, 'indexed_read_time': indexed_time, 'index_time': index_time + indexed_time}
+    res_path_obj = Path(res_path)
+    report_path = str(res_path_obj.parent.joinpath(f"{res_path_obj.stem}_benchmark.json"))
+    with open(report_path, 'w') as f:
+        f.write(json.dumps(report, indent=4))
+    return report_path
+
 def main():
     args = parse_args()
     pipe_input = args.process
@@ -102,8 +187,15 @@ def main():
     res_path = args.res
     pset_name = args.pset
     is_csv = args.csv
-    read_ifc_mat_pset(ifc_path, pset_name, res_path, is_csv)
+    if args.benchmark:
+        model = ifcopenshell.open(ifc_path)
+        read_mat_pset_frm_model(model, pset_name, res_path, is_csv)
+        report_path = benchmark_mat_pset_reads(model, pset_name, res_path)
+    else:
+        read_ifc_mat_pset(ifc_path, pset_name, res_path, is_csv)
     print(Path(res_path).resolve())
+    if args.benchmark:
+        print(Path(report_path).resolve())
     # make sure this output can be piped into another command on the cmd
     sys.stdout.flush()
 #===================================================================================================
@@ -0,0 +1,119 @@
+import sys
+import argparse
+from pathlib import Path
+
+import ifcopenshell
+import ifcopenshell.util.element
+
+from .read_ifc_mat_pset import read_mat_pset_frm_model
+from .read_ifc_envlp_mat_pset import read_envlp_constr_info_frm_model
+from .calc_massless_mat import calc_massless_frm_model
+from .utils import ifcpset_utils
+#===================================================================================================
+# region: FUNCTIONS
+#===================================================================================================
+def parse_args():
+    # create parser object
+    parser = argparse.ArgumentParser(description = "Open the IFC file once and generate any of the material pset, envelope construction and massless material reports")
+
+    parser.add_argument('-i', '--ifc', type = str,
+                        metavar = 'FILE',
+                        help = 'The ifc path')
+
+    parser.add_argument('-m', '--mat', type = str, default = None,
+                        metavar = 'FILE',
+                        help = 'The path of the material pset report of read_ifc_mat_pset, either JSON or csv')
+
+    parser.add_argument('-e', '--envlp', type = str, default = None,
+                        metavar = 'FILE',
+                        help = 'The path of the envelope construction report of read_ifc_envlp_mat_pset, either JSON or csv')
+
+    parser.add_argument('-ml', '--massless', type = str, default = None,
+                        metavar = 'FILE',
+                        help = 'The path of the massless material JSON of calc_massless_mat')
+
+    parser.add_argument('-ps', '--pset', type = str, default='osmod_material',
+                        metavar = 'NAME',
+                        help = 'The name of the pset to retrieve')
+
+    parser.add_argument('-c', '--csv', action = 'store_true', default=False,
+                        help = 'if turned on generate csv for the material pset and envelope construction reports')
+
+    parser.add_argument('-p', '--process', action = 'store_true',
+                        default=False, help = 'turn it on if piping in the ifc path')
+
+    # parse the arguments from standard input
+    args = parser.parse_args()
+    return args
+
+def read_ifc_psets(ifc_path: str, pset_name: str = 'osmod_material', mat_path: str = None, envlp_path: str = None, massless_path: str = None,
+                   is_csv: bool = False) -> list[str]:
+    '''
+    Open the ifc once and generate the reports of read_ifc_mat_pset, read_ifc_envlp_mat_pset and calc_massless_mat that are given a path.
+    The psets of the materials are indexed once with utils.ifcpset_utils.get_pset_index() and the index is shared by the reports.
+
+    Parameters
+    ----------
+    ifc_path : str
+        The file path of the ifc.
+
+    pset_name : str, optional
+        The name of the pset. Default osmod_material.
+
+    mat_path : str, optional
+        The file path of the material pset report. Default None, the report is not generated.
+
+    envlp_path : str, optional
+        The file path of the envelope construction report. Default None, the report is not generated.
+
+    massless_path : str, optional
+        The file path of the massless material report, it is always JSON. Default None, the report is not generated.
+
+    is_csv : bool, optional
+        True will generate csv files for the material pset and envelope construction reports, false will generate json files. Default False.
+
+    Returns
+    -------
+    list[str]
+        The file paths of the generated reports in the order material pset, envelope construction, massless material.
+    '''
+    #------------------------------------------------------------------------------------------------------
+    model = ifcopenshell.open(ifc_path)
+    pset_index = ifcpset_utils.get_pset_index(model, materials_only=True)
+    res_paths = []
+    if mat_path is not None:
+        res_paths.append(read_mat_pset_frm_model(model, pset_name, mat_path, is_csv, pset_index=pset_index))
+    if envlp_path is not None:
+        res_paths.append(read_envlp_constr_info_frm_model(model, pset_name, envlp_path, is_csv, pset_index=pset_index))
+    if massless_path is not None:
+        res_paths.append(calc_massless_frm_model(model, pset_name, massless_path, pset_index=pset_index))
+    return res_paths
+    #------------------------------------------------------------------------------------------------------
+
+def main():
+    args = parse_args()
+    pipe_input = args.process
+    if pipe_input == False:
+        ifc_path = args.ifc
+    else:
+        lines = list(sys.stdin)
+        ifc_path = lines[0].strip()
+    if args.mat is None and args.envlp is None and args.massless is None:
+        print('GIVE AT LEAST ONE OF -m, -e OR -ml')
+        return
+    res_paths = read_ifc_psets(ifc_path, pset_name=args.pset, mat_path=args.mat, envlp_path=args.envlp, massless_path=args.massless, is_csv=args.csv)
+    # make sure this output can be piped into another command on the cmd
+    for res_path in res_paths:
+        print(Path(res_path).resolve())
+    sys.stdout.flush()
+#===================================================================================================
+# endregion: FUNCTIONS
+#===================================================================================================
+#===================================================================================================
+# region: Main
+#===================================================================================================
+if __name__=='__main__':
+    main()
+#===================================================================================================
+# endregion: Main
+#===================================================================================================
@@ -0,0 +1,84 @@
+import sys
+import csv
+import argparse
+from pathlib import Path
+
+from .utils import eplog_utils
+#===================================================================================================
+# region: FUNCTIONS
+#===================================================================================================
+def parse_args():
+    # create parser object
+    parser = argparse.ArgumentParser(description = "Collect the run_metrics.json of the simulation runs in a directory into a csv file, slowest run first")
+
+    parser.add_argument('-d', '--dir', type = str,
+                        metavar = 'DIR',
+                        help = 'The directory with the simulation runs, searched recursively for run_metrics.json')
+
+    parser.add_argument('-r', '--res', type = str,
+                        metavar = 'FILE',
+                        help = 'The path of the resultant csv file')
+
+    parser.add_argument('-p', '--process', action = 'store_true',
+                        default=False, help = 'turn it on if piping in the directory path')
+
+    # parse the arguments from standard input
+    args = parser.parse_args()
+    return args
+
+def metrics2rows(metrics_ls: list[dict]) -> list[list]:
+    '''
+    Flatten the run metrics into csv rows with a header row.
+
+    Parameters
+    ----------
+    metrics_ls : list[dict]
+        the metrics of each run from eplog_utils.aggregate_run_metrics().
+
+    Returns
+    -------
+    list[list]
+        the header row followed by a row for each run.
+    '''
+    count_keys = ['warmup_days', 'completed_successfully', 'energyplus_run_time', 'warnings', 'severe_errors', 'fatal_errors', 'zones',
+                  'surfaces', 'sub_surfaces', 'shading_surfaces']
+    header = ['run_dir', 'wall_time']
+    header.extend([f"{phase}_time" for phase in eplog_utils.PHASES])
+    header.extend(count_keys)
+    rows2d = [header]
+    for metrics in metrics_ls:
+        row = [metrics['run_dir'], metrics['wall_time']]
+        row.extend([metrics['phases'].get(phase) for phase in eplog_utils.PHASES])
+        row.extend([metrics.get(key) for key in count_keys])
+        rows2d.append(row)
+    return rows2d
+
+def main():
+    args = parse_args()
+    pipe_input = args.process
+    if pipe_input == False:
+        run_dir = args.dir
+    else:
+        lines = list(sys.stdin)
+        run_dir = lines[0].strip()
+
+    res_path = str(Path(args.res).resolve())
+    metrics_ls = eplog_utils.aggregate_run_metrics(run_dir)
+    rows2d = metrics2rows(metrics_ls)
+    with open(res_path, 'w', newline='') as csvfile:
+        csvwriter = csv.writer(csvfile)
+        csvwriter.writerows(rows2d)
+
+    print(res_path)
+    sys.stdout.flush()
+#===================================================================================================
+# endregion: FUNCTIONS
+#===================================================================================================
+#===================================================================================================
+# region: Main
+#===================================================================================================
+if __name__=='__main__':
+    main()
+#===================================================================================================
+# endregion: Main
+#===================================================================================================
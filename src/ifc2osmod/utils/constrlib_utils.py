@@ -0,0 +1,242 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+# the properties of each construction in the compiled library, the columns of props
+CONSTR_PROPS = ['rvalue', 'uvalue', 'thickness', 'heat_capacity', 'shgc', 'vt']
+# the float properties of each material in the compiled library, the columns of mat_props
+MAT_PROPS = ['thickness', 'conductivity', 'density', 'specificheat', 'thermalabsorptance', 'solarabsorptance', 'visibleabsorptance',
+             'thermalresistance', 'ufactor', 'solarheatgaincoefficient', 'visibletransmittance']
+# the ifc pset properties that can be matched and the construction property they are matched to
+PSET_CONSTR_PROPS = {'ThermalResistance': 'rvalue', 'UFactor': 'uvalue', 'Thickness': 'thickness', 'ArealHeatCapacity': 'heat_capacity',
+                     'SolarHeatGainCoefficient': 'shgc', 'VisibleTransmittance': 'vt'}
+# the properties rounded to the decimals of the keys of the json libraries before they are compared, so the constructions of a key are at the same distance
+PROP_DECIMALS = {'rvalue': 2, 'uvalue': 2}
+# the compiled libraries loaded so far
+CONSTR_LIBS = {}
+
+def compile_constr_lib(lib_path: str) -> dict:
+    '''
+    Compile the json construction library into fixed-width arrays.
+
+    Parameters
+    ----------
+    lib_path: str
+        the path of the construction library json from extract_osmod_opq_constr or extract_osmod_smpl_glz_constr.
+
+    Returns
+    -------
+    dict
+        - props: np.ndarray[shape(number of constructions, 6)] the properties of CONSTR_PROPS of each construction, nan if it does not apply, e.g. the shgc of an opaque construction.
+          rvalue and uvalue are of the layers without the air films, heat_capacity is the areal heat capacity in J/m2-K.
+        - names: np.ndarray[shape(number of constructions)] the name of each construction.
+        - layer_offsets: np.ndarray[shape(number of constructions + 1)] the layers of construction i are layer_materials[layer_offsets[i]:layer_offsets[i+1]].
+        - layer_materials: np.ndarray[shape(number of layers)] the material index of each layer.
+        - mat_names: np.ndarray[shape(number of materials)] the name of each material.
+        - mat_roughness: np.ndarray[shape(number of materials)] the roughness of each material, empty string if None.
+        - mat_props: np.ndarray[shape(number of materials, 11)] the properties of MAT_PROPS of each material, nan if None.
+        - scale: np.ndarray[shape(6)] the range of each property in the library, the properties are divided by it in query_constr_lib().
+    '''
+    with open(lib_path) as f:
+        data = json.load(f)
+    mat_lib = data['material_library']
+    constr_lib = data['construction_library']
+    mat_keys = list(mat_lib.keys())
+    mat_rows = {mat_key: cnt for cnt, mat_key in enumerate(mat_keys)}
+    mat_props = np.array([[np.nan if mat_lib[mat_key][prop] is None else mat_lib[mat_key][prop] for prop in MAT_PROPS] for mat_key in mat_keys],
+                         dtype=float).reshape(-1, len(MAT_PROPS))
+    mat_names = np.array([mat_lib[mat_key]['name'] for mat_key in mat_keys], dtype=str)
+    mat_roughness = np.array([mat_lib[mat_key]['roughness'] or '' for mat_key in mat_keys], dtype=str)
+
+    names = []
+    layer_offsets = [0]
+    layer_materials = []
+    for constr in constr_lib.values():
+        for name, mat_layers in zip(constr['name'], constr['material_layers']):
+            names.append(name)
+            layer_materials.extend([mat_rows[str(mat_layer)] for mat_layer in mat_layers])
+            layer_offsets.append(len(layer_materials))
+    layer_offsets = np.array(layer_offsets, dtype=int)
+    layer_materials = np.array(layer_materials, dtype=int)
+
+    # the properties of each layer, summed over the layers of each construction with np.bincount
+    nconstrs = len(names)
+    nlayers = np.diff(layer_offsets)
+    layer_constrs = np.repeat(np.arange(nconstrs), nlayers)
+    thk, cond, dens, sheat = [mat_props[layer_materials, MAT_PROPS.index(prop)] for prop in ['thickness', 'conductivity', 'density', 'specificheat']]
+    layer_r = np.where(np.isnan(cond), mat_props[layer_materials, MAT_PROPS.index('thermalresistance')], thk/np.where(np.isnan(cond), 1, cond))
+    glz_u = mat_props[layer_materials, MAT_PROPS.index('ufactor')]
+    is_glz = ~np.isnan(glz_u)
+    layer_r[is_glz] = 1/glz_u[is_glz]
+    props = np.full((nconstrs, len(CONSTR_PROPS)), np.nan)
+    props[:, CONSTR_PROPS.index('rvalue')] = np.bincount(layer_constrs, weights=layer_r, minlength=nconstrs)
+    props[:, CONSTR_PROPS.index('thickness')] = np.bincount(layer_constrs, weights=np.nan_to_num(thk), minlength=nconstrs)
+    props[:, CONSTR_PROPS.index('heat_capacity')] = np.bincount(layer_constrs, weights=np.nan_to_num(thk*dens*sheat), minlength=nconstrs)
+    # for simple glazing there are only one layer
+    has_layers = nlayers > 0
+    first_mats = layer_materials[layer_offsets[:-1][has_layers]]
+    props[has_layers, CONSTR_PROPS.index('shgc')] = mat_props[first_mats, MAT_PROPS.index('solarheatgaincoefficient')]
+    props[has_layers, CONSTR_PROPS.index('vt')] = mat_props[first_mats, MAT_PROPS.index('visibletransmittance')]
+    with np.errstate(divide='ignore'):
+        props[:, CONSTR_PROPS.index('uvalue')] = 1/props[:, CONSTR_PROPS.index('rvalue')]
+
+    scale = np.ones(len(CONSTR_PROPS))
+    for cnt in range(len(CONSTR_PROPS)):
+        prop_vals = props[:, cnt][np.isfinite(props[:, cnt])]
+        if len(prop_vals) != 0 and prop_vals.max() > prop_vals.min():
+            scale[cnt] = prop_vals.max() - prop_vals.min()
+    return {'props': props, 'names': np.array(names, dtype=str), 'layer_offsets': layer_offsets, 'layer_materials': layer_materials,
+            'mat_names': mat_names, 'mat_roughness': mat_roughness, 'mat_props': mat_props, 'scale': scale}
+
+def write_constr_lib(clib: dict, res_path: str) -> str:
+    '''
+    Write the compiled construction library into a npz file.
+
+    Parameters
+    ----------
+    clib: dict
+        the compiled library from compile_constr_lib().
+
+    res_path: str
+        the path of the npz file.
+
+    Returns
+    -------
+    str
+        the path of the npz file.
+    '''
+    res_dir_obj = Path(res_path).parent
+    if not res_dir_obj.exists():
+        res_dir_obj.mkdir(parents=True)
+    with open(res_path, 'wb') as f:
+        np.savez_compressed(f, **clib)
+    return res_path
+
+def load_constr_lib(lib_path: str) -> dict:
+    '''
+    Load the compiled construction library. The libraries are loaded once and kept in CONSTR_LIBS.
+
+    Parameters
+    ----------
+    lib_path: str
+        the path of the compiled npz library or of the json library. For a json library, <lib stem>.npz next to it is loaded if it is newer than the json,
+        else the json is compiled with compile_constr_lib().
+
+    Returns
+    -------
+    dict
+        the compiled library, refer to compile_constr_lib().
+    '''
+    lib_path = str(lib_path)
+    if lib_path in CONSTR_LIBS.keys():
+        return CONSTR_LIBS[lib_path]
+    lib_path_obj = Path(lib_path)
+    npz_path_obj = lib_path_obj
+    if lib_path_obj.suffix == '.json':
+        npz_path_obj = lib_path_obj.with_suffix('.npz')
+        if not npz_path_obj.exists() or npz_path_obj.stat().st_mtime < lib_path_obj.stat().st_mtime:
+            npz_path_obj = None
+
+    if npz_path_obj is None:
+        clib = compile_constr_lib(lib_path)
+    else:
+        with np.load(npz_path_obj) as npz:
+            clib = {key: npz[key] for key in npz.files}
+    CONSTR_LIBS[lib_path] = clib
+    return clib
+
+def query_constr_lib(clib: dict, targets: dict, weights: dict = None, prefer: tuple[str, str] = None) -> int:
+    '''
+    Find the construction nearest to the target properties. The properties are divided by their range in the library so they are comparable.
+    The properties in PROP_DECIMALS are rounded like the keys of the json library, so the constructions of the same R-value or U-value key are chosen between by prefer.
+
+    Parameters
+    ----------
+    clib: dict
+        the compiled library from load_constr_lib().
+
+    targets: dict
+        dictionary of the property in CONSTR_PROPS to its target value. Constructions without one of the properties are not considered.
+
+    weights: dict, optional
+        dictionary of the property to its weight in the distance. Default 1 for all the properties.
+
+    prefer: tuple[str, str], optional
+        (property, min or max), the constructions at the same distance are chosen by this property, e.g. ('thickness', 'min') chooses the thinnest.
+        Default the first construction.
+
+    Returns
+    -------
+    int
+        the index of the chosen construction, -1 if no construction has the properties.
+    '''
+    prop_idxs = [CONSTR_PROPS.index(prop) for prop in targets.keys()]
+    target_vals = np.array(list(targets.values()), dtype=float)
+    wgts = np.ones(len(prop_idxs))
+    if weights is not None:
+        wgts = np.array([weights.get(prop, 1.0) for prop in targets.keys()], dtype=float)
+    props = clib['props'][:, prop_idxs]
+    for cnt, prop in enumerate(targets.keys()):
+        if prop in PROP_DECIMALS.keys():
+            props[:, cnt] = np.round(props[:, cnt], PROP_DECIMALS[prop])
+    diffs = (props - target_vals)/clib['scale'][prop_idxs]
+    dists = np.sqrt((diffs*diffs*wgts).sum(axis=1))
+    dists[np.isnan(dists)] = np.inf
+    if len(dists) == 0 or np.isinf(dists.min()):
+        return -1
+    min_idxs = np.flatnonzero(dists == dists.min())
+    if prefer is None or len(min_idxs) == 1:
+        return int(min_idxs[0])
+    prefer_vals = clib['props'][min_idxs, CONSTR_PROPS.index(prefer[0])]
+    if prefer[1] == 'max':
+        return int(min_idxs[np.argmax(prefer_vals)])
+    return int(min_idxs[np.argmin(prefer_vals)])
+
+def get_pset_targets(pset: dict) -> dict:
+    '''
+    Get the target properties for query_constr_lib() from the ifc pset of an envelope or window.
+
+    Parameters
+    ----------
+    pset: dict
+        the pset, the properties in PSET_CONSTR_PROPS with a value are used.
+
+    Returns
+    -------
+    dict
+        dictionary of the property in CONSTR_PROPS to its target value.
+    '''
+    targets = {}
+    for pset_prop, constr_prop in PSET_CONSTR_PROPS.items():
+        if pset.get(pset_prop) is not None:
+            targets[constr_prop] = pset[pset_prop]
+    return targets
+
+def get_constr_mats(clib: dict, constr_idx: int) -> tuple[str, list[dict]]:
+    '''
+    Get the name and the materials of the construction in the format of the json material library.
+
+    Parameters
+    ----------
+    clib: dict
+        the compiled library from load_constr_lib().
+
+    constr_idx: int
+        the index of the construction.
+
+    Returns
+    -------
+    tuple[str, list[dict]]
+        - the name of the construction.
+        - the material of each layer, dictionary with the name, roughness and the MAT_PROPS as keys, None if it does not apply.
+    '''
+    layer_mats = clib['layer_materials'][clib['layer_offsets'][constr_idx]:clib['layer_offsets'][constr_idx+1]]
+    mat_dicts = []
+    for mat_idx in layer_mats:
+        roughness = str(clib['mat_roughness'][mat_idx])
+        mat_dict = {'name': str(clib['mat_names'][mat_idx]), 'roughness': roughness if roughness != '' else None}
+        for prop, val in zip(MAT_PROPS, clib['mat_props'][mat_idx]):
+            mat_dict[prop] = None if np.isnan(val) else float(val)
+        mat_dicts.append(mat_dict)
+    return str(clib['names'][constr_idx]), mat_dicts
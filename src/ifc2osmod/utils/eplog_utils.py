@@ -0,0 +1,295 @@
+import re
+import json
+import time
+import subprocess
+from pathlib import Path
+
+PHASES = ['measures', 'translation', 'initialization', 'sizing', 'warmup', 'run_period', 'reporting']
+# EnergyPlus stdout lines that mark the start of a simulation phase
+EP_PHASE_MARKERS = [('Performing Zone Sizing Simulation', 'sizing'), ('Calculating System sizing', 'sizing'),
+                    ('Performing HVAC Sizing Simulation', 'sizing'), ('Beginning Primary Simulation', 'warmup'),
+                    ('Initializing New Environment Parameters', 'warmup'), ('Warming up', 'warmup'),
+                    ('Starting Simulation at', 'run_period'), ('Continuing Simulation at', 'run_period'),
+                    ('Writing tabular output', 'reporting'), ('Writing final SQL', 'reporting')]
+# the openstudio workflow states logged in run.log and the phase they belong to
+OSW_STATE_PHASES = {'os_measures': 'measures', 'ep_measures': 'measures', 'reporting_measures': 'measures', 'translator': 'translation'}
+
+def run_timed(cmd: list[str], cwd: str = None) -> tuple[list[tuple[float, str]], float, int]:
+    '''
+    Run the command and record the time each line of its stdout is printed.
+
+    Parameters
+    ----------
+    cmd : list[str]
+        the command to run.
+
+    cwd : str, optional
+        the working directory of the command.
+
+    Returns
+    -------
+    tuple[list[tuple[float, str]], float, int]
+        - list of (seconds since the start of the command, line) of the stdout and stderr.
+        - the wall time of the command in seconds.
+        - the return code of the command.
+    '''
+    start = time.perf_counter()
+    timed_lines = []
+    with subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True) as proc:
+        for line in proc.stdout:
+            timed_lines.append((time.perf_counter() - start, line.rstrip('\n')))
+    wall_time = time.perf_counter() - start
+    return timed_lines, wall_time, proc.returncode
+
+def parse_ep_stdout_phases(timed_lines: list[tuple[float, str]], wall_time: float) -> tuple[dict, int]:
+    '''
+    Work out the wall time of each EnergyPlus phase from the timed stdout.
+
+    Parameters
+    ----------
+    timed_lines : list[tuple[float, str]]
+        the timed stdout from run_timed().
+
+    wall_time : float
+        the wall time of the command in seconds.
+
+    Returns
+    -------
+    tuple[dict, int]
+        - dictionary with the phase as key and its wall time in seconds as value. Phases that were not found are None.
+        - the number of warmup days of the run periods.
+    '''
+    phase_times = {}
+    curr_phase = 'initialization'
+    phase_start = 0.0
+    nwarmup = 0
+    for elapsed, line in timed_lines:
+        line = line.strip()
+        new_phase = None
+        for marker, phase in EP_PHASE_MARKERS:
+            if line.startswith(marker):
+                new_phase = phase
+                break
+        if new_phase is None:
+            continue
+        # the design days of the sizing and the hvac initialization also warm up
+        if new_phase == 'warmup' and curr_phase in ['initialization', 'sizing'] and line.startswith('Warming up'):
+            continue
+        if new_phase == 'warmup' and line.startswith('Warming up'):
+            nwarmup += 1
+        if new_phase != curr_phase:
+            phase_times[curr_phase] = phase_times.get(curr_phase, 0.0) + elapsed - phase_start
+            curr_phase = new_phase
+            phase_start = elapsed
+
+    phase_times[curr_phase] = phase_times.get(curr_phase, 0.0) + wall_time - phase_start
+    if 'sizing' not in phase_times.keys() and 'warmup' not in phase_times.keys() and 'run_period' not in phase_times.keys():
+        # not energyplus output
+        return {}, None
+    return phase_times, nwarmup
+
+def parse_osw_run_log(run_log_path: str) -> dict:
+    '''
+    Work out the wall time of the measure application and translation from the run.log of the openstudio workflow.
+
+    Parameters
+    ----------
+    run_log_path : str
+        the path of the run.log.
+
+    Returns
+    -------
+    dict
+        dictionary with the phase as key and its wall time in seconds as value.
+    '''
+    # e.g. [12:07:31.361585 INFO] Starting state os_measures
+    line_re = re.compile(r'^\[(\d{2}):(\d{2}):(\d{2}(?:\.\d+)?)\s+\w+\]\s*(.*)$')
+    state_re = re.compile(r'Starting state (\w+)')
+    states = []
+    last_secs = None
+    day_offset = 0
+    with open(run_log_path) as f:
+        for line in f:
+            match = line_re.match(line)
+            if match is None:
+                continue
+            secs = int(match.group(1))*3600 + int(match.group(2))*60 + float(match.group(3)) + day_offset
+            if last_secs is not None and secs < last_secs:
+                # the run went past midnight
+                day_offset += 86400
+                secs += 86400
+            last_secs = secs
+            state_match = state_re.search(match.group(4))
+            if state_match is not None:
+                states.append((state_match.group(1), secs))
+
+    phase_times = {}
+    for cnt, state in enumerate(states):
+        phase = OSW_STATE_PHASES.get(state[0])
+        if phase is None:
+            continue
+        if cnt + 1 < len(states):
+            end_secs = states[cnt+1][1]
+        else:
+            end_secs = last_secs
+        phase_times[phase] = phase_times.get(phase, 0.0) + end_secs - state[1]
+    return phase_times
+
+def parse_ep_err(err_path: str) -> dict:
+    '''
+    Count the warnings, severe and fatal errors in the eplusout.err.
+
+    Parameters
+    ----------
+    err_path : str
+        the path of the eplusout.err.
+
+    Returns
+    -------
+    dict
+        dictionary with the keys warnings, severe_errors and fatal_errors.
+    '''
+    counts = {'warnings': 0, 'severe_errors': 0, 'fatal_errors': 0}
+    with open(err_path, errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('** Warning **'):
+                counts['warnings'] += 1
+            elif line.startswith('** Severe  **'):
+                counts['severe_errors'] += 1
+            elif line.startswith('**  Fatal  **'):
+                counts['fatal_errors'] += 1
+    return counts
+
+def parse_ep_end(end_path: str) -> dict:
+    '''
+    Read the completion status, error counts and run time from the eplusout.end.
+
+    Parameters
+    ----------
+    end_path : str
+        the path of the eplusout.end.
+
+    Returns
+    -------
+    dict
+        dictionary with the keys completed_successfully, warnings, severe_errors and energyplus_run_time (seconds). Values not found are None.
+    '''
+    # e.g. EnergyPlus Completed Successfully-- 3 Warning; 0 Severe Errors; Elapsed Time=00hr 00min  5.23sec
+    with open(end_path, errors='replace') as f:
+        content = f.read()
+    end_dict = {'completed_successfully': 'Completed Successfully' in content, 'warnings': None, 'severe_errors': None,
+                'energyplus_run_time': None}
+    warn_match = re.search(r'(\d+)\s+Warning', content)
+    if warn_match is not None:
+        end_dict['warnings'] = int(warn_match.group(1))
+    severe_match = re.search(r'(\d+)\s+Severe Errors', content)
+    if severe_match is not None:
+        end_dict['severe_errors'] = int(severe_match.group(1))
+    time_match = re.search(r'Elapsed Time=(\d+)hr\s+(\d+)min\s+([\d.]+)sec', content)
+    if time_match is not None:
+        end_dict['energyplus_run_time'] = int(time_match.group(1))*3600 + int(time_match.group(2))*60 + float(time_match.group(3))
+    return end_dict
+
+def parse_ep_eio(eio_path: str) -> dict:
+    '''
+    Read the number of zones, surfaces, sub surfaces and shading surfaces simulated from the eplusout.eio.
+
+    Parameters
+    ----------
+    eio_path : str
+        the path of the eplusout.eio.
+
+    Returns
+    -------
+    dict
+        dictionary with the keys zones, surfaces, sub_surfaces and shading_surfaces. Values not found are None.
+    '''
+    # e.g. Zone Summary,5,40,8 and Shading Summary,0,0,4
+    eio_dict = {'zones': None, 'surfaces': None, 'sub_surfaces': None, 'shading_surfaces': None}
+    with open(eio_path, errors='replace') as f:
+        for line in f:
+            if line.startswith('Zone Summary,'):
+                vals = line.strip().split(',')[1:]
+                eio_dict['zones'] = int(vals[0])
+                eio_dict['surfaces'] = int(vals[1])
+                eio_dict['sub_surfaces'] = int(vals[2])
+            elif line.startswith('Shading Summary,'):
+                vals = line.strip().split(',')[1:]
+                eio_dict['shading_surfaces'] = sum([int(val) for val in vals])
+    return eio_dict
+
+def write_run_metrics(run_dir: str, timed_lines: list[tuple[float, str]], wall_time: float, phase_times: dict = None) -> str:
+    '''
+    Parse the logs of the run and write the metrics into run_metrics.json in the run directory.
+
+    Parameters
+    ----------
+    run_dir : str
+        the run directory with the run.log, eplusout.err, eplusout.end and eplusout.eio.
+
+    timed_lines : list[tuple[float, str]]
+        the timed stdout of the run from run_timed().
+
+    wall_time : float
+        the wall time of the run in seconds.
+
+    phase_times : dict, optional
+        dictionary of the wall time in seconds of the phases that happened outside of the run, e.g. the translation of the model.
+
+    Returns
+    -------
+    str
+        the path of the run_metrics.json.
+    '''
+    run_dir_path = Path(run_dir)
+    metrics = {'run_dir': str(run_dir_path.resolve()), 'wall_time': wall_time}
+    phases = dict.fromkeys(PHASES)
+    ep_phases, nwarmup = parse_ep_stdout_phases(timed_lines, wall_time)
+    phases.update(ep_phases)
+    run_log_path = run_dir_path.joinpath('run.log')
+    if run_log_path.exists():
+        phases.update(parse_osw_run_log(str(run_log_path)))
+    if phase_times is not None:
+        phases.update(phase_times)
+        metrics['wall_time'] += sum(phase_times.values())
+    metrics['phases'] = phases
+    metrics['warmup_days'] = nwarmup
+
+    end_path = run_dir_path.joinpath('eplusout.end')
+    if end_path.exists():
+        metrics.update(parse_ep_end(str(end_path)))
+    err_path = run_dir_path.joinpath('eplusout.err')
+    if err_path.exists():
+        metrics.update(parse_ep_err(str(err_path)))
+    eio_path = run_dir_path.joinpath('eplusout.eio')
+    if eio_path.exists():
+        metrics.update(parse_ep_eio(str(eio_path)))
+
+    metrics_path = str(run_dir_path.joinpath('run_metrics.json'))
+    # the run directory is missing if the run failed before it started
+    run_dir_path.mkdir(parents=True, exist_ok=True)
+    with open(metrics_path, 'w') as f:
+        f.write(json.dumps(metrics, indent=4))
+    return metrics_path
+
+def aggregate_run_metrics(root_dir: str) -> list[dict]:
+    '''
+    Collect the run_metrics.json of all the runs in the directory, slowest first.
+
+    Parameters
+    ----------
+    root_dir : str
+        the directory to search for run_metrics.json.
+
+    Returns
+    -------
+    list[dict]
+        the metrics of each run sorted by wall time, slowest first.
+    '''
+    metrics_ls = []
+    for metrics_path in Path(root_dir).rglob('run_metrics.json'):
+        with open(metrics_path) as f:
+            metrics_ls.append(json.load(f))
+    metrics_ls = sorted(metrics_ls, key=lambda metrics: metrics['wall_time'], reverse=True)
+    return metrics_ls
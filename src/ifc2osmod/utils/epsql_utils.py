@@ -0,0 +1,926 @@
+import json
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+
+# EnergyPlus fuel meters and the column name used for the fuel in the End Uses table of the AnnualBuildingUtilityPerformanceSummary report
+FACILITY_METERS = {'Electricity:Facility': 'Electricity',
+                   'NaturalGas:Facility': 'Natural Gas',
+                   'DistrictCooling:Facility': 'District Cooling',
+                   'DistrictHeatingWater:Facility': 'District Heating Water'}
+# the IntervalType of the Time table and the ReportingFrequency it is written as in the ReportDataDictionary
+INTERVAL_FREQS = {-1: 'HVAC System Timestep', 0: 'Zone Timestep', 1: 'Hourly', 2: 'Daily', 3: 'Monthly', 4: 'Run Period', 5: 'Annual'}
+
+def get_meter_totals(sql_path: str, reporting_frequency: str = 'Run Period') -> dict:
+    '''
+    Get the meter values of each weather file run period in the EP+ sql file.
+
+    Parameters
+    ----------
+    sql_path : str
+        The sql file path.
+
+    reporting_frequency : str, optional
+        The reporting frequency of the meters to retrieve as written in the ReportDataDictionary. Default 'Run Period'.
+
+    Returns
+    -------
+    dict
+        - nested dictionaries, the uppercase name of the run period is used as the key on the top level
+        - each dictionary uses the meter name as key and the summed value (J) of the meter as value
+    '''
+    query = '''SELECT UPPER(ep.EnvironmentName), rdd.Name, SUM(rd.Value)
+               FROM ReportData rd
+               JOIN ReportDataDictionary rdd ON rd.ReportDataDictionaryIndex = rdd.ReportDataDictionaryIndex
+               JOIN Time t ON rd.TimeIndex = t.TimeIndex
+               JOIN EnvironmentPeriods ep ON t.EnvironmentPeriodIndex = ep.EnvironmentPeriodIndex
+               WHERE rdd.IsMeter = 1 AND rdd.ReportingFrequency = ? AND ep.EnvironmentType = 3
+               GROUP BY ep.EnvironmentName, rdd.Name'''
+    conn = sqlite3.connect(sql_path)
+    try:
+        rows = conn.execute(query, (reporting_frequency,)).fetchall()
+    finally:
+        conn.close()
+
+    meter_dicts = {}
+    for row in rows:
+        env_name = row[0]
+        if env_name not in meter_dicts.keys():
+            meter_dicts[env_name] = {}
+        meter_dicts[env_name][row[1]] = row[2]
+    return meter_dicts
+
+def get_end_use_totals(sql_path: str) -> dict:
+    '''
+    Get the annual total of each fuel from the End Uses table of the AnnualBuildingUtilityPerformanceSummary report.
+
+    Parameters
+    ----------
+    sql_path : str
+        The sql file path.
+
+    Returns
+    -------
+    dict
+        the fuel name as written in the End Uses table as key and the annual total in kWh as value.
+    '''
+    query = '''SELECT ColumnName, Units, Value FROM TabularDataWithStrings
+               WHERE ReportName = 'AnnualBuildingUtilityPerformanceSummary' AND TableName = 'End Uses' AND RowName = 'Total End Uses' '''
+    conn = sqlite3.connect(sql_path)
+    try:
+        rows = conn.execute(query).fetchall()
+    finally:
+        conn.close()
+
+    # convert the energy units to kWh
+    to_kwh = {'GJ': 277.7777777777778, 'MJ': 0.2777777777777778, 'kWh': 1.0, 'J': 1/3600000}
+    end_use_dict = {}
+    for row in rows:
+        col_name = row[0]
+        units = row[1]
+        if units not in to_kwh.keys():
+            continue
+        try:
+            val = float(row[2])
+        except ValueError:
+            continue
+        end_use_dict[col_name] = val * to_kwh[units]
+    return end_use_dict
+
+def fetch_array(cursor: sqlite3.Cursor, query: str, ncols: int, params: tuple = (), chunk_size: int = 500000) -> np.ndarray:
+    '''
+    Execute the query and read the numeric rows into a 2d array, chunk by chunk.
+
+    Parameters
+    ----------
+    cursor : sqlite3.Cursor
+        the cursor of the sql connection.
+
+    query : str
+        the query, it must only select numeric columns.
+
+    ncols : int
+        the number of columns selected.
+
+    params : tuple, optional
+        the parameters of the query.
+
+    chunk_size : int, optional
+        the number of rows fetched at a time. Default 500000.
+
+    Returns
+    -------
+    np.ndarray
+        array of shape (nrows, ncols), NULL values are nan.
+    '''
+    cursor.execute(query, params)
+    chunks = []
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if len(rows) == 0:
+            break
+        chunks.append(np.array(rows, dtype=float))
+    if len(chunks) == 0:
+        return np.empty((0, ncols))
+    return np.concatenate(chunks)
+
+def get_time_zone(sql_path: str) -> float:
+    '''
+    Get the time zone of the location from the General table of the InputVerificationandResultsSummary report.
+
+    Parameters
+    ----------
+    sql_path : str
+        The sql file path.
+
+    Returns
+    -------
+    float
+        the utc offset in hours, 0 if the table is not in the sql file.
+    '''
+    query = '''SELECT Value FROM TabularDataWithStrings WHERE TableName = 'General' AND RowName = 'Time Zone' '''
+    conn = sqlite3.connect(sql_path)
+    try:
+        row = conn.execute(query).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return 0.0
+    return float(row[0])
+
+def get_environment_periods(time_arr: np.ndarray) -> dict:
+    '''
+    Get the first and last dated rows of the Time table of each environment. The run period and annual rows have no month, day, hour or minute and take their period from these rows.
+
+    Parameters
+    ----------
+    time_arr : np.ndarray
+        rows of the Time table with the columns TimeIndex, Year, Month, Day, Hour, Minute, Interval, IntervalType, EnvironmentPeriodIndex.
+
+    Returns
+    -------
+    dict
+        dictionary of the EnvironmentPeriodIndex to the first and last rows of the finest dated interval type of the environment. Environments with only run period or annual rows are not in it.
+    '''
+    dated = time_arr[(time_arr[:, 7] < 4) & ~np.isnan(time_arr[:, 2]) & ~np.isnan(time_arr[:, 3])]
+    env_periods = {}
+    for env_index in np.unique(dated[:, 8]):
+        env_rows = dated[dated[:, 8] == env_index]
+        env_rows = env_rows[env_rows[:, 7] == env_rows[:, 7].min()]
+        env_periods[int(env_index)] = env_rows[[0, -1]]
+    return env_periods
+
+def get_block_dates(block_time: np.ndarray, env_periods: dict) -> np.ndarray:
+    '''
+    Get the Time table rows that carry the dates of the block.
+
+    Parameters
+    ----------
+    block_time : np.ndarray
+        rows of the Time table of one environment and interval type with the columns TimeIndex, Year, Month, Day, Hour, Minute, Interval, IntervalType, EnvironmentPeriodIndex.
+
+    env_periods : dict
+        the periods of the environments from get_environment_periods().
+
+    Returns
+    -------
+    np.ndarray
+        the block_time, or the period rows of the environment for the run period and annual blocks. None if the environment has no dated rows.
+    '''
+    if int(block_time[0][7]) < 4:
+        return block_time
+    return env_periods.get(int(block_time[0][8]))
+
+def get_datetime_year(date_rows: np.ndarray) -> int:
+    '''
+    Get the year used for the datetimes of the block, a leap year if the block ends in one.
+
+    Parameters
+    ----------
+    date_rows : np.ndarray
+        the rows from get_block_dates(), None for no dates.
+
+    Returns
+    -------
+    int
+        2016 for a leap year, else 2017.
+    '''
+    if date_rows is None:
+        return 2017
+    end_year = date_rows[-1][1]
+    if end_year != 0 and end_year % 4 == 0:
+        return 2016
+    return 2017
+
+def calc_period_datetimes(time_arr: np.ndarray, year: int, env_period: np.ndarray = None) -> np.ndarray:
+    '''
+    Calculate the start datetime of each interval of the Time table rows.
+
+    Parameters
+    ----------
+    time_arr : np.ndarray
+        rows of the Time table with the columns TimeIndex, Year, Month, Day, Hour, Minute, Interval, IntervalType, EnvironmentPeriodIndex.
+
+    year : int
+        the year of the datetimes.
+
+    env_period : np.ndarray, optional
+        the period rows of the environment from get_environment_periods(), used for the run period and annual rows. Default None starts them on 1 Jan.
+
+    Returns
+    -------
+    np.ndarray
+        datetime64[m] array of the start of each interval.
+    '''
+    interval_type = int(time_arr[0][7])
+    if interval_type >= 4:
+        # the run period starts with the environment, each further annual row is the next year of a multi year run period
+        start = np.datetime64(f"{year}-01-01", 'm')
+        if env_period is not None:
+            start = calc_period_datetimes(env_period[:1], year)[0]
+        datetimes = np.full(len(time_arr), start)
+        for cnt in range(1, len(time_arr)):
+            datetimes[cnt] = np.datetime64(f"{year + cnt}-01-01", 'm')
+        return datetimes
+    months = np.datetime64(f"{year}-01", 'M') + (time_arr[:, 2] - 1).astype(int)
+    if interval_type == 3:
+        return months.astype('datetime64[m]')
+    dates = months.astype('datetime64[D]') + (time_arr[:, 3] - 1).astype(int)
+    if interval_type > 1:
+        return dates.astype('datetime64[m]')
+    # the hour and minute are the end of the interval
+    end_mins = time_arr[:, 4]*60 + time_arr[:, 5]
+    return dates.astype('datetime64[m]') + (end_mins - time_arr[:, 6]).astype(int)
+
+def calc_period_key(time_arr: np.ndarray, env_period: np.ndarray = None) -> str:
+    '''
+    Describe the period of the Time table rows the same way as the ladybug AnalysisPeriod, with the reporting frequency appended for daily and longer intervals.
+
+    Parameters
+    ----------
+    time_arr : np.ndarray
+        rows of the Time table of one environment and interval type with the columns TimeIndex, Year, Month, Day, Hour, Minute, Interval, IntervalType, EnvironmentPeriodIndex.
+
+    env_period : np.ndarray, optional
+        the period rows of the environment from get_environment_periods(), used for the run period and annual rows. Default None describes them as the whole year.
+
+    Returns
+    -------
+    str
+        e.g. 1/1 to 12/31 between 0 and 23 @4
+    '''
+    interval_type = int(time_arr[0][7])
+    if interval_type <= 1:
+        timestep = int(60 / time_arr[0][6])
+    else:
+        timestep = 1
+    date_rows = time_arr
+    if interval_type >= 4:
+        # the run period and annual rows have no dates
+        date_rows = env_period
+    if date_rows is None:
+        key = f"1/1 to 12/31 between 0 and 23 @{timestep}"
+    else:
+        st_day = int(date_rows[0][3])
+        if int(date_rows[0][7]) == 3:
+            st_day = 1
+        key = f"{int(date_rows[0][2])}/{st_day} to {int(date_rows[-1][2])}/{int(date_rows[-1][3])} between 0 and 23 @{timestep}"
+        if get_datetime_year(date_rows) == 2016:
+            key += '*'
+    if interval_type > 1:
+        key += f" {INTERVAL_FREQS[interval_type]}"
+    return key
+
+def get_environment_names(c: sqlite3.Cursor) -> dict:
+    '''
+    Get the name of each environment of the EnvironmentPeriods table, e.g. DD WINTER or RUN PERIOD 1.
+
+    Parameters
+    ----------
+    c : sqlite3.Cursor
+        a cursor of the EP+ sql file.
+
+    Returns
+    -------
+    dict
+        dictionary of the EnvironmentPeriodIndex to the environment name. Names used by more than one environment end with #EnvironmentPeriodIndex.
+    '''
+    env_rows = c.execute('SELECT EnvironmentPeriodIndex, EnvironmentName FROM EnvironmentPeriods').fetchall()
+    names = [row[1] for row in env_rows]
+    env_names = {}
+    for env_index, name in env_rows:
+        if names.count(name) > 1:
+            name = f"{name} #{env_index}"
+        env_names[env_index] = name
+    return env_names
+
+def calc_block_ids(time_rows: np.ndarray) -> np.ndarray:
+    '''
+    Calculate the id of the block (environment and interval type) each row of the Time table belongs to.
+
+    Parameters
+    ----------
+    time_rows : np.ndarray
+        rows of the Time table with the columns TimeIndex, Year, Month, Day, Hour, Minute, Interval, IntervalType, EnvironmentPeriodIndex.
+
+    Returns
+    -------
+    np.ndarray
+        the block id of each row, EnvironmentPeriodIndex*10 + IntervalType + 1.
+    '''
+    return time_rows[:, 8].astype(int)*10 + time_rows[:, 7].astype(int) + 1
+
+def parse_period_datetime(datetime_str: str, year: int, is_end: bool = False) -> np.datetime64:
+    '''
+    Parse the start or end of a datetime range given without the year.
+
+    Parameters
+    ----------
+    datetime_str : str
+        MM-DD or MM-DDTHH:MM, e.g. 07-01 or 07-01T08:00.
+
+    year : int
+        the year of the report data.
+
+    is_end : bool, optional
+        True if it is the end of the range, an end without the time includes the whole day. Default False.
+
+    Returns
+    -------
+    np.datetime64
+        the datetime, the end of the range is exclusive.
+    '''
+    dt = np.datetime64(f"{year}-{datetime_str}", 'm')
+    if is_end:
+        if 'T' in datetime_str:
+            dt += 1
+        else:
+            dt += 1440
+    return dt
+
+def select_report_data(conn: sqlite3.Connection, time_arr: np.ndarray, report_filter: dict) -> np.ndarray:
+    '''
+    Select the ReportDataDictionary and Time rows of the filter into the temporary tables report_dd and report_time so that the report data is filtered in the sql queries.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        the connection to the EP+ sql file.
+
+    time_arr : np.ndarray
+        rows of the Time table with the columns TimeIndex, Year, Month, Day, Hour, Minute, Interval, IntervalType, EnvironmentPeriodIndex.
+
+    report_filter : dict
+        dictionary with the optional keys
+        - variables: list of glob patterns of the variable names, e.g. ['Zone Mean Air Temperature', 'Electricity:*']
+        - keys: list of glob patterns of the key values, e.g. ['THERMAL ZONE 1']
+        - frequencies: list of the reporting frequencies, e.g. ['Hourly']
+        - start: the start of the datetime range, MM-DD or MM-DDTHH:MM
+        - end: the end of the datetime range, MM-DD or MM-DDTHH:MM, inclusive
+        the patterns are case insensitive.
+
+    Returns
+    -------
+    np.ndarray
+        the rows of the time_arr that are selected.
+    '''
+    conditions = []
+    params = []
+    for col_name, filter_key in [('Name', 'variables'), ('KeyValue', 'keys')]:
+        patterns = report_filter.get(filter_key)
+        if patterns:
+            conditions.append('(' + ' OR '.join([f"UPPER({col_name}) GLOB UPPER(?)"]*len(patterns)) + ')')
+            params.extend(patterns)
+    frequencies = report_filter.get('frequencies')
+    if frequencies:
+        conditions.append('ReportingFrequency IN (' + ','.join(['?']*len(frequencies)) + ')')
+        params.extend(frequencies)
+    dd_query = 'SELECT ReportDataDictionaryIndex FROM ReportDataDictionary'
+    if len(conditions) != 0:
+        dd_query += ' WHERE ' + ' AND '.join(conditions)
+
+    # the datetimes depend on the year and interval type of each environment
+    time_mask = np.full(len(time_arr), True)
+    start = report_filter.get('start')
+    end = report_filter.get('end')
+    if (start or end) and len(time_arr) != 0:
+        env_periods = get_environment_periods(time_arr)
+        time_block_ids = calc_block_ids(time_arr)
+        for block_id in np.unique(time_block_ids):
+            tposs = np.nonzero(time_block_ids == block_id)[0]
+            block_time = time_arr[tposs]
+            env_period = env_periods.get(block_id // 10)
+            year = get_datetime_year(get_block_dates(block_time, env_periods))
+            datetimes = calc_period_datetimes(block_time, year, env_period=env_period)
+            block_mask = np.full(len(tposs), True)
+            if start:
+                block_mask &= datetimes >= parse_period_datetime(start, year)
+            if end:
+                block_mask &= datetimes < parse_period_datetime(end, year, is_end=True)
+            time_mask[tposs] = block_mask
+
+    c = conn.cursor()
+    c.execute('DROP TABLE IF EXISTS temp.report_dd')
+    c.execute('CREATE TEMP TABLE report_dd (ReportDataDictionaryIndex INTEGER PRIMARY KEY)')
+    c.execute(f"INSERT INTO temp.report_dd {dd_query}", params)
+    c.execute('DROP TABLE IF EXISTS temp.report_time')
+    c.execute('CREATE TEMP TABLE report_time (TimeIndex INTEGER PRIMARY KEY)')
+    c.executemany('INSERT INTO temp.report_time VALUES (?)', [(int(time_index),) for time_index in time_arr[time_mask, 0]])
+    return time_arr[time_mask]
+
+def get_report_where(report_filter: dict, table_alias: str = '') -> str:
+    '''
+    Get the where clause of the ReportData queries that selects the rows in the temporary tables of select_report_data().
+
+    Parameters
+    ----------
+    report_filter : dict
+        the filter of select_report_data(), None or empty for no filter.
+
+    table_alias : str, optional
+        the alias of the ReportData table in the query, e.g. rd.
+
+    Returns
+    -------
+    str
+        the where clause, empty string for no filter.
+    '''
+    if not report_filter:
+        return ''
+    prefix = f"{table_alias}." if table_alias else ''
+    return (f" WHERE {prefix}ReportDataDictionaryIndex IN (SELECT ReportDataDictionaryIndex FROM temp.report_dd)"
+            f" AND {prefix}TimeIndex IN (SELECT TimeIndex FROM temp.report_time)")
+
+def get_report_blocks(conn: sqlite3.Connection, report_filter: dict = None) -> tuple[np.ndarray, dict]:
+    '''
+    Read the layout of the report data, the Time table and the columns of each environment and interval type, without reading the values.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        the connection to the EP+ sql file.
+
+    report_filter : dict, optional
+        the variables, keys, frequencies and datetime range to read, refer to select_report_data(). Default None reads all the report data.
+
+    Returns
+    -------
+    tuple[np.ndarray, dict]
+        - rows of the Time table with the columns TimeIndex, Year, Month, Day, Hour, Minute, Interval, IntervalType, EnvironmentPeriodIndex, only the rows in the datetime range of the filter.
+        - dictionary with the block id from calc_block_ids() as key, each value is a dictionary with the keys
+        - key: the period key from calc_period_key()
+        - environment: the environment name from get_environment_names()
+        - frequency: the reporting frequency, refer to INTERVAL_FREQS
+        - tpos: the positions of the Time table rows of the block
+        - datetimes: datetime64[m] array of the start of each interval of the tpos
+        - names: list of the column names in the ladybug header format, e.g. Zone Mean Air Temperature_THERMAL ZONE 1(C), in the ReportDataDictionaryIndex order
+        - variables: list of the variable name of each column, e.g. Zone Mean Air Temperature
+        - key_values: list of the key value of each column, e.g. THERMAL ZONE 1
+        - units: list of the units of each column, J is converted to kWh
+        - dd_indices: the ReportDataDictionaryIndex of each column
+        - divisors: the values of each column are divided by it to convert the units
+    '''
+    c = conn.cursor()
+    c.execute('SELECT ReportDataDictionaryIndex, IndexGroup, KeyValue, Name, Units FROM ReportDataDictionary')
+    dict_rows = {row[0]: row[1:] for row in c.fetchall()}
+    time_arr = fetch_array(c, 'SELECT TimeIndex, Year, Month, Day, Hour, Minute, Interval, IntervalType, EnvironmentPeriodIndex FROM Time ORDER BY TimeIndex', 9)
+    env_periods = get_environment_periods(time_arr)
+    if report_filter:
+        time_arr = select_report_data(conn, time_arr, report_filter)
+    c.execute('''SELECT DISTINCT t.EnvironmentPeriodIndex, t.IntervalType, rd.ReportDataDictionaryIndex FROM ReportData rd
+                 JOIN Time t ON rd.TimeIndex = t.TimeIndex''' + get_report_where(report_filter, table_alias='rd'))
+    block_cols = {}
+    for env_index, interval_type, dd_index in c.fetchall():
+        block_id = env_index*10 + interval_type + 1
+        if block_id not in block_cols.keys():
+            block_cols[block_id] = []
+        block_cols[block_id].append(dd_index)
+
+    env_names = get_environment_names(c)
+    time_block_ids = calc_block_ids(time_arr)
+    blocks = {}
+    keys = []
+    for block_id in sorted(block_cols.keys()):
+        tposs = np.nonzero(time_block_ids == block_id)[0]
+        block_time = time_arr[tposs]
+        env_period = env_periods.get(block_id // 10)
+        year = get_datetime_year(get_block_dates(block_time, env_periods))
+        dd_indices = sorted(block_cols[block_id])
+        names = []
+        variables = []
+        key_values = []
+        units = []
+        divisors = []
+        for dd_index in dd_indices:
+            index_group, key_value, name, unit = dict_rows[dd_index]
+            divisor = 1.
+            if unit == 'J':
+                divisor = 3600000.
+                unit = 'kWh'
+            elif unit == '':
+                unit = 'fraction'
+            names.append(f"{name}_{key_value}({unit})")
+            variables.append(name)
+            key_values.append(key_value)
+            units.append(unit)
+            divisors.append(divisor)
+
+        key = calc_period_key(block_time, env_period=env_period)
+        if key in keys:
+            key += f" #{block_id // 10}"
+        keys.append(key)
+        blocks[block_id] = {'key': key, 'environment': env_names.get(block_id // 10, ''), 'frequency': INTERVAL_FREQS[int(block_time[0][7])], 'tpos': tposs,
+                            'datetimes': calc_period_datetimes(block_time, year, env_period=env_period), 'names': names,
+                            'variables': variables, 'key_values': key_values, 'units': units, 'dd_indices': np.array(dd_indices),
+                            'divisors': np.array(divisors)}
+    return time_arr, blocks
+
+def iter_report_chunks(conn: sqlite3.Connection, time_arr: np.ndarray, blocks: dict, chunk_size: int = 100000, report_filter: dict = None):
+    '''
+    Read the ReportData table chunk by chunk in the order EnergyPlus wrote it and pivot each chunk into rows of the blocks.
+    Only the rows of a block with all their columns read are yielded, the rest are carried over to the next chunk, so the memory used is bounded by the chunk size.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        the connection to the EP+ sql file.
+
+    time_arr : np.ndarray
+        the Time table from get_report_blocks().
+
+    blocks : dict
+        the blocks from get_report_blocks().
+
+    chunk_size : int, optional
+        the number of ReportData rows read at a time. Default 100000.
+
+    report_filter : dict, optional
+        the filter given to get_report_blocks(). Default None.
+
+    Yields
+    ------
+    tuple[int, np.ndarray, np.ndarray]
+        the block id, datetime64[m] array of the rows and the array of values of shape (nrows, ncolumns of the block).
+    '''
+    if len(time_arr) == 0:
+        return
+    time_indices = time_arr[:, 0].astype(int)
+    time_pos = np.full(time_indices.max() + 1, -1)
+    time_pos[time_indices] = np.arange(len(time_indices))
+    col_lookups = {}
+    carry = {}
+    for block_id, block in blocks.items():
+        col_lookup = np.full(block['dd_indices'].max() + 1, -1)
+        col_lookup[block['dd_indices']] = np.arange(len(block['dd_indices']))
+        col_lookups[block_id] = col_lookup
+        carry[block_id] = np.empty((0, 3))
+
+    c = conn.cursor()
+    c.execute('SELECT TimeIndex, ReportDataDictionaryIndex, Value FROM ReportData' + get_report_where(report_filter) + ' ORDER BY ReportDataIndex')
+    while True:
+        rows = c.fetchmany(chunk_size)
+        is_last = len(rows) == 0
+        if is_last:
+            chunk = np.empty((0, 3))
+        else:
+            chunk = np.array(rows, dtype=float)
+        tpos = time_pos[chunk[:, 0].astype(int)]
+        row_block_ids = calc_block_ids(time_arr[tpos])
+        for block_id, block in blocks.items():
+            mask = row_block_ids == block_id
+            block_rows = np.concatenate([carry[block_id], np.column_stack([tpos[mask], chunk[mask, 1], chunk[mask, 2]])])
+            if len(block_rows) == 0:
+                continue
+            if not is_last:
+                # the rows of the last timestep may continue in the next chunk
+                complete = block_rows[:, 0] < block_rows[-1, 0]
+                carry[block_id] = block_rows[~complete]
+                block_rows = block_rows[complete]
+                if len(block_rows) == 0:
+                    continue
+            else:
+                carry[block_id] = np.empty((0, 3))
+            row_tpos, row_idxs = np.unique(block_rows[:, 0].astype(int), return_inverse=True)
+            values = np.full((len(row_tpos), len(block['dd_indices'])), np.nan)
+            values[row_idxs, col_lookups[block_id][block_rows[:, 1].astype(int)]] = block_rows[:, 2]
+            values = values / block['divisors']
+            datetimes = block['datetimes'][np.searchsorted(block['tpos'], row_tpos)]
+            yield block_id, datetimes, values
+        if is_last:
+            break
+
+def read_report_data(sql_path: str, chunk_size: int = 100000, report_filter: dict = None) -> dict:
+    '''
+    Read all the report data of the EP+ sql file into a table of values for each environment and reporting frequency.
+
+    Parameters
+    ----------
+    sql_path : str
+        The sql file path.
+
+    chunk_size : int, optional
+        the number of ReportData rows read at a time. Default 100000.
+
+    report_filter : dict, optional
+        the variables, keys, frequencies and datetime range to read, refer to select_report_data(). Default None reads all the report data.
+
+    Returns
+    -------
+    dict
+        - the period key from calc_period_key() as key
+        - each value is a dictionary with the keys
+        - environment: the environment name from get_environment_names()
+        - frequency: the reporting frequency, refer to INTERVAL_FREQS
+        - datetimes: datetime64[m] array of the start of each interval
+        - names: list of the column names in the ladybug header format, e.g. Zone Mean Air Temperature_THERMAL ZONE 1(C)
+        - variables: list of the variable name of each column
+        - key_values: list of the key value of each column
+        - units: list of the units of each column, J is converted to kWh
+        - values: array of shape (ndatetimes, nnames)
+    '''
+    conn = sqlite3.connect(sql_path)
+    try:
+        time_arr, blocks = get_report_blocks(conn, report_filter=report_filter)
+        dt_chunks = {block_id: [] for block_id in blocks.keys()}
+        val_chunks = {block_id: [] for block_id in blocks.keys()}
+        for block_id, datetimes, values in iter_report_chunks(conn, time_arr, blocks, chunk_size=chunk_size, report_filter=report_filter):
+            dt_chunks[block_id].append(datetimes)
+            val_chunks[block_id].append(values)
+    finally:
+        conn.close()
+
+    report_data = {}
+    for block_id, block in blocks.items():
+        if len(val_chunks[block_id]) == 0:
+            continue
+        report_data[block['key']] = {'environment': block['environment'], 'frequency': block['frequency'], 'datetimes': np.concatenate(dt_chunks[block_id]), 'names': block['names'],
+                                     'variables': block['variables'], 'key_values': block['key_values'], 'units': block['units'],
+                                     'values': np.concatenate(val_chunks[block_id])}
+    return report_data
+
+def format_datetimes(datetimes: np.ndarray, utc_offset: float, time_format: str = 'iso') -> np.ndarray:
+    '''
+    Format the local datetimes of the report data with the utc offset of the location in one vectorized step.
+
+    Parameters
+    ----------
+    datetimes : np.ndarray
+        datetime64 array of local times.
+
+    utc_offset : float
+        the utc offset of the location in hours.
+
+    time_format : str, optional
+        iso for ISO 8601 strings with the offset, e.g. 2017-01-01T00:00:00-05:00, epoch for the seconds since 1970-01-01 UTC. Default iso.
+
+    Returns
+    -------
+    np.ndarray
+        array of strings for iso, array of int for epoch.
+    '''
+    offset_mins = int(round(utc_offset * 60))
+    if time_format == 'epoch':
+        return datetimes.astype('datetime64[s]').astype(np.int64) - offset_mins*60
+    sign = '+' if offset_mins >= 0 else '-'
+    offset_str = f"{sign}{abs(offset_mins) // 60:02d}:{abs(offset_mins) % 60:02d}"
+    return np.char.add(np.datetime_as_string(datetimes, unit='s'), offset_str)
+
+def make_block_header(period_key: str, block: dict, utc_offset: float, nrows: int) -> dict:
+    '''
+    Make the json header of a block of report data written as binary arrays.
+
+    Parameters
+    ----------
+    period_key : str
+        the period key from calc_period_key().
+
+    block : dict
+        the block from get_report_blocks() or read_report_data().
+
+    utc_offset : float
+        the utc offset of the location in hours.
+
+    nrows : int
+        the number of rows of the block.
+
+    Returns
+    -------
+    dict
+        the header with the period, utc_offset, nrows and the name, variable, key and units of each column of the values array.
+    '''
+    columns = []
+    for cnt, name in enumerate(block['names']):
+        columns.append({'name': name, 'variable': block['variables'][cnt], 'key': block['key_values'][cnt], 'units': block['units'][cnt]})
+    header = {'period': period_key, 'utc_offset': utc_offset, 'nrows': nrows,
+              'datetimes': 'datetime64[m], local start time of each interval', 'columns': columns}
+    return header
+
+def load_report_block(block_path: str, mmap_mode: str = 'r') -> dict:
+    '''
+    Load a block of report data written by epsql2csv in the npz or npy format.
+
+    Parameters
+    ----------
+    block_path : str
+        the path of the .npz file, or the directory with the header.json, datetimes.npy and values.npy.
+
+    mmap_mode : str, optional
+        the mmap_mode of np.load for the npy format, the values are then read from disk only when a column is accessed. None loads them into memory. Default 'r'.
+
+    Returns
+    -------
+    dict
+        dictionary with the keys header (refer to make_block_header()), names, datetimes and values, array of shape (nrows, ncolumns).
+    '''
+    block_path = Path(block_path)
+    if block_path.suffix == '.npz':
+        with np.load(block_path) as npz:
+            header = json.loads(str(npz['header']))
+            datetimes = npz['datetimes']
+            values = npz['values']
+    else:
+        with open(block_path.joinpath('header.json')) as f:
+            header = json.load(f)
+        datetimes = np.load(block_path.joinpath('datetimes.npy'), mmap_mode=mmap_mode)
+        values = np.load(block_path.joinpath('values.npy'), mmap_mode=mmap_mode)
+    names = [column['name'] for column in header['columns']]
+    return {'header': header, 'names': names, 'datetimes': datetimes, 'values': values}
+
+def aggregate_report_data(sql_path: str, period: str = 'monthly', report_filter: dict = None) -> list[dict]:
+    '''
+    Calculate the count, sum, mean, max and min of each variable for each month or for the whole environment with GROUP BY in the sql query, without reading the timestep values.
+
+    Parameters
+    ----------
+    sql_path : str
+        The sql file path.
+
+    period : str, optional
+        monthly or annual. Default monthly.
+
+    report_filter : dict, optional
+        the variables, keys, frequencies and datetime range to aggregate, refer to select_report_data(). Default None aggregates all the report data.
+
+    Returns
+    -------
+    list[dict]
+        a dictionary for each environment, variable and month with the keys environment, variable, key, units, frequency, month (monthly only), count, sum, mean, max and min. J is converted to kWh.
+    '''
+    if period == 'monthly':
+        month_col = ', t.Month'
+    else:
+        month_col = ''
+    query = f"""SELECT ep.EnvironmentName, rdd.Name, rdd.KeyValue, rdd.Units, rdd.ReportingFrequency{month_col},
+                COUNT(rd.Value), SUM(rd.Value), AVG(rd.Value), MAX(rd.Value), MIN(rd.Value)
+                FROM ReportData rd
+                JOIN ReportDataDictionary rdd ON rd.ReportDataDictionaryIndex = rdd.ReportDataDictionaryIndex
+                JOIN Time t ON rd.TimeIndex = t.TimeIndex
+                LEFT JOIN EnvironmentPeriods ep ON t.EnvironmentPeriodIndex = ep.EnvironmentPeriodIndex
+                {get_report_where(report_filter, table_alias='rd')}
+                GROUP BY t.EnvironmentPeriodIndex, rd.ReportDataDictionaryIndex{month_col}
+                ORDER BY t.EnvironmentPeriodIndex, rd.ReportDataDictionaryIndex{month_col}"""
+    conn = sqlite3.connect(sql_path)
+    try:
+        c = conn.cursor()
+        if report_filter:
+            time_arr = fetch_array(c, 'SELECT TimeIndex, Year, Month, Day, Hour, Minute, Interval, IntervalType, EnvironmentPeriodIndex FROM Time ORDER BY TimeIndex', 9)
+            select_report_data(conn, time_arr, report_filter)
+        rows = c.execute(query).fetchall()
+    finally:
+        conn.close()
+
+    stat_names = ['count', 'sum', 'mean', 'max', 'min']
+    stats = []
+    for row in rows:
+        stat = {'environment': row[0], 'variable': row[1], 'key': row[2], 'units': row[3], 'frequency': row[4]}
+        if period == 'monthly':
+            stat['month'] = row[5]
+            stat_vals = list(row[6:])
+        else:
+            stat_vals = list(row[5:])
+        if stat['units'] == 'J':
+            stat['units'] = 'kWh'
+            stat_vals[1:] = [val / 3600000. if val is not None else None for val in stat_vals[1:]]
+        elif stat['units'] == '':
+            stat['units'] = 'fraction'
+        stat.update(dict(zip(stat_names, stat_vals)))
+        stats.append(stat)
+    return stats
+
+# headline tables of the EnergyPlus tabular reports, (report name, table name)
+TABULAR_KPIS = {'site_energy': ('AnnualBuildingUtilityPerformanceSummary', 'Site and Source Energy'),
+                'building_area': ('AnnualBuildingUtilityPerformanceSummary', 'Building Area'),
+                'end_uses': ('AnnualBuildingUtilityPerformanceSummary', 'End Uses'),
+                'unmet_hours': ('SystemSummary', 'Time Setpoint Not Met')}
+
+def create_tabular_indexes(conn: sqlite3.Connection) -> bool:
+    '''
+    Create the indexes used by query_tabular_data() on the TabularData table if they are missing. They are kept in the sql file so later queries do not pay for them again.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        the connection to the EP+ sql file.
+
+    Returns
+    -------
+    bool
+        False if the sql file is read only and the indexes could not be created, the queries then scan the TabularData table.
+    '''
+    try:
+        conn.execute('CREATE INDEX IF NOT EXISTS tabular_report_table ON TabularData (ReportNameIndex, TableNameIndex)')
+        conn.commit()
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+def get_string_indices(conn: sqlite3.Connection, string_type: str, values: list[str]) -> list[int]:
+    '''
+    Get the indices of the strings of a type in the Strings table.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        the connection to the EP+ sql file.
+
+    string_type : str
+        the Value of the StringTypes table, e.g. ReportName, TableName, RowName, ColumnName, ReportForString.
+
+    values : list[str]
+        the strings.
+
+    Returns
+    -------
+    list[int]
+        the StringIndex of the strings found.
+    '''
+    query = f'''SELECT s.StringIndex FROM Strings s WHERE s.StringTypeIndex = (SELECT StringTypeIndex FROM StringTypes WHERE Value = ?)
+                AND s.Value IN ({','.join(['?']*len(values))})'''
+    rows = conn.execute(query, [string_type] + list(values)).fetchall()
+    return [row[0] for row in rows]
+
+def query_tabular_data(conn: sqlite3.Connection, reports: list[str] = None, tables: list[str] = None, rows: list[str] = None,
+                       columns: list[str] = None, report_fors: list[str] = None) -> list[dict]:
+    '''
+    Get the cells of the tabular reports. The names are resolved to their indices in the Strings table first so only the matching TabularData rows are read.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        the connection to the EP+ sql file.
+
+    reports : list[str], optional
+        the report names, e.g. AnnualBuildingUtilityPerformanceSummary. Default None for all.
+
+    tables : list[str], optional
+        the table names, e.g. End Uses. Default None for all.
+
+    rows : list[str], optional
+        the row names, e.g. Total End Uses. Default None for all.
+
+    columns : list[str], optional
+        the column names, e.g. Electricity. Default None for all.
+
+    report_fors : list[str], optional
+        the report for strings, e.g. Entire Facility. Default None for all.
+
+    Returns
+    -------
+    list[dict]
+        a dictionary for each cell with the keys report, report_for, table, row, column, units and value. Numeric values are converted to float.
+    '''
+    conditions = []
+    params = []
+    for col_name, string_type, names in [('ReportNameIndex', 'ReportName', reports), ('TableNameIndex', 'TableName', tables),
+                                         ('RowNameIndex', 'RowName', rows), ('ColumnNameIndex', 'ColumnName', columns),
+                                         ('ReportForStringIndex', 'ReportForString', report_fors)]:
+        if not names:
+            continue
+        string_indices = get_string_indices(conn, string_type, names)
+        if len(string_indices) == 0:
+            return []
+        conditions.append(f"td.{col_name} IN ({','.join(['?']*len(string_indices))})")
+        params.extend(string_indices)
+
+    query = '''SELECT rn.Value, fs.Value, tn.Value, rown.Value, cn.Value, u.Value, td.Value FROM TabularData td
+               JOIN Strings rn ON rn.StringIndex = td.ReportNameIndex
+               JOIN Strings fs ON fs.StringIndex = td.ReportForStringIndex
+               JOIN Strings tn ON tn.StringIndex = td.TableNameIndex
+               JOIN Strings rown ON rown.StringIndex = td.RowNameIndex
+               JOIN Strings cn ON cn.StringIndex = td.ColumnNameIndex
+               LEFT JOIN Strings u ON u.StringIndex = td.UnitsIndex'''
+    if len(conditions) != 0:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += ' ORDER BY td.TabularDataIndex'
+
+    cells = []
+    for row in conn.execute(query, params).fetchall():
+        value = row[6].strip() if row[6] is not None else None
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            pass
+        cells.append({'report': row[0], 'report_for': row[1], 'table': row[2], 'row': row[3], 'column': row[4], 'units': row[5],
+                      'value': value})
+    return cells
@@ -0,0 +1,106 @@
+import numpy as np
+
+def calc_polygon_normals(polygons: np.ndarray) -> np.ndarray:
+    '''
+    Calculate the normals of polygons with the same number of vertices with Newell's method.
+
+    Parameters
+    ----------
+    polygons : np.ndarray
+        np.ndarray[shape(number of polygons, number of vertices, 3)] the vertices of the polygons.
+
+    Returns
+    -------
+    np.ndarray
+        np.ndarray[shape(number of polygons, 3)] the unit normals of the polygons.
+    '''
+    nxt_polygons = np.roll(polygons, -1, axis=1)
+    normals = np.cross(polygons, nxt_polygons).sum(axis=1)
+    lengths = np.linalg.norm(normals, axis=1)
+    lengths[lengths == 0] = 1
+    return normals/lengths[:, None]
+
+def extrude_faces(nverts: int) -> tuple[list[list[int]], list[list[int]]]:
+    '''
+    The faces of a polygon with nverts vertices extruded by extrude_polygons().
+
+    Parameters
+    ----------
+    nverts : int
+        the number of vertices of the polygon.
+
+    Returns
+    -------
+    tuple[list[list[int]], list[list[int]]]
+        - the faces when the extrusion is on the side of the polygon normal.
+        - the faces when the extrusion is opposite the polygon normal.
+        - the base polygon is vertex 0 to nverts-1 and the extruded polygon is vertex nverts to 2*nverts-1.
+    '''
+    base = list(range(nverts))
+    top = list(range(nverts, 2*nverts))
+    sides = [[cnt, (cnt+1)%nverts, nverts + (cnt+1)%nverts, nverts + cnt] for cnt in range(nverts)]
+    # the base faces its own extrusion, reverse it
+    pos_faces = [base[::-1]] + sides + [top]
+    neg_faces = [base] + [side[::-1] for side in sides] + [top[::-1]]
+    return pos_faces, neg_faces
+
+def extrude_polygons(xyzs_ls: list[np.ndarray | list], magnitudes: list[float], directions: list[list[float]] = None,
+                     movements: list[float] = None) -> list[dict]:
+    '''
+    Extrude many polygons at once. The polygons are grouped by their number of vertices and each group is extruded with one set of array operations.
+
+    Parameters
+    ----------
+    xyzs_ls : list[np.ndarray | list]
+        list of np.ndarray[shape(number of points, 3)] the points forming each polygon.
+
+    magnitudes : list[float]
+        the magnitude of the extrusion of each polygon.
+
+    directions : list[list[float]], optional
+        the direction of the extrusion of each polygon. If None or if the direction of a polygon is None, the normal of the polygon is used.
+
+    movements : list[float], optional
+        the polygon is moved by this magnitude opposite its normal before the extrusion. Default is no movement.
+
+    Returns
+    -------
+    list[dict]
+        dictionary of the polymesh of each polygon, in the order of xyzs_ls, with two keys: vertices and indices.
+    '''
+    npolys = len(xyzs_ls)
+    if directions is None:
+        directions = [None]*npolys
+    if movements is None:
+        movements = [0]*npolys
+
+    groups = {}
+    for cnt, xyzs in enumerate(xyzs_ls):
+        nverts = len(xyzs)
+        if nverts not in groups.keys():
+            groups[nverts] = []
+        groups[nverts].append(cnt)
+
+    poly_meshes = [None]*npolys
+    for nverts, ids in groups.items():
+        polygons = np.array([xyzs_ls[id] for id in ids], dtype=float)
+        normals = calc_polygon_normals(polygons)
+        dirs = normals.copy()
+        for cnt, id in enumerate(ids):
+            if directions[id] is not None:
+                dirs[cnt] = directions[id]
+        mags = np.array([magnitudes[id] for id in ids], dtype=float)
+        mvs = np.array([movements[id] for id in ids], dtype=float)
+
+        base = polygons - normals[:, None, :]*mvs[:, None, None]
+        top = base + dirs[:, None, :]*mags[:, None, None]
+        vertices = np.concatenate([base, top], axis=1)
+        is_pos = np.einsum('ij,ij->i', normals, dirs) >= 0
+        pos_faces, neg_faces = extrude_faces(nverts)
+        for cnt, id in enumerate(ids):
+            if is_pos[cnt]:
+                faces = pos_faces
+            else:
+                faces = neg_faces
+            poly_meshes[id] = {'vertices': vertices[cnt], 'indices': faces}
+    return poly_meshes
@@ -0,0 +1,460 @@
+import numpy as np
+import ifcopenshell
+import ifcopenshell.guid
+import ifcopenshell.util.unit
+import ifcopenshell.util.element
+import ifcopenshell.util.placement
+
+# slabs and roofs are layered along their thickness, the other elements across their width
+AXIS3_CLASSES = ['IfcSlab', 'IfcRoof']
+
+def create_root_entity(ifcmodel: ifcopenshell.file, ifc_class: str, name: str) -> ifcopenshell.entity_instance:
+    '''
+    Create an IfcRoot entity directly, same as root.create_entity without the owner history.
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    ifc_class: str
+        the ifc class to create.
+
+    name: str
+        the name of the entity.
+
+    Returns
+    -------
+    ifcopenshell.entity_instance
+        the created entity.
+    '''
+    return ifcmodel.create_entity(ifc_class, GlobalId=ifcopenshell.guid.new(), Name=name or None)
+
+def create_local_placement(ifcmodel: ifcopenshell.file, placement_rel_to: ifcopenshell.entity_instance = None, matrix: np.ndarray = None,
+                           unit_scale: float = 1.0) -> ifcopenshell.entity_instance:
+    '''
+    Create an IfcLocalPlacement, same as geometry.edit_object_placement.
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    placement_rel_to: ifcopenshell.entity_instance, optional
+        the placement the new placement is relative to.
+
+    matrix: np.ndarray, optional
+        np.ndarray[shape(4, 4)] the placement matrix with the location in meters. Default is the identity matrix.
+
+    unit_scale: float, optional
+        the unit scale of the ifc model from ifcopenshell.util.unit.calculate_unit_scale(), used to convert the location of the matrix.
+
+    Returns
+    -------
+    ifcopenshell.entity_instance
+        the IfcLocalPlacement.
+    '''
+    if matrix is None:
+        location = (0.0, 0.0, 0.0)
+        axis_dir = (0.0, 0.0, 1.0)
+        ref_dir = (1.0, 0.0, 0.0)
+    else:
+        location = (np.array(matrix)[0:3, 3] / unit_scale).tolist()
+        axis_dir = np.array(matrix)[0:3, 2].tolist()
+        ref_dir = np.array(matrix)[0:3, 0].tolist()
+    origin = ifcmodel.create_entity('IfcCartesianPoint', location)
+    axis = ifcmodel.create_entity('IfcDirection', axis_dir)
+    ref_direction = ifcmodel.create_entity('IfcDirection', ref_dir)
+    axis2placement = ifcmodel.create_entity('IfcAxis2Placement3D', origin, axis, ref_direction)
+    return ifcmodel.create_entity('IfcLocalPlacement', PlacementRelTo=placement_rel_to, RelativePlacement=axis2placement)
+
+def create_mesh_representation(ifcmodel: ifcopenshell.file, context: ifcopenshell.entity_instance, vertices: np.ndarray | list,
+                               faces: list[list[int]], unit_scale: float) -> ifcopenshell.entity_instance:
+    '''
+    Create a tessellated body representation, same as geometry.add_mesh_representation with a single item.
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    context: ifcopenshell.entity_instance
+        the representation context.
+
+    vertices: np.ndarray | list
+        np.ndarray[shape(number of points, 3)] the vertices in meters.
+
+    faces: list[list[int]]
+        the faces as lists of the 0-based vertex indices.
+
+    unit_scale: float
+        the unit scale of the ifc model from ifcopenshell.util.unit.calculate_unit_scale().
+
+    Returns
+    -------
+    ifcopenshell.entity_instance
+        the IfcShapeRepresentation.
+    '''
+    coords = (np.array(vertices, dtype=np.float64) * (1 / unit_scale)).tolist()
+    ifc_pts = ifcmodel.create_entity('IfcCartesianPointList3D', coords)
+    ifc_faces = [ifcmodel.create_entity('IfcIndexedPolygonalFace', [int(i) + 1 for i in face]) for face in faces]
+    face_set = ifcmodel.create_entity('IfcPolygonalFaceSet', Coordinates=ifc_pts, Faces=ifc_faces)
+    return ifcmodel.create_entity('IfcShapeRepresentation', context, context.ContextIdentifier, 'Tessellation', [face_set])
+
+def assign_representation(ifcmodel: ifcopenshell.file, product: ifcopenshell.entity_instance, representation: ifcopenshell.entity_instance,
+                          placement_rel_to: ifcopenshell.entity_instance = None, matrix: np.ndarray = None, unit_scale: float = 1.0):
+    '''
+    Give the product a placement and the representation.
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    product: ifcopenshell.entity_instance
+        the ifc product.
+
+    representation: ifcopenshell.entity_instance
+        the IfcShapeRepresentation.
+
+    placement_rel_to: ifcopenshell.entity_instance, optional
+        the placement the product is placed relative to, e.g. the placement of the opening it fills.
+
+    matrix: np.ndarray, optional
+        np.ndarray[shape(4, 4)] the placement matrix with the location in meters. Default is the identity matrix.
+
+    unit_scale: float, optional
+        the unit scale of the ifc model, used to convert the location of the matrix.
+    '''
+    product.ObjectPlacement = create_local_placement(ifcmodel, placement_rel_to=placement_rel_to, matrix=matrix, unit_scale=unit_scale)
+    product.Representation = ifcmodel.create_entity('IfcProductDefinitionShape', Representations=[representation])
+
+def calc_local_frame(xyzs: np.ndarray | list) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Calculate a local frame of a planar polygon, the origin is the first point, the x-axis is along the first edge and the z-axis is the polygon normal.
+
+    Parameters
+    ----------
+    xyzs: np.ndarray | list
+        np.ndarray[shape(number of points, 3)] the points of the polygon.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        - np.ndarray[shape(4, 4)] the matrix of the local frame.
+        - np.ndarray[shape(number of points, 3)] the points in the local frame.
+    '''
+    xyzs = np.array(xyzs, dtype=np.float64)
+    # newell's method is robust to concave polygons and collinear first points
+    nxt = np.roll(xyzs, -1, axis=0)
+    nrml = np.array([np.sum((xyzs[:, 1] - nxt[:, 1]) * (xyzs[:, 2] + nxt[:, 2])),
+                     np.sum((xyzs[:, 2] - nxt[:, 2]) * (xyzs[:, 0] + nxt[:, 0])),
+                     np.sum((xyzs[:, 0] - nxt[:, 0]) * (xyzs[:, 1] + nxt[:, 1]))])
+    zdir = nrml / np.linalg.norm(nrml)
+    xdir = xyzs[1] - xyzs[0]
+    xdir = xdir - np.dot(xdir, zdir) * zdir
+    xdir = xdir / np.linalg.norm(xdir)
+    ydir = np.cross(zdir, xdir)
+    matrix = np.eye(4)
+    matrix[0:3, 0] = xdir
+    matrix[0:3, 1] = ydir
+    matrix[0:3, 2] = zdir
+    matrix[0:3, 3] = xyzs[0]
+    local_xyzs = (xyzs - xyzs[0]) @ matrix[0:3, 0:3]
+    return matrix, local_xyzs
+
+def create_representation_map(ifcmodel: ifcopenshell.file, representation: ifcopenshell.entity_instance) -> ifcopenshell.entity_instance:
+    '''
+    Create an IfcRepresentationMap of the representation at the origin.
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    representation: ifcopenshell.entity_instance
+        the IfcShapeRepresentation in the local coordinates of the map.
+
+    Returns
+    -------
+    ifcopenshell.entity_instance
+        the IfcRepresentationMap.
+    '''
+    origin = ifcmodel.create_entity('IfcCartesianPoint', (0.0, 0.0, 0.0))
+    axis = ifcmodel.create_entity('IfcDirection', (0.0, 0.0, 1.0))
+    ref_direction = ifcmodel.create_entity('IfcDirection', (1.0, 0.0, 0.0))
+    mapping_origin = ifcmodel.create_entity('IfcAxis2Placement3D', origin, axis, ref_direction)
+    return ifcmodel.create_entity('IfcRepresentationMap', MappingOrigin=mapping_origin, MappedRepresentation=representation)
+
+def create_identity_transform(ifcmodel: ifcopenshell.file) -> ifcopenshell.entity_instance:
+    '''
+    Create an identity IfcCartesianTransformationOperator3D to be shared by the IfcMappedItem.
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    Returns
+    -------
+    ifcopenshell.entity_instance
+        the IfcCartesianTransformationOperator3D.
+    '''
+    origin = ifcmodel.create_entity('IfcCartesianPoint', (0.0, 0.0, 0.0))
+    return ifcmodel.create_entity('IfcCartesianTransformationOperator3D', LocalOrigin=origin)
+
+def create_mapped_representation(ifcmodel: ifcopenshell.file, context: ifcopenshell.entity_instance, rep_map: ifcopenshell.entity_instance,
+                                 transform: ifcopenshell.entity_instance) -> ifcopenshell.entity_instance:
+    '''
+    Create a body representation that instances the representation map, the instance is positioned by the placement of its product.
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    context: ifcopenshell.entity_instance
+        the representation context.
+
+    rep_map: ifcopenshell.entity_instance
+        the IfcRepresentationMap.
+
+    transform: ifcopenshell.entity_instance
+        the identity IfcCartesianTransformationOperator3D from create_identity_transform().
+
+    Returns
+    -------
+    ifcopenshell.entity_instance
+        the IfcShapeRepresentation.
+    '''
+    mapped_item = ifcmodel.create_entity('IfcMappedItem', MappingSource=rep_map, MappingTarget=transform)
+    return ifcmodel.create_entity('IfcShapeRepresentation', context, context.ContextIdentifier, 'MappedRepresentation', [mapped_item])
+
+def assign_style(ifcmodel: ifcopenshell.file, representation: ifcopenshell.entity_instance, style: ifcopenshell.entity_instance):
+    '''
+    Style the items of the representation, same as style.assign_representation_styles on an unstyled representation.
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    representation: ifcopenshell.entity_instance
+        the IfcShapeRepresentation.
+
+    style: ifcopenshell.entity_instance
+        the IfcSurfaceStyle.
+    '''
+    for item in representation.Items:
+        ifcmodel.create_entity('IfcStyledItem', item, [style], style.Name)
+
+def add_opening(ifcmodel: ifcopenshell.file, opening: ifcopenshell.entity_instance, element: ifcopenshell.entity_instance):
+    '''
+    Void the element with the opening and place the opening relative to the element.
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    opening: ifcopenshell.entity_instance
+        the IfcOpeningElement.
+
+    element: ifcopenshell.entity_instance
+        the element to void, it must already have its placement.
+    '''
+    ifcmodel.create_entity('IfcRelVoidsElement', GlobalId=ifcopenshell.guid.new(), RelatingBuildingElement=element,
+                           RelatedOpeningElement=opening)
+    opening.ObjectPlacement.PlacementRelTo = element.ObjectPlacement
+
+def add_filling(ifcmodel: ifcopenshell.file, opening: ifcopenshell.entity_instance, element: ifcopenshell.entity_instance):
+    '''
+    Fill the opening with the element and place the element relative to the opening.
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    opening: ifcopenshell.entity_instance
+        the IfcOpeningElement.
+
+    element: ifcopenshell.entity_instance
+        the filling element, it must already have its placement.
+    '''
+    ifcmodel.create_entity('IfcRelFillsElement', GlobalId=ifcopenshell.guid.new(), RelatingOpeningElement=opening,
+                           RelatedBuildingElement=element)
+    # the openings of osmod2ifcarch are placed at the origin, so the placement of the element stays the same relative to the opening
+    element.ObjectPlacement.PlacementRelTo = opening.ObjectPlacement
+
+def write_type_rels(ifcmodel: ifcopenshell.file, type_objs: dict):
+    '''
+    Write one IfcRelDefinesByType per type and share one IfcMaterialLayerSetUsage of the type's layer set per layer direction.
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    type_objs: dict
+        dictionary with the ifc built element type as key and the list of its occurrences as value.
+    '''
+    for ifc_type, objs in type_objs.items():
+        if not objs:
+            continue
+        ifcmodel.create_entity('IfcRelDefinesByType', GlobalId=ifcopenshell.guid.new(), RelatedObjects=objs, RelatingType=ifc_type)
+        layer_set = ifcopenshell.util.element.get_material(ifc_type)
+        if layer_set is None or not layer_set.is_a('IfcMaterialLayerSet'):
+            continue
+        dir_objs = {}
+        for obj in objs:
+            direction = 'AXIS3' if obj.is_a() in AXIS3_CLASSES else 'AXIS2'
+            if direction not in dir_objs.keys():
+                dir_objs[direction] = []
+            dir_objs[direction].append(obj)
+        for direction, dobjs in dir_objs.items():
+            usage = ifcmodel.create_entity('IfcMaterialLayerSetUsage', ForLayerSet=layer_set, LayerSetDirection=direction,
+                                           DirectionSense='POSITIVE', OffsetFromReferenceLine=0.0)
+            ifcmodel.create_entity('IfcRelAssociatesMaterial', GlobalId=ifcopenshell.guid.new(), RelatedObjects=dobjs, RelatingMaterial=usage)
+
+def write_container_rels(ifcmodel: ifcopenshell.file, container_objs: dict):
+    '''
+    Write one IfcRelContainedInSpatialStructure per spatial structure.
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    container_objs: dict
+        dictionary with the spatial structure, e.g. the IfcBuildingStorey, as key and the list of the elements it contains as value.
+    '''
+    for container, objs in container_objs.items():
+        if objs:
+            ifcmodel.create_entity('IfcRelContainedInSpatialStructure', GlobalId=ifcopenshell.guid.new(), RelatedElements=objs,
+                                   RelatingStructure=container)
+
+def get_unit_scale(ifcmodel: ifcopenshell.file) -> float:
+    '''
+    Get the scale of the length unit of the ifc model to meters.
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    Returns
+    -------
+    float
+        the unit scale.
+    '''
+    return ifcopenshell.util.unit.calculate_unit_scale(ifcmodel)
+
+def get_element_signatures(ifcmodel: ifcopenshell.file, decimals: int = 6) -> dict:
+    '''
+    Describe every element of the model independent of its entity ids and GlobalIds, to compare the outputs of two writers.
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    decimals: int, optional
+        the coordinates are rounded to this number of decimals.
+
+    Returns
+    -------
+    dict
+        - dictionary with (ifc class, name) as key.
+        - each value is a list of the signatures of the elements with that class and name, sorted by their contents so that the order the elements are written in does not matter.
+        - each signature is a dictionary with the keys: geometry, styles, type, material, container, placement_rel_to, placement, openings, fills.
+    '''
+    def placed_name(placement):
+        if placement is None:
+            return None
+        objs = placement.PlacesObject
+        if objs:
+            return objs[0].Name
+        return None
+
+    sigs = {}
+    for ele in ifcmodel.by_type('IfcElement'):
+        geometry = []
+        styles = []
+        if ele.Representation is not None:
+            for rep in ele.Representation.Representations:
+                items = list(rep.Items)
+                for item in rep.Items:
+                    # the geometry and style of a mapped item are in its representation map
+                    if item.is_a('IfcMappedItem'):
+                        items.extend(item.MappingSource.MappedRepresentation.Items)
+                for item in items:
+                    if item.is_a('IfcPolygonalFaceSet'):
+                        coords = np.round(np.array(item.Coordinates.CoordList), decimals=decimals).tolist()
+                        faces = [list(face.CoordIndex) for face in item.Faces]
+                        geometry.append((rep.RepresentationIdentifier, rep.RepresentationType, coords, faces))
+                    else:
+                        geometry.append((rep.RepresentationIdentifier, rep.RepresentationType, item.is_a()))
+                    for styled_item in item.StyledByItem:
+                        for style in styled_item.Styles:
+                            for srf_style in style.Styles:
+                                colour = srf_style.SurfaceColour
+                                styles.append((colour.Red, colour.Green, colour.Blue, srf_style.Transparency))
+        ifc_type = ifcopenshell.util.element.get_type(ele)
+        material = ifcopenshell.util.element.get_material(ele, should_skip_usage=False)
+        if material is not None and material.is_a('IfcMaterialLayerSetUsage'):
+            material = (material.ForLayerSet.LayerSetName, material.LayerSetDirection, material.DirectionSense)
+        elif material is not None:
+            material = (material.is_a(), getattr(material, 'Name', None))
+        container = ifcopenshell.util.element.get_container(ele)
+        placement_rel_to = None
+        placement = None
+        if ele.ObjectPlacement is not None:
+            placement_rel_to = placed_name(ele.ObjectPlacement.PlacementRelTo)
+            placement = np.round(ifcopenshell.util.placement.get_local_placement(ele.ObjectPlacement), decimals=decimals).tolist()
+        openings = []
+        if hasattr(ele, 'HasOpenings'):
+            openings = sorted([rel.RelatedOpeningElement.Name for rel in ele.HasOpenings])
+        fills = None
+        if hasattr(ele, 'FillsVoids') and ele.FillsVoids:
+            fills = ele.FillsVoids[0].RelatingOpeningElement.Name
+        sig = {'geometry': geometry, 'styles': styles, 'type': ifc_type.Name if ifc_type else None,
+               'material': material, 'container': container.Name if container else None,
+               'placement_rel_to': placement_rel_to, 'placement': placement, 'openings': openings, 'fills': fills}
+        # elements can share the same name, e.g. the walls of a copied storey, so each key keeps all of them
+        sigs.setdefault((ele.is_a(), ele.Name), []).append(sig)
+    for key in sigs.keys():
+        sigs[key].sort(key=repr)
+    return sigs
+
+def compare_ifc_elements(ifc_path1: str, ifc_path2: str) -> list[str]:
+    '''
+    Compare the elements of two ifc files with get_element_signatures().
+
+    Parameters
+    ----------
+    ifc_path1: str
+        the file path of the first ifc.
+
+    ifc_path2: str
+        the file path of the second ifc.
+
+    Returns
+    -------
+    list[str]
+        the differences, empty if the elements are the same.
+    '''
+    sigs1 = get_element_signatures(ifcopenshell.open(ifc_path1))
+    sigs2 = get_element_signatures(ifcopenshell.open(ifc_path2))
+    diffs = []
+    for key in sorted(set(sigs1.keys()) ^ set(sigs2.keys()), key=str):
+        diffs.append(f"{key} is only in one of the files")
+    for key in sorted(set(sigs1.keys()) & set(sigs2.keys()), key=str):
+        if len(sigs1[key]) != len(sigs2[key]):
+            diffs.append(f"{key} has {len(sigs1[key])} and {len(sigs2[key])} elements")
+            continue
+        for cnt, (sig1, sig2) in enumerate(zip(sigs1[key], sigs2[key])):
+            for attr, val in sig1.items():
+                if val != sig2[attr]:
+                    diffs.append(f"{key} #{cnt} differs in {attr}")
+    return diffs
@@ -0,0 +1,287 @@
+import ifcopenshell
+import ifcopenshell.util.unit
+import ifcopenshell.util.element
+
+import ifc_utils.ifcopenshell_utils as ifcopenshell_utils
+
+# the value of each roughness when the roughness of the layers are averaged for the massless material
+ROUGHNESS_VALS = {'VeryRough': 6, 'Rough': 5, 'MediumRough': 4, 'MediumSmooth': 3, 'Smooth': 2, 'VerySmooth': 1}
+
+def get_pset_index(ifcmodel: ifcopenshell.file, psets_only: bool = True, materials_only: bool = False) -> dict:
+    '''
+    Index the psets of all the materials, objects and types of the ifc model in one pass over IfcMaterialProperties, IfcRelDefinesByProperties, IfcTypeObject and IfcRelDefinesByType.
+    The psets read from the index are kept in it, so a pset read again, e.g. of a material used in many material layer sets, is not converted again.
+
+    Parameters
+    ----------
+    ifcmodel: ifcopenshell.file
+        the ifc model.
+
+    psets_only: bool, optional
+        if True, the quantity sets of the objects and types are not indexed, same as ifcopenshell.util.element.get_psets(psets_only=True). Default True.
+
+    materials_only: bool, optional
+        if True, only the psets of the materials are indexed, the objects and types are skipped. Default False.
+
+    Returns
+    -------
+    dict
+        - psets: dictionary of the entity id to a dictionary of the pset name to the list of its pset definitions.
+        - types: dictionary of the object id to the id of its type, the psets of the type are inherited by the object.
+        - reads: dictionary of (entity id, pset name) to the pset read with get_indexed_pset().
+    '''
+    pset_index = {'psets': {}, 'types': {}, 'reads': {}}
+    psets = pset_index['psets']
+    if ifcmodel.schema == 'IFC2X3':
+        # only the extended material properties have a name
+        mat_props = ifcmodel.by_type('IfcExtendedMaterialProperties')
+    else:
+        mat_props = ifcmodel.by_type('IfcMaterialProperties')
+    for mat_prop in mat_props:
+        psets.setdefault(mat_prop.Material.id(), {}).setdefault(mat_prop.Name, []).append(mat_prop)
+    if materials_only:
+        return pset_index
+
+    for ifctype in ifcmodel.by_type('IfcTypeObject'):
+        for definition in ifctype.HasPropertySets or []:
+            if psets_only and not is_pset_definition(definition):
+                continue
+            psets.setdefault(ifctype.id(), {}).setdefault(definition.Name, []).append(definition)
+
+    for rel in ifcmodel.by_type('IfcRelDefinesByProperties'):
+        definitions = rel.RelatingPropertyDefinition
+        # IfcPropertySetDefinitionSet is a list of pset definitions
+        if not isinstance(definitions, tuple):
+            definitions = (definitions,)
+        for definition in definitions:
+            if psets_only and not is_pset_definition(definition):
+                continue
+            for obj in rel.RelatedObjects:
+                psets.setdefault(obj.id(), {}).setdefault(definition.Name, []).append(definition)
+
+    for rel in ifcmodel.by_type('IfcRelDefinesByType'):
+        type_id = rel.RelatingType.id()
+        for obj in rel.RelatedObjects:
+            pset_index['types'][obj.id()] = type_id
+    return pset_index
+
+def is_pset_definition(definition: ifcopenshell.entity_instance) -> bool:
+    '''
+    Check if the property definition is a pset and not a quantity set.
+
+    Parameters
+    ----------
+    definition: ifcopenshell.entity_instance
+        the property definition.
+
+    Returns
+    -------
+    bool
+        True if it is an IfcPropertySet or IfcPreDefinedPropertySet.
+    '''
+    return definition.is_a('IfcPropertySet') or definition.is_a('IfcPreDefinedPropertySet')
+
+def get_indexed_psets(pset_index: dict, entity: ifcopenshell.entity_instance) -> dict:
+    '''
+    Get all the psets of the entity from the index, same as ifcopenshell.util.element.get_psets().
+
+    Parameters
+    ----------
+    pset_index: dict
+        the index from get_pset_index().
+
+    entity: ifcopenshell.entity_instance
+        the material, object or type.
+
+    Returns
+    -------
+    dict
+        dictionary of the pset name to the dictionary of its properties, the id key is the id of the pset.
+    '''
+    psets = {}
+    for pset_name in get_indexed_pset_names(pset_index, entity):
+        psets[pset_name] = get_indexed_pset(pset_index, entity, pset_name)
+    return psets
+
+def get_indexed_pset_names(pset_index: dict, entity: ifcopenshell.entity_instance) -> list[str]:
+    '''
+    Get the names of the psets of the entity from the index, including the psets inherited from its type.
+
+    Parameters
+    ----------
+    pset_index: dict
+        the index from get_pset_index().
+
+    entity: ifcopenshell.entity_instance
+        the material, object or type.
+
+    Returns
+    -------
+    list[str]
+        the names of the psets.
+    '''
+    pset_names = {}
+    for entity_id in get_pset_owner_ids(pset_index, entity):
+        pset_names.update(dict.fromkeys(pset_index['psets'].get(entity_id, {}).keys()))
+    return list(pset_names.keys())
+
+def get_pset_owner_ids(pset_index: dict, entity: ifcopenshell.entity_instance) -> list[int]:
+    '''
+    Get the ids of the entities the psets of the entity are defined on, its type first then itself.
+
+    Parameters
+    ----------
+    pset_index: dict
+        the index from get_pset_index().
+
+    entity: ifcopenshell.entity_instance
+        the material, object or type.
+
+    Returns
+    -------
+    list[int]
+        the entity ids.
+    '''
+    entity_id = entity.id()
+    type_id = pset_index['types'].get(entity_id)
+    if type_id is None:
+        return [entity_id]
+    return [type_id, entity_id]
+
+def get_indexed_pset(pset_index: dict, entity: ifcopenshell.entity_instance, pset_name: str) -> dict:
+    '''
+    Get one pset of the entity from the index. The pset of the object overrides the pset of the same name of its type.
+
+    Parameters
+    ----------
+    pset_index: dict
+        the index from get_pset_index().
+
+    entity: ifcopenshell.entity_instance
+        the material, object or type.
+
+    pset_name: str
+        the name of the pset.
+
+    Returns
+    -------
+    dict
+        dictionary of the properties of the pset, the id key is the id of the pset. None if the entity does not have the pset.
+        The dictionary is a copy and can be changed.
+    '''
+    read_key = (entity.id(), pset_name)
+    if read_key in pset_index['reads']:
+        pset = pset_index['reads'][read_key]
+    else:
+        pset = None
+        for entity_id in get_pset_owner_ids(pset_index, entity):
+            definitions = pset_index['psets'].get(entity_id, {}).get(pset_name, [])
+            for definition in definitions:
+                if pset is None:
+                    pset = {}
+                pset.update(ifcopenshell.util.element.get_property_definition(definition))
+        pset_index['reads'][read_key] = pset
+    if pset is None:
+        return None
+    return dict(pset)
+
+def extract_mat_layer_sets_pset(ifcmodel: ifcopenshell.file, pset_name: str, is_calc_massless: bool = False, pset_index: dict = None) -> dict:
+    '''
+    Extract material layer set with the specified pset from the ifcmodel, same as ifc_utils.ifcopenshell_utils.extract_mat_layer_sets_pset() with the psets read from the index.
+    A material without the pset only has its name and thickness and the massless material is not calculated for its layer set.
+
+    Parameters
+    ----------
+    ifcmodel : ifcopenshell.file
+        ifc model.
+
+    pset_name : str
+        The name of the pset to retrieve.
+
+    is_calc_massless : bool, optional
+        Default = False. If set True dictionary will of each material layer set will have 'massless' key.
+
+    pset_index : dict, optional
+        the index from get_pset_index(). Default None, the index of the materials is built.
+
+    Returns
+    -------
+    dict
+        - a dictionary on the first level the material layer set 'id' as key to another dict with the following keys
+        - material_layers: list[dict] of the pset.
+        - material_layers_csv: str converted from the dictionaries written in csv form
+        - if is_calc_massless is True
+        - massless: dictionary of the massless material keys 'Roughness', 'ThermalAbsorptance', 'SolarAbsorptance', 'VisibleAbsorptance', 'ThermalResistance'
+        - massless_csv: csv str of the dictionary from massless
+    '''
+    if pset_index is None:
+        pset_index = get_pset_index(ifcmodel, materials_only=True)
+    length_scale = ifcopenshell.util.unit.calculate_unit_scale(ifcmodel, unit_type='LENGTHUNIT')
+    mat_layer_sets = ifcmodel.by_type('IfcMaterialLayerSet')
+    mls_psets = {}
+    for mls in mat_layer_sets:
+        mls_name = mls.LayerSetName
+        mls_id = mls.id()
+        mat_ls = []
+        roughs = []
+        tabsorps = []
+        sabsorps = []
+        vabsorps = []
+        resistances = []
+        csv_header_str = ''
+        csv_content_str = ''
+        for mat_layer in mls.MaterialLayers:
+            mat = mat_layer.Material
+            thickness = mat_layer.LayerThickness*length_scale
+            chosen_pset = get_indexed_pset(pset_index, mat, pset_name)
+            if chosen_pset is None:
+                chosen_pset = {}
+            chosen_pset['Thickness'] = thickness
+            chosen_pset['Name'] = mat.Name
+            chosen_pset = {'Name': chosen_pset.pop('Name'), 'Thickness': chosen_pset.pop('Thickness'), **chosen_pset}
+            if is_calc_massless:
+                conductivity = chosen_pset.get('Conductivity')
+                if conductivity is not None:
+                    resistance = thickness/conductivity
+                    chosen_pset['ThermalResistance'] = resistance
+                rough = chosen_pset.get('Roughness')
+                roughs.append(ROUGHNESS_VALS.get(rough, rough))
+                tabsorps.append(chosen_pset.get('ThermalAbsorptance'))
+                sabsorps.append(chosen_pset.get('SolarAbsorptance'))
+                vabsorps.append(chosen_pset.get('VisibleAbsorptance'))
+                resistances.append(chosen_pset.get('ThermalResistance'))
+
+            mat_ls.append(chosen_pset)
+            csv_header_str, csv_content_str = ifcopenshell_utils.convert_pset2csv_str(csv_header_str, csv_content_str, chosen_pset)
+
+        mls_str = f"{mls_name}\n{csv_header_str}{csv_content_str}"
+        mls_psets[mls_id] = {'name': mls_name, 'material_layers': mat_ls, 'material_layers_csv': mls_str}
+
+        if is_calc_massless:
+            # average out all the layers and calc the total resistance
+            if None not in roughs + tabsorps + sabsorps + vabsorps + resistances:
+                avg_rough = int(sum(roughs)/len(roughs))
+                if avg_rough >= 6:
+                    avg_rough = 'VeryRough'
+                elif avg_rough == 5:
+                    avg_rough = 'Rough'
+                elif avg_rough == 4:
+                    avg_rough = 'MediumRough'
+                elif avg_rough == 3:
+                    avg_rough = 'MediumSmooth'
+                elif avg_rough == 2:
+                    avg_rough = 'Smooth'
+                elif avg_rough <= 1:
+                    avg_rough = 'VerySmooth'
+
+                avg_tabsorp = sum(tabsorps)/len(tabsorps)
+                avg_sabsorp = sum(sabsorps)/len(sabsorps)
+                avg_vabsorp = sum(vabsorps)/len(vabsorps)
+                ttl_r = sum(resistances)
+                mls_psets[mls_id]['massless'] = {'Roughness': avg_rough, 'ThermalAbsorptance': avg_tabsorp, 'SolarAbsorptance':avg_sabsorp,
+                                                 'VisibleAbsorptance': avg_vabsorp, 'ThermalResistance': ttl_r}
+
+                massless_csv_str="Massless\nRoughness,ThermalAbsorptance,SolarAbsorptance,VisibleAbsorptance,ThermalResistance\n"
+                massless_csv_str+=f"{avg_rough},{avg_tabsorp},{avg_sabsorp},{avg_vabsorp},{ttl_r}\n"
+                mls_psets[mls_id]['massless_csv'] = massless_csv_str
+    return mls_psets
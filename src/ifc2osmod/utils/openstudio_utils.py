@@ -2,21 +2,40 @@ import math
 import json
 import copy
 from pathlib import Path
-import subprocess
+import shutil
 import xml.etree.ElementTree as ET
 from pathlib import Path
 from shutil import copytree
 
+import numpy as np
 import geomie3d
 import openstudio
 from openstudio import model as osmod
 
 import ifc_utils.ifcopenshell_utils as ifcopenshell_utils
 from .. import settings
+from . import epsql_utils
+from . import eplog_utils
 
 from ladybug.epw import EPW
 
 PSET_DATA_DIR = settings.PSET_DATA_DIR
+# simulation fidelity profiles, from the fastest and least accurate (draft) to the slowest and most accurate (final)
+SIM_PROFILES = {'draft': {'timesteps_per_hour': 2, 'shading_calc_method': 'PolygonClipping', 'shading_update_freq': 60,
+                          'solar_distribution': 'MinimalShadowing', 'loads_convergence': 0.1, 'temperature_convergence': 0.5,
+                          'max_warmup_days': 10, 'min_warmup_days': 1, 'max_hvac_iterations': 10, 'min_system_timestep': 30,
+                          'output_frequency': 'Daily'},
+                'standard': {'timesteps_per_hour': 4, 'shading_calc_method': 'PolygonClipping', 'shading_update_freq': 20,
+                             'solar_distribution': 'FullExterior', 'loads_convergence': 0.04, 'temperature_convergence': 0.4,
+                             'max_warmup_days': 25, 'min_warmup_days': 1, 'max_hvac_iterations': 20, 'min_system_timestep': 5,
+                             'output_frequency': None},
+                'final': {'timesteps_per_hour': 6, 'shading_calc_method': 'PolygonClipping', 'shading_update_freq': 7,
+                          'solar_distribution': 'FullInteriorAndExterior', 'loads_convergence': 0.04, 'temperature_convergence': 0.2,
+                          'max_warmup_days': 25, 'min_warmup_days': 6, 'max_hvac_iterations': 30, 'min_system_timestep': 1,
+                          'output_frequency': None}}
+# the reporting frequencies of the output variables from the finest to the coarsest, the output_frequency of a profile is the finest frequency it allows,
+# output variables finer than it are coarsened and None leaves the frequencies of the model as they are
+REPORTING_FREQUENCIES = ['detailed', 'timestep', 'hourly', 'daily', 'monthly', 'runperiod', 'annual']
 
 def add_design_days_and_weather_file(openstudio_model: osmod, epw_path: str, ddy_path: str):
     """
@@ -185,6 +204,35 @@ def save_osw_project(proj_dir: str, openstudio_model: osmod, measure_list: list[
 
     return wrkflw_path
 
+def save_idf_project(proj_dir: str, openstudio_model: osmod, proj_name: str) -> str:
+    '''
+    Save the model and its translated idf in the same layout as save_osw_project(), the idf is in the run directory of the workflow.
+
+    Parameters
+    ----------
+    proj_dir : str
+        The output directory path for all the results.
+
+    openstudio_model : osmod
+        openstudio model object.
+
+    proj_name : str
+        the name of the project.
+
+    Returns
+    -------
+    str
+        the path of the idf file.
+    '''
+    proj_path = Path(proj_dir)
+    run_dir = proj_path.joinpath(proj_name + '_wrkflw', 'run')
+    run_dir.mkdir(parents=True, exist_ok=True)
+    osm_path = proj_path.joinpath(proj_name + '.osm')
+    openstudio_model.save(str(osm_path), True)
+    idf_path = str(run_dir.joinpath('in.idf'))
+    save2idf(idf_path, openstudio_model)
+    return idf_path
+
 def save2idf(idf_path: str, openstudio_model: osmod):
     ft = openstudio.energyplus.ForwardTranslator()
     idf = ft.translateModel(openstudio_model)
@@ -231,10 +279,265 @@ def setup_elec_equip_schedule(openstudio_model: osmod, ruleset: osmod.ScheduleRu
     elec_equip.setSchedule(ruleset)
     return elec_equip
 
-def execute_workflow(wrkflow_path:str):
+def execute_workflow(wrkflow_path:str) -> str:
+    '''
+    Execute the openstudio workflow and write the run_metrics.json of the run.
+
+    Parameters
+    ----------
+    wrkflow_path : str
+        path to the osw file.
+
+    Returns
+    -------
+    str
+        the path of the run_metrics.json. RuntimeError is raised if the workflow exits with a nonzero return code or EnergyPlus does not write the eplusout.sql file.
+    '''
     print('executing workflow ...')
-    result = subprocess.run(['openstudio', 'run', '-w', wrkflow_path], capture_output=True, text=True)
-    print(result.stdout)
+    # --show-stdout streams the energyplus output so that its phases can be timed
+    timed_lines, wall_time, returncode = eplog_utils.run_timed(['openstudio', 'run', '--show-stdout', '-w', wrkflow_path])
+    print('\n'.join([line for _, line in timed_lines]))
+    run_dir = str(Path(wrkflow_path).parent.joinpath('run'))
+    metrics_path = eplog_utils.write_run_metrics(run_dir, timed_lines, wall_time)
+    sql_path = Path(run_dir).joinpath('eplusout.sql')
+    if returncode != 0:
+        raise RuntimeError(f"openstudio run failed with return code {returncode}, refer to {Path(run_dir).joinpath('run.log')}")
+    if not sql_path.is_file():
+        raise RuntimeError(f"the workflow did not write {sql_path}, refer to {Path(run_dir).joinpath('run.log')}")
+    return metrics_path
+
+def apply_sim_profile(openstudio_model: osmod, profile_name: str):
+    '''
+    Apply the speed related simulation settings of a fidelity profile to the model.
+
+    Parameters
+    ----------
+    openstudio_model : osmod
+        openstudio model object.
+
+    profile_name : str
+        draft, standard or final. The settings of each profile are in SIM_PROFILES.
+    '''
+    if profile_name not in SIM_PROFILES.keys():
+        raise ValueError(f"profile must be one of {list(SIM_PROFILES.keys())}, not {profile_name}")
+    profile = SIM_PROFILES[profile_name]
+    
+    timestep = openstudio_model.getTimestep()
+    timestep.setNumberOfTimestepsPerHour(profile['timesteps_per_hour'])
+
+    shadow_calc = openstudio_model.getShadowCalculation()
+    shadow_calc.setShadingCalculationMethod(profile['shading_calc_method'])
+    shadow_calc.setShadingCalculationUpdateFrequencyMethod('Periodic')
+    shadow_calc.setShadingCalculationUpdateFrequency(profile['shading_update_freq'])
+
+    sim_control = openstudio_model.getSimulationControl()
+    sim_control.setSolarDistribution(profile['solar_distribution'])
+    sim_control.setLoadsConvergenceToleranceValue(profile['loads_convergence'])
+    sim_control.setTemperatureConvergenceToleranceValue(profile['temperature_convergence'])
+    sim_control.setMaximumNumberofWarmupDays(profile['max_warmup_days'])
+    sim_control.setMinimumNumberofWarmupDays(profile['min_warmup_days'])
+
+    conv_limits = openstudio_model.getConvergenceLimits()
+    conv_limits.setMaximumHVACIterations(profile['max_hvac_iterations'])
+    conv_limits.setMinimumSystemTimestep(profile['min_system_timestep'])
+
+    output_freq = profile['output_frequency']
+    if output_freq is not None:
+        output_vars = openstudio_model.getOutputVariables()
+        for output_var in output_vars:
+            var_freq = output_var.reportingFrequency().lower()
+            if var_freq in REPORTING_FREQUENCIES and REPORTING_FREQUENCIES.index(var_freq) < REPORTING_FREQUENCIES.index(output_freq.lower()):
+                output_var.setReportingFrequency(output_freq)
+
+def add_facility_meters(openstudio_model: osmod, reporting_frequency: str = 'RunPeriod') -> list[osmod.OutputMeter]:
+    '''
+    Add the facility fuel meters to the model so that they are written to the sql file.
+
+    Parameters
+    ----------
+    openstudio_model : osmod
+        openstudio model object.
+
+    reporting_frequency : str, optional
+        Detailed, Timestep, Hourly, Daily, Monthly, RunPeriod or Annual. Default RunPeriod.
+
+    Returns
+    -------
+    list[osmod.OutputMeter]
+        the output meters added to the model.
+    '''
+    meters = []
+    for meter_name in epsql_utils.FACILITY_METERS.keys():
+        meter = osmod.OutputMeter(openstudio_model)
+        meter.setName(meter_name)
+        meter.setReportingFrequency(reporting_frequency)
+        meter.setMeterFileOnly(False)
+        meters.append(meter)
+    return meters
+
+def get_representative_weeks(epw_path: str, period_type: str = 'month') -> list[dict]:
+    '''
+    Choose the typical week of each month or season from the weather file. The typical week is the week with the mean dry bulb temperature closest to the mean of the period.
+
+    Parameters
+    ----------
+    epw_path : str
+        path to epw file.
+
+    period_type : str, optional
+        month or season. Default month. Season chooses the week from the middle month of the season (Jan, Apr, Jul, Oct).
+
+    Returns
+    -------
+    list[dict]
+        - list of dictionaries with the following keys
+        - name: name of the week, used as the name of the run period
+        - begin_month: the month the week starts
+        - begin_day: the day the week starts
+        - end_month: the month the week ends
+        - end_day: the day the week ends
+        - months: the months represented by the week
+    '''
+    ndays_mth = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+    if period_type == 'month':
+        periods = [[mth] for mth in range(1, 13)]
+        pick_mths = list(range(1, 13))
+    elif period_type == 'season':
+        periods = [[12, 1, 2], [3, 4, 5], [6, 7, 8], [9, 10, 11]]
+        pick_mths = [1, 4, 7, 10]
+    else:
+        raise ValueError(f"period_type must be month or season, not {period_type}")
+
+    lb_epw = EPW(epw_path)
+    db_temps = lb_epw.dry_bulb_temperature.values
+    # hour of the year each month starts
+    mth_st_hrs = [0]
+    for ndays in ndays_mth[:-1]:
+        mth_st_hrs.append(mth_st_hrs[-1] + ndays*24)
+
+    rep_weeks = []
+    for cnt, period in enumerate(periods):
+        period_temps = []
+        for mth in period:
+            st_hr = mth_st_hrs[mth-1]
+            period_temps.extend(db_temps[st_hr: st_hr + ndays_mth[mth-1]*24])
+        period_mean = sum(period_temps)/len(period_temps)
+
+        pick_mth = pick_mths[cnt]
+        mth_st_hr = mth_st_hrs[pick_mth-1]
+        chosen_day = 1
+        min_diff = None
+        for day in range(1, ndays_mth[pick_mth-1] - 5):
+            st_hr = mth_st_hr + (day-1)*24
+            week_temps = db_temps[st_hr: st_hr + 168]
+            diff = abs(sum(week_temps)/len(week_temps) - period_mean)
+            if min_diff is None or diff < min_diff:
+                min_diff = diff
+                chosen_day = day
+
+        rep_week = {'name': f"week_{period_type}_{cnt+1}", 'begin_month': pick_mth, 'begin_day': chosen_day,
+                    'end_month': pick_mth, 'end_day': chosen_day + 6, 'months': period}
+        rep_weeks.append(rep_week)
+    return rep_weeks
+
+def save_fast_idf_project(proj_dir: str, openstudio_model: osmod, rep_weeks: list[dict], proj_name: str) -> str:
+    '''
+    Translate the model to an idf that only simulates the representative weeks, one RunPeriod for each week.
+
+    Parameters
+    ----------
+    proj_dir : str
+        The output directory path for all the results.
+
+    openstudio_model : osmod
+        openstudio model object.
+
+    rep_weeks : list[dict]
+        the representative weeks from get_representative_weeks().
+
+    proj_name : str
+        the name of the project.
+
+    Returns
+    -------
+    str
+        the path of the idf file.
+    '''
+    run_dir = Path(proj_dir).joinpath(proj_name + '_fast', 'run')
+    run_dir.mkdir(parents=True, exist_ok=True)
+    ft = openstudio.energyplus.ForwardTranslator()
+    ws = ft.translateModel(openstudio_model)
+    run_prd_type = openstudio.IddObjectType('RunPeriod')
+    run_prds = ws.getObjectsByType(run_prd_type)
+    run_prd_template = run_prds[0].idfObject()
+    ws.removeObjects([run_prd.handle() for run_prd in run_prds])
+    week_prds = []
+    for rep_week in rep_weeks:
+        week_prd = run_prd_template.clone()
+        week_prd.setName(rep_week['name'])
+        week_prd.setInt(1, rep_week['begin_month'])
+        week_prd.setInt(2, rep_week['begin_day'])
+        week_prd.setInt(4, rep_week['end_month'])
+        week_prd.setInt(5, rep_week['end_day'])
+        # let EP+ work out the start day from the year
+        week_prd.setString(7, '')
+        week_prds.append(week_prd)
+    ws.addObjects(week_prds)
+
+    idf_path = str(run_dir.joinpath('in.idf'))
+    ws.save(idf_path, True)
+    return idf_path
+
+def get_energyplus_exe() -> str:
+    '''
+    Get the path of the EnergyPlus executable, either the one shipped with OpenStudio or the one on the PATH.
+
+    Returns
+    -------
+    str
+        the path of the EnergyPlus executable.
+    '''
+    eplus_exe = str(openstudio.getEnergyPlusExecutable())
+    if not Path(eplus_exe).is_file():
+        eplus_exe = shutil.which('energyplus')
+        if eplus_exe is None:
+            raise RuntimeError('EnergyPlus executable not found, install OpenStudio or put energyplus on the PATH')
+    return eplus_exe
+
+def execute_energyplus(idf_path: str, epw_path: str, run_dir: str, phase_times: dict = None) -> str:
+    '''
+    Execute EnergyPlus directly on the idf and write the run_metrics.json of the run.
+
+    Parameters
+    ----------
+    idf_path : str
+        path to the idf file.
+
+    epw_path : str
+        path to epw file.
+
+    run_dir : str
+        the directory EnergyPlus writes its results to.
+
+    phase_times : dict, optional
+        the wall time in seconds of the phases done before the run, e.g. {'translation': 1.2}, recorded in the run_metrics.json.
+
+    Returns
+    -------
+    str
+        the path of the eplusout.sql file. RuntimeError is raised if EnergyPlus exits with a nonzero return code or does not write the eplusout.sql file.
+    '''
+    print('executing energyplus ...')
+    eplus_exe = get_energyplus_exe()
+    timed_lines, wall_time, returncode = eplog_utils.run_timed([eplus_exe, '-w', epw_path, '-d', run_dir, idf_path])
+    print('\n'.join([line for _, line in timed_lines]))
+    eplog_utils.write_run_metrics(run_dir, timed_lines, wall_time, phase_times=phase_times)
+    sql_path = str(Path(run_dir).joinpath('eplusout.sql'))
+    if returncode != 0:
+        raise RuntimeError(f"EnergyPlus failed with return code {returncode}, refer to {Path(run_dir).joinpath('eplusout.err')}")
+    if not Path(sql_path).is_file():
+        raise RuntimeError(f"EnergyPlus did not write {sql_path}, refer to {Path(run_dir).joinpath('eplusout.err')}")
+    return sql_path
 
 def get_osmod_planar_srf_info(osmod_srf: osmod.PlanarSurface):
     '''
@@ -355,36 +658,56 @@ def get_osmod_material_info(osmodel: osmod) -> list[dict]:
         handle = str(material.handle())
         name = material.nameString()
         thickness = material.thickness()
-        if not material.to_StandardOpaqueMaterial().empty():
-            to_mat = material.to_StandardOpaqueMaterial().get()
-            mat_pset['Roughness']['value'] = str(to_mat.roughness())
-            mat_pset['Conductivity']['value'] = to_mat.conductivity()
-            mat_pset['Density']['value'] = to_mat.density()
-            mat_pset['SpecificHeat']['value'] = to_mat.specificHeat()
-            mat_pset['ThermalAbsorptance']['value'] = to_mat.thermalAbsorptance()
-            mat_pset['SolarAbsorptance']['value'] = to_mat.solarAbsorptance()
-            mat_pset['VisibleAbsorptance']['value'] = to_mat.visibleAbsorptance()
-        elif not material.to_MasslessOpaqueMaterial().empty():
-            to_mat = material.to_MasslessOpaqueMaterial().get()
-            mat_pset['Roughness']['value'] = str(to_mat.roughness())
-            mat_pset['ThermalResistance']['value'] = to_mat.thermalResistance()
-            if not to_mat.thermalAbsorptance().empty():
-                mat_pset['ThermalAbsorptance']['value'] = to_mat.thermalAbsorptance().get()
-            if not to_mat.solarAbsorptance().empty():
-                mat_pset['SolarAbsorptance']['value'] = to_mat.solarAbsorptance().get()
-            if not to_mat.visibleAbsorptance().empty():
-                mat_pset['VisibleAbsorptance']['value'] = to_mat.visibleAbsorptance().get()
-        elif not material.to_SimpleGlazing().empty():
-            to_mat = material.to_SimpleGlazing().get()
-            mat_pset['UFactor']['value'] = to_mat.uFactor()
-            mat_pset['SolarHeatGainCoefficient']['value'] = to_mat.solarHeatGainCoefficient()
-            if not to_mat.visibleTransmittance().empty(): 
-                mat_pset['VisibleTransmittance']['value'] = to_mat.visibleTransmittance().get()
-        #TODO: include all material types from osmod
+        mat_vals = get_osmod_material_vals(material)
+        for prop_name, prop_val in mat_vals.items():
+            mat_pset[prop_name]['value'] = prop_val
         mat_dict = {'name': name, 'thickness': thickness, 'pset': mat_pset}
         mat_dicts[handle] = mat_dict
     return mat_dicts
 
+def get_osmod_material_vals(material: osmod.Material) -> dict:
+    '''
+    Extract the pset values of the material.
+
+    Parameters
+    ----------
+    material : osmod.Material
+        The openstudio material to extract the values from.
+
+    Returns
+    -------
+    dict
+        dictionary of the values that are set, with the property name of ../data/json/osmod_material_schema.json as key.
+    '''
+    mat_vals = {}
+    if not material.to_StandardOpaqueMaterial().empty():
+        to_mat = material.to_StandardOpaqueMaterial().get()
+        mat_vals['Roughness'] = str(to_mat.roughness())
+        mat_vals['Conductivity'] = to_mat.conductivity()
+        mat_vals['Density'] = to_mat.density()
+        mat_vals['SpecificHeat'] = to_mat.specificHeat()
+        mat_vals['ThermalAbsorptance'] = to_mat.thermalAbsorptance()
+        mat_vals['SolarAbsorptance'] = to_mat.solarAbsorptance()
+        mat_vals['VisibleAbsorptance'] = to_mat.visibleAbsorptance()
+    elif not material.to_MasslessOpaqueMaterial().empty():
+        to_mat = material.to_MasslessOpaqueMaterial().get()
+        mat_vals['Roughness'] = str(to_mat.roughness())
+        mat_vals['ThermalResistance'] = to_mat.thermalResistance()
+        if not to_mat.thermalAbsorptance().empty():
+            mat_vals['ThermalAbsorptance'] = to_mat.thermalAbsorptance().get()
+        if not to_mat.solarAbsorptance().empty():
+            mat_vals['SolarAbsorptance'] = to_mat.solarAbsorptance().get()
+        if not to_mat.visibleAbsorptance().empty():
+            mat_vals['VisibleAbsorptance'] = to_mat.visibleAbsorptance().get()
+    elif not material.to_SimpleGlazing().empty():
+        to_mat = material.to_SimpleGlazing().get()
+        mat_vals['UFactor'] = to_mat.uFactor()
+        mat_vals['SolarHeatGainCoefficient'] = to_mat.solarHeatGainCoefficient()
+        if not to_mat.visibleTransmittance().empty(): 
+            mat_vals['VisibleTransmittance'] = to_mat.visibleTransmittance().get()
+    #TODO: include all material types from osmod
+    return mat_vals
+
 def get_osmod_construction_info(osmodel: osmod) -> dict:
     '''
     Extract construction information from the openstudio model.
@@ -448,22 +771,46 @@ def get_osmod_space_based_info(osmod_spaces: list[osmod.Space] | list[osmod.Spac
         pset = copy.deepcopy(pset_template)
         name = space.nameString()
         handle = str(space.handle())
-        spec_out_air = space.designSpecificationOutdoorAir()
-        if not spec_out_air.empty():
-            spec_out_air = spec_out_air.get()
-            pset['OutdoorAirFlowperPerson']['value'] = spec_out_air.outdoorAirFlowperPerson()
-            pset['OutdoorAirFlowperFloorArea']['value'] = spec_out_air.outdoorAirFlowperFloorArea()
-
-        if not math.isinf(space.floorAreaPerPerson()): pset['FloorAreaPerPerson']['value'] = space.floorAreaPerPerson()
-        if not math.isinf(space.lightingPowerPerFloorArea()): pset['LightingPowerPerFloorArea']['value'] = space.lightingPowerPerFloorArea()
-        if not math.isinf(space.electricEquipmentPowerPerFloorArea()): 
-            pset['ElectricEquipmentPowerPerFloorArea']['value'] = space.electricEquipmentPowerPerFloorArea()
+        space_vals = get_osmod_space_based_vals(space)
+        for prop_name, prop_val in space_vals.items():
+            pset[prop_name]['value'] = prop_val
             
         space_dict = {'name': name, 'pset': pset}
         space_dicts[handle] = space_dict
     
     return space_dicts
 
+def get_osmod_space_based_vals(space: osmod.Space | osmod.SpaceType) -> dict:
+    '''
+    Extract the pset values of the space or spacetype.
+
+    Parameters
+    ----------
+    space : osmod.Space | osmod.SpaceType
+        The space or spacetype object to extract the values from.
+
+    Returns
+    -------
+    dict
+        dictionary of the values that are set, with the property name of ../data/json/osmod_space_schema.json as key.
+    '''
+    space_vals = {}
+    spec_out_air = space.designSpecificationOutdoorAir()
+    if not spec_out_air.empty():
+        spec_out_air = spec_out_air.get()
+        space_vals['OutdoorAirFlowperPerson'] = spec_out_air.outdoorAirFlowperPerson()
+        space_vals['OutdoorAirFlowperFloorArea'] = spec_out_air.outdoorAirFlowperFloorArea()
+
+    # each of these walks the loads of the space, call them once
+    floor_area_per_person = space.floorAreaPerPerson()
+    if not math.isinf(floor_area_per_person): space_vals['FloorAreaPerPerson'] = floor_area_per_person
+    lighting_power = space.lightingPowerPerFloorArea()
+    if not math.isinf(lighting_power): space_vals['LightingPowerPerFloorArea'] = lighting_power
+    equip_power = space.electricEquipmentPowerPerFloorArea()
+    if not math.isinf(equip_power): 
+        space_vals['ElectricEquipmentPowerPerFloorArea'] = equip_power
+    return space_vals
+
 def get_osmod_space_info(osmodel: osmod) -> dict:
     '''
     Extract space information from the openstudio model.
@@ -603,6 +950,241 @@ def get_osmod_story_info(osmodel: osmod) -> dict:
 
     return story_dicts
 
+def get_osmod_snapshot(osmodel: osmod, geometry: bool = True) -> dict:
+    '''
+    Walk the openstudio model once and extract it into columnar arrays. The objects of each kind are rows, the other objects are referred to by their row index (-1 if none).
+
+    Parameters
+    ----------
+    osmodel : osmod
+        The openstudio model to extract.
+
+    geometry : bool, optional
+        if False, the spaces, surfaces and sub surfaces are not extracted. Default True.
+
+    Returns
+    -------
+    dict
+        - stories, tzones: dictionary with the keys handles, names.
+        - spacetypes: dictionary with the keys handles, names, pset.
+        - materials: dictionary with the keys handles, names, thickness, pset.
+        - constructions: dictionary with the keys handles, names, layered, layer_offsets, layer_materials. The material indices of construction i are layer_materials[layer_offsets[i]:layer_offsets[i+1]].
+        - spaces: dictionary with the keys handles, names, tzone, spacetype, story, pset.
+        - surfaces: dictionary with the keys handles, names, type, space, construction, vert_offsets.
+        - sub_surfaces: dictionary with the keys handles, names, type, space, host, construction, vert_offsets. host is the index of the surface.
+        - vertices: np.ndarray[shape(number of vertices, 3)] the vertices of all the surfaces and sub surfaces. The vertices of surface i are vertices[vert_offsets[i]:vert_offsets[i+1]].
+        - each pset is a table with the property name as key and the list of values of the rows as value.
+    '''
+    def create_pset_table(pset_name: str, nrows: int) -> dict:
+        pset_path = PSET_DATA_DIR.joinpath(pset_name)
+        pset_template = ifcopenshell_utils.get_default_pset(pset_path, template_only=True)
+        return {prop_name: [prop['value']]*nrows for prop_name, prop in pset_template.items()}
+
+    def get_index(opt_obj, indices: dict) -> int:
+        if opt_obj.empty():
+            return -1
+        return indices.get(str(opt_obj.get().handle()), -1)
+
+    snapshot = {}
+    story_indices = {}
+    stories = {'handles': [], 'names': []}
+    for cnt, story in enumerate(osmod.getBuildingStorys(osmodel)):
+        handle = str(story.handle())
+        story_indices[handle] = cnt
+        stories['handles'].append(handle)
+        stories['names'].append(story.nameString())
+    snapshot['stories'] = stories
+
+    tzone_indices = {}
+    tzones = {'handles': [], 'names': []}
+    for cnt, tzone in enumerate(osmod.getThermalZones(osmodel)):
+        handle = str(tzone.handle())
+        tzone_indices[handle] = cnt
+        tzones['handles'].append(handle)
+        tzones['names'].append(tzone.nameString())
+    snapshot['tzones'] = tzones
+
+    osmod_spacetypes = osmod.getSpaceTypes(osmodel)
+    spacetype_indices = {}
+    spacetypes = {'handles': [], 'names': [], 'pset': create_pset_table('osmod_spacetype_schema.json', len(osmod_spacetypes))}
+    for cnt, spacetype in enumerate(osmod_spacetypes):
+        handle = str(spacetype.handle())
+        spacetype_indices[handle] = cnt
+        spacetypes['handles'].append(handle)
+        spacetypes['names'].append(spacetype.nameString())
+        for prop_name, prop_val in get_osmod_space_based_vals(spacetype).items():
+            spacetypes['pset'][prop_name][cnt] = prop_val
+    snapshot['spacetypes'] = spacetypes
+
+    osmod_mats = osmod.getMaterials(osmodel)
+    mat_indices = {}
+    mats = {'handles': [], 'names': [], 'thickness': np.zeros(len(osmod_mats)), 'pset': create_pset_table('osmod_material_schema.json', len(osmod_mats))}
+    for cnt, material in enumerate(osmod_mats):
+        handle = str(material.handle())
+        mat_indices[handle] = cnt
+        mats['handles'].append(handle)
+        mats['names'].append(material.nameString())
+        mats['thickness'][cnt] = material.thickness()
+        for prop_name, prop_val in get_osmod_material_vals(material).items():
+            mats['pset'][prop_name][cnt] = prop_val
+    snapshot['materials'] = mats
+
+    const_indices = {}
+    consts = {'handles': [], 'names': [], 'layered': [], 'layer_offsets': [0], 'layer_materials': []}
+    for cnt, const_base in enumerate(osmod.getConstructionBases(osmodel)):
+        handle = str(const_base.handle())
+        const_indices[handle] = cnt
+        consts['handles'].append(handle)
+        consts['names'].append(const_base.nameString())
+        lay_const = const_base.to_LayeredConstruction()
+        consts['layered'].append(not lay_const.empty())
+        if not lay_const.empty():
+            for mat in lay_const.get().layers():
+                consts['layer_materials'].append(mat_indices.get(str(mat.handle()), -1))
+        consts['layer_offsets'].append(len(consts['layer_materials']))
+    consts['layered'] = np.array(consts['layered'], dtype=bool)
+    consts['layer_offsets'] = np.array(consts['layer_offsets'], dtype=int)
+    consts['layer_materials'] = np.array(consts['layer_materials'], dtype=int)
+    snapshot['constructions'] = consts
+
+    if not geometry:
+        return snapshot
+
+    osmod_spaces = osmod.getSpaces(osmodel)
+    spaces = {'handles': [], 'names': [], 'tzone': [], 'spacetype': [], 'story': [], 'pset': create_pset_table('osmod_space_schema.json', len(osmod_spaces))}
+    srfs = {'handles': [], 'names': [], 'type': [], 'space': [], 'construction': [], 'vert_offsets': [0]}
+    sub_srfs = {'handles': [], 'names': [], 'type': [], 'space': [], 'host': [], 'construction': [], 'vert_offsets': [0]}
+    # the surface vertices and the sub surface vertices, they are put into one array at the end
+    srf_xyzs = []
+    sub_srf_xyzs = []
+    for space_cnt, space in enumerate(osmod_spaces):
+        spaces['handles'].append(str(space.handle()))
+        spaces['names'].append(space.nameString())
+        spaces['tzone'].append(get_index(space.thermalZone(), tzone_indices))
+        spaces['spacetype'].append(get_index(space.spaceType(), spacetype_indices))
+        spaces['story'].append(get_index(space.buildingStory(), story_indices))
+        for prop_name, prop_val in get_osmod_space_based_vals(space).items():
+            spaces['pset'][prop_name][space_cnt] = prop_val
+
+        for srf in space.surfaces():
+            srf_cnt = len(srfs['handles'])
+            srfs['handles'].append(str(srf.handle()))
+            srfs['names'].append(srf.nameString())
+            srfs['type'].append(srf.surfaceType())
+            srfs['space'].append(space_cnt)
+            srfs['construction'].append(get_index(srf.construction(), const_indices))
+            for vert in srf.vertices():
+                srf_xyzs.append([vert.x(), vert.y(), vert.z()])
+            srfs['vert_offsets'].append(len(srf_xyzs))
+            for subsrf in srf.subSurfaces():
+                sub_srfs['handles'].append(str(subsrf.handle()))
+                sub_srfs['names'].append(subsrf.nameString())
+                sub_srfs['type'].append(subsrf.subSurfaceType())
+                sub_srfs['space'].append(space_cnt)
+                sub_srfs['host'].append(srf_cnt)
+                sub_srfs['construction'].append(get_index(subsrf.construction(), const_indices))
+                for vert in subsrf.vertices():
+                    sub_srf_xyzs.append([vert.x(), vert.y(), vert.z()])
+                sub_srfs['vert_offsets'].append(len(sub_srf_xyzs))
+
+    for key in ['tzone', 'spacetype', 'story']:
+        spaces[key] = np.array(spaces[key], dtype=int)
+    for srf_table in [srfs, sub_srfs]:
+        srf_table['type'] = np.array(srf_table['type'], dtype=str)
+        for key in ['space', 'construction', 'vert_offsets']:
+            srf_table[key] = np.array(srf_table[key], dtype=int)
+    sub_srfs['host'] = np.array(sub_srfs['host'], dtype=int)
+    # the sub surface vertices are after the surface vertices
+    sub_srfs['vert_offsets'] += len(srf_xyzs)
+    snapshot['vertices'] = np.array(srf_xyzs + sub_srf_xyzs, dtype=float).reshape(-1, 3)
+    snapshot['spaces'] = spaces
+    snapshot['surfaces'] = srfs
+    snapshot['sub_surfaces'] = sub_srfs
+    return snapshot
+
+def snapshot2dicts(snapshot: dict) -> dict:
+    '''
+    Convert the snapshot from get_osmod_snapshot() into the nested dictionaries of get_osmod_story_info(), get_osmod_tzone_info(), get_osmod_spacetype_info(), get_osmod_material_info(), get_osmod_construction_info() and get_osmod_space_info().
+
+    Parameters
+    ----------
+    snapshot : dict
+        the snapshot from get_osmod_snapshot() or osmtext_utils.get_osm_snapshot().
+
+    Returns
+    -------
+    dict
+        - dictionary with the keys stories, tzones, spacetypes, materials, constructions, spaces. Only the kinds in the snapshot are converted.
+        - the vertices of the surfaces are np.ndarray views of the vertices of the snapshot.
+    '''
+    def pset_row(pset_table: dict, pset_template: dict, row: int) -> dict:
+        return {prop_name: {'value': vals[row], 'primary_measure_type': pset_template[prop_name]['primary_measure_type']}
+                for prop_name, vals in pset_table.items()}
+
+    osmod_dicts = {}
+    for key in ['stories', 'tzones']:
+        if key in snapshot.keys():
+            osmod_dicts[key] = {handle: {'name': name} for handle, name in zip(snapshot[key]['handles'], snapshot[key]['names'])}
+
+    if 'spacetypes' in snapshot.keys():
+        spacetypes = snapshot['spacetypes']
+        pset_template = ifcopenshell_utils.get_default_pset(PSET_DATA_DIR.joinpath('osmod_spacetype_schema.json'), template_only=True)
+        osmod_dicts['spacetypes'] = {handle: {'name': spacetypes['names'][cnt], 'pset': pset_row(spacetypes['pset'], pset_template, cnt)}
+                                     for cnt, handle in enumerate(spacetypes['handles'])}
+
+    mats = snapshot['materials']
+    pset_template = ifcopenshell_utils.get_default_pset(PSET_DATA_DIR.joinpath('osmod_material_schema.json'), template_only=True)
+    osmod_dicts['materials'] = {handle: {'name': mats['names'][cnt], 'thickness': float(mats['thickness'][cnt]),
+                                         'pset': pset_row(mats['pset'], pset_template, cnt)}
+                                for cnt, handle in enumerate(mats['handles'])}
+
+    consts = snapshot['constructions']
+    const_dicts = {}
+    for cnt, handle in enumerate(consts['handles']):
+        const_dict = {'name': consts['names'][cnt]}
+        if consts['layered'][cnt]:
+            mat_ids = consts['layer_materials'][consts['layer_offsets'][cnt]:consts['layer_offsets'][cnt+1]]
+            mat_ids = [mat_id for mat_id in mat_ids if mat_id != -1]
+            const_dict['mat_names'] = [mats['names'][mat_id] for mat_id in mat_ids]
+            const_dict['mat_handles'] = [mats['handles'][mat_id] for mat_id in mat_ids]
+        const_dicts[handle] = const_dict
+    osmod_dicts['constructions'] = const_dicts
+
+    if 'spaces' not in snapshot.keys():
+        return osmod_dicts
+
+    spaces = snapshot['spaces']
+    pset_template = ifcopenshell_utils.get_default_pset(PSET_DATA_DIR.joinpath('osmod_space_schema.json'), template_only=True)
+    space_dicts = {}
+    for cnt, handle in enumerate(spaces['handles']):
+        space_dict = {'name': spaces['names'][cnt], 'pset': pset_row(spaces['pset'], pset_template, cnt)}
+        for key, ref_key in [('tzone', 'tzones'), ('spacetype', 'spacetypes'), ('story', 'stories')]:
+            ref_id = spaces[key][cnt]
+            if ref_id != -1:
+                space_dict[key] = snapshot[ref_key]['handles'][ref_id]
+        space_dict['surfaces'] = {}
+        space_dict['sub_surfaces'] = {}
+        space_dicts[handle] = space_dict
+    space_handles = spaces['handles']
+
+    verts = snapshot['vertices']
+    srfs = snapshot['surfaces']
+    for cnt, handle in enumerate(srfs['handles']):
+        const_id = srfs['construction'][cnt]
+        srf_dict = {'name': srfs['names'][cnt], 'vertices': verts[srfs['vert_offsets'][cnt]:srfs['vert_offsets'][cnt+1]],
+                    'construction': consts['handles'][const_id] if const_id != -1 else None, 'type': str(srfs['type'][cnt])}
+        space_dicts[space_handles[srfs['space'][cnt]]]['surfaces'][handle] = srf_dict
+
+    sub_srfs = snapshot['sub_surfaces']
+    for cnt, handle in enumerate(sub_srfs['handles']):
+        const_id = sub_srfs['construction'][cnt]
+        sub_srf_dict = {'name': sub_srfs['names'][cnt], 'vertices': verts[sub_srfs['vert_offsets'][cnt]:sub_srfs['vert_offsets'][cnt+1]],
+                        'construction': consts['handles'][const_id] if const_id != -1 else None, 'type': str(sub_srfs['type'][cnt]),
+                        'host': srfs['handles'][sub_srfs['host'][cnt]]}
+        space_dicts[space_handles[sub_srfs['space'][cnt]]]['sub_surfaces'][handle] = sub_srf_dict
+    osmod_dicts['spaces'] = space_dicts
+    return osmod_dicts
+
 def model_apply_prm_sizing_parameters(openstudio_model: osmod):
     '''
     Apply sizing parameter to the openstudio model.
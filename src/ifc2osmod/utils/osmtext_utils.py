@@ -0,0 +1,240 @@
+from typing import Iterator
+
+import numpy as np
+import openstudio
+
+import ifc_utils.ifcopenshell_utils as ifcopenshell_utils
+from .. import settings
+
+PSET_DATA_DIR = settings.PSET_DATA_DIR
+# the osm object types that are layered constructions, their extensible fields are the layers
+LAYERED_CONSTR_TYPES = ['OS:Construction', 'OS:Construction:InternalSource']
+# the pset properties of ../data/json/osmod_material_schema.json and the idd field they are read from for each material type
+MAT_PSET_FIELDS = {'OS:Material': {'Roughness': 'Roughness', 'Conductivity': 'Conductivity', 'Density': 'Density',
+                                   'SpecificHeat': 'Specific Heat', 'ThermalAbsorptance': 'Thermal Absorptance',
+                                   'SolarAbsorptance': 'Solar Absorptance', 'VisibleAbsorptance': 'Visible Absorptance'},
+                   'OS:Material:NoMass': {'Roughness': 'Roughness', 'ThermalResistance': 'Thermal Resistance',
+                                          'ThermalAbsorptance': 'Thermal Absorptance', 'SolarAbsorptance': 'Solar Absorptance',
+                                          'VisibleAbsorptance': 'Visible Absorptance'},
+                   'OS:WindowMaterial:SimpleGlazingSystem': {'UFactor': 'U-Factor', 'SolarHeatGainCoefficient': 'Solar Heat Gain Coefficient',
+                                                             'VisibleTransmittance': 'Visible Transmittance'}}
+# the idd field of the thickness of the material types that do not call it Thickness, the same field as material.thickness() of openstudio
+THICKNESS_FIELDS = {'OS:WindowMaterial:Blind': 'Slat Thickness', 'OS:WindowMaterial:Screen': 'Screen Material Diameter'}
+# the characters openstudio escapes in the fields of the osm text
+OSM_ESCAPES = {'&#44': ',', '&#59': ';', '&#33': '!'}
+# the idd fields of the object types read so far
+IDD_FIELDS = {}
+
+def iter_osm_objects(osm_path: str, obj_types: list[str] = None) -> Iterator[list[str]]:
+    '''
+    Stream the objects of the osm file without loading the model.
+
+    Parameters
+    ----------
+    osm_path : str
+        the path of the osm file.
+
+    obj_types : list[str], optional
+        only the objects of these types, e.g. OS:Material, are yielded. Default all the objects.
+
+    Returns
+    -------
+    Iterator[list[str]]
+        the fields of each object, the first field is the object type. Empty fields are empty strings, the escaped characters are decoded with decode_osm_field().
+    '''
+    if obj_types is not None:
+        obj_types = set(obj_types)
+    obj_parts = []
+    in_obj = False
+    skip = False
+    with open(osm_path, errors='replace') as f:
+        for line in f:
+            text = line.split('!', 1)[0].strip()
+            while text:
+                semi = text.find(';')
+                if semi == -1:
+                    part = text
+                    text = ''
+                else:
+                    part = text[:semi]
+                    text = text[semi+1:].strip()
+                if not in_obj:
+                    in_obj = True
+                    obj_type = part.split(',', 1)[0].strip()
+                    skip = obj_types is not None and obj_type not in obj_types
+                if not skip:
+                    obj_parts.append(part)
+                if semi != -1:
+                    if not skip:
+                        yield [decode_osm_field(field.strip()) for field in ''.join(obj_parts).split(',')]
+                    obj_parts = []
+                    in_obj = False
+
+def decode_osm_field(field: str) -> str:
+    '''
+    Decode the characters openstudio escapes in the fields of the osm text, e.g. the , in a name is written as &#44.
+
+    Parameters
+    ----------
+    field : str
+        the field from the osm text.
+
+    Returns
+    -------
+    str
+        the decoded field.
+    '''
+    if '&#' not in field:
+        return field
+    for escape, char in OSM_ESCAPES.items():
+        field = field.replace(escape, char)
+    return field
+
+def get_idd_fields(obj_type: str) -> dict:
+    '''
+    Get the field indices and defaults of the object type from the OpenStudio IDD.
+
+    Parameters
+    ----------
+    obj_type : str
+        the osm object type, e.g. OS:Material.
+
+    Returns
+    -------
+    dict
+        - fields: dictionary with the field name as key and (index in the object fields from iter_osm_objects(), default value) as value.
+        - nfields: the number of non extensible fields, the extensible fields start after them.
+    '''
+    if obj_type in IDD_FIELDS.keys():
+        return IDD_FIELDS[obj_type]
+    idd_file = openstudio.IddFileAndFactoryWrapper(openstudio.IddFileType('OpenStudio'))
+    idd_obj = idd_file.getObject(openstudio.IddObjectType(obj_type)).get()
+    fields = {}
+    idd_fields = idd_obj.nonextensibleFields()
+    for cnt, idd_field in enumerate(idd_fields):
+        props = idd_field.properties()
+        default = None
+        if not props.numericDefault.empty():
+            default = props.numericDefault.get()
+        elif not props.stringDefault.empty():
+            default = props.stringDefault.get()
+        # the first of the fields from iter_osm_objects() is the object type
+        fields[idd_field.name()] = (cnt + 1, default)
+    IDD_FIELDS[obj_type] = {'fields': fields, 'nfields': len(idd_fields)}
+    return IDD_FIELDS[obj_type]
+
+def get_osm_field(obj_fields: list[str], field_name: str, numeric: bool = True) -> float | str:
+    '''
+    Get the value of the field of the object, the IDD default is used if the field is empty.
+
+    Parameters
+    ----------
+    obj_fields : list[str]
+        the fields of the object from iter_osm_objects().
+
+    field_name : str
+        the IDD name of the field, e.g. Thickness.
+
+    numeric : bool, optional
+        if True the value is converted to float. Default True.
+
+    Returns
+    -------
+    float | str
+        the value of the field, None if the field is empty and has no default.
+    '''
+    index, default = get_idd_fields(obj_fields[0])['fields'][field_name]
+    if index >= len(obj_fields) or obj_fields[index] == '':
+        return default
+    if numeric:
+        return float(obj_fields[index])
+    return obj_fields[index]
+
+def is_osm_material(obj_type: str) -> bool:
+    '''
+    Check if the osm object type is a material.
+
+    Parameters
+    ----------
+    obj_type : str
+        the osm object type.
+
+    Returns
+    -------
+    bool
+        True if the object type is a material.
+    '''
+    return obj_type == 'OS:Material' or obj_type.startswith('OS:Material:') or obj_type.startswith('OS:WindowMaterial:')
+
+def get_osm_version(osm_path: str) -> str:
+    '''
+    Get the version of openstudio that wrote the osm file from its OS:Version object.
+
+    Parameters
+    ----------
+    osm_path : str
+        the path of the osm file.
+
+    Returns
+    -------
+    str
+        the version identifier, e.g. 3.8.0, None if the file has no OS:Version.
+    '''
+    for obj_fields in iter_osm_objects(osm_path, obj_types=['OS:Version']):
+        if len(obj_fields) > 2:
+            return obj_fields[2]
+    return None
+
+def get_osm_snapshot(osm_path: str) -> dict:
+    '''
+    Read the materials and constructions of the osm file in one pass over its text, without loading the model.
+    The fields are read by their index in the IDD of the installed openstudio, check the file with get_osm_version() first.
+
+    Parameters
+    ----------
+    osm_path : str
+        the path of the osm file.
+
+    Returns
+    -------
+    dict
+        - the materials and constructions tables in the layout of openstudio_utils.get_osmod_snapshot(geometry=False).
+        - convert it with openstudio_utils.snapshot2dicts().
+    '''
+    pset_template = ifcopenshell_utils.get_default_pset(PSET_DATA_DIR.joinpath('osmod_material_schema.json'), template_only=True)
+    mats = {'handles': [], 'names': [], 'thickness': [], 'pset': {prop_name: [] for prop_name in pset_template.keys()}}
+    consts = {'handles': [], 'names': [], 'layered': [], 'layer_offsets': [0], 'layer_materials': []}
+    # the layers refer to the material handles, they are resolved after all the materials are read
+    layer_handles = []
+    for obj_fields in iter_osm_objects(osm_path):
+        obj_type = obj_fields[0]
+        if is_osm_material(obj_type):
+            mats['handles'].append(obj_fields[1])
+            mats['names'].append(obj_fields[2])
+            thickness = 0.0
+            thickness_field = THICKNESS_FIELDS.get(obj_type, 'Thickness')
+            if thickness_field in get_idd_fields(obj_type)['fields'].keys():
+                thickness = get_osm_field(obj_fields, thickness_field)
+            mats['thickness'].append(thickness)
+            pset_fields = MAT_PSET_FIELDS.get(obj_type, {})
+            for prop_name, prop_vals in mats['pset'].items():
+                if prop_name in pset_fields.keys():
+                    prop_vals.append(get_osm_field(obj_fields, pset_fields[prop_name], numeric=prop_name != 'Roughness'))
+                else:
+                    prop_vals.append(pset_template[prop_name]['value'])
+        elif obj_type == 'OS:Construction' or obj_type.startswith('OS:Construction:'):
+            consts['handles'].append(obj_fields[1])
+            consts['names'].append(obj_fields[2])
+            is_layered = obj_type in LAYERED_CONSTR_TYPES
+            consts['layered'].append(is_layered)
+            if is_layered:
+                nfields = get_idd_fields(obj_type)['nfields']
+                layer_handles.extend([field for field in obj_fields[nfields+1:] if field != ''])
+            consts['layer_offsets'].append(len(layer_handles))
+
+    mat_indices = {handle: cnt for cnt, handle in enumerate(mats['handles'])}
+    mats['thickness'] = np.array(mats['thickness'], dtype=float)
+    consts['layered'] = np.array(consts['layered'], dtype=bool)
+    consts['layer_offsets'] = np.array(consts['layer_offsets'], dtype=int)
+    consts['layer_materials'] = np.array([mat_indices.get(handle, -1) for handle in layer_handles], dtype=int)
+    return {'materials': mats, 'constructions': consts}
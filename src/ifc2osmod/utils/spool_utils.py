@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import uuid
+from pathlib import Path
+
+# tmp: jobs being written, pending: jobs waiting for a worker, running: jobs claimed by a worker, done and failed: finished jobs with their results
+SPOOL_DIRS = ['tmp', 'pending', 'running', 'done', 'failed']
+
+def init_spool(spool_dir: str):
+    '''
+    Create the directories of the spool if they do not exist.
+
+    Parameters
+    ----------
+    spool_dir : str
+        The spool directory path, on a file system shared by all the hosts.
+    '''
+    for dir_name in SPOOL_DIRS:
+        Path(spool_dir).joinpath(dir_name).mkdir(parents=True, exist_ok=True)
+
+def write_json_atomic(json_path: str, data: dict, tmp_dir: str):
+    '''
+    Write the json file in the tmp directory and rename it to its path so that readers never see a partially written file.
+
+    Parameters
+    ----------
+    json_path : str
+        The file path of the json file.
+
+    data : dict
+        The data to write.
+
+    tmp_dir : str
+        A directory on the same file system as json_path.
+    '''
+    tmp_path = Path(tmp_dir).joinpath(f"{uuid.uuid4().hex}.json")
+    with open(tmp_path, 'w') as f:
+        f.write(json.dumps(data, indent=4))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, json_path)
+
+def enqueue_job(spool_dir: str, job: dict) -> str:
+    '''
+    Put a job descriptor into the pending directory of the spool.
+
+    Parameters
+    ----------
+    spool_dir : str
+        The spool directory path.
+
+    job : dict
+        The job descriptor, all file paths must be reachable from every worker.
+
+    Returns
+    -------
+    str
+        The file path of the pending job.
+    '''
+    init_spool(spool_dir)
+    # the time prefix keeps the jobs in first in first out order
+    job_id = f"{time.time_ns()}_{uuid.uuid4().hex[:8]}"
+    job = dict(job)
+    job['job_id'] = job_id
+    job['attempts'] = 0
+    job['enqueued'] = time.time()
+    job_path = str(Path(spool_dir).joinpath('pending', f"{job_id}.json"))
+    write_json_atomic(job_path, job, str(Path(spool_dir).joinpath('tmp')))
+    return job_path
+
+def claim_job(spool_dir: str, worker_id: str) -> tuple[str, dict]:
+    '''
+    Claim the oldest pending job by renaming it into the tmp directory, the rename is atomic so only one worker gets the job.
+    The claimed job is then written into the running directory, so a running job always has the modification time of its claim or last heartbeat.
+
+    Parameters
+    ----------
+    spool_dir : str
+        The spool directory path.
+
+    worker_id : str
+        The id of the worker, must be unique across the hosts.
+
+    Returns
+    -------
+    tuple[str, dict]
+        The file path of the running job and the job descriptor. (None, None) if there is no pending job.
+    '''
+    pending_dir = Path(spool_dir).joinpath('pending')
+    running_dir = Path(spool_dir).joinpath('running')
+    tmp_dir = Path(spool_dir).joinpath('tmp')
+    pending_paths = sorted(pending_dir.glob('*.json'))
+    for pending_path in pending_paths:
+        # the claim time is in the name as the rename keeps the modification time of the enqueue
+        claim_path = tmp_dir.joinpath(f"{pending_path.stem}@{worker_id}@{time.time_ns()}.claim")
+        try:
+            os.rename(pending_path, claim_path)
+        except FileNotFoundError:
+            # another worker claimed it first
+            continue
+        with open(claim_path) as f:
+            job = json.load(f)
+        job['attempts'] += 1
+        job['worker'] = worker_id
+        job['started'] = time.time()
+        running_path = running_dir.joinpath(f"{pending_path.stem}@{worker_id}.json")
+        write_json_atomic(str(running_path), job, str(tmp_dir))
+        os.remove(claim_path)
+        return str(running_path), job
+    return None, None
+
+def heartbeat(running_path: str):
+    '''
+    Update the modification time of the running job to show that its worker is alive.
+
+    Parameters
+    ----------
+    running_path : str
+        The file path of the running job.
+    '''
+    os.utime(running_path, None)
+
+def reclaim_stale_jobs(spool_dir: str, timeout: float, max_attempts: int = 3) -> list[str]:
+    '''
+    Put the running jobs without a heartbeat for longer than the timeout back into the pending directory.
+    The jobs of workers that stopped while claiming or requeueing them, left in the tmp or running directory for longer than the timeout, are also put back.
+
+    Parameters
+    ----------
+    spool_dir : str
+        The spool directory path.
+
+    timeout : float
+        The number of seconds without a heartbeat after which the worker of a job is considered dead.
+
+    max_attempts : int, optional
+        Jobs that have been claimed this number of times are moved to the failed directory instead. Default 3.
+
+    Returns
+    -------
+    list[str]
+        The job ids that were reclaimed.
+    '''
+    running_dir = Path(spool_dir).joinpath('running')
+    tmp_dir = Path(spool_dir).joinpath('tmp')
+    reclaimed = []
+    now = time.time()
+    for running_path in running_dir.glob('*.json'):
+        try:
+            mtime = running_path.stat().st_mtime
+        except FileNotFoundError:
+            continue
+        if now - mtime < timeout:
+            continue
+        job_id = running_path.stem.split('@')[0]
+        if requeue_job(spool_dir, str(running_path), job_id, max_attempts):
+            reclaimed.append(job_id)
+
+    # the jobs of the workers that stopped while requeueing them
+    for reclaim_path in running_dir.glob('*.reclaim'):
+        job_id, reclaim_ns = reclaim_path.stem.split('@')
+        if now - int(reclaim_ns)/1e9 < timeout:
+            continue
+        if requeue_job(spool_dir, str(reclaim_path), job_id, max_attempts):
+            reclaimed.append(job_id)
+
+    for claim_path in tmp_dir.glob('*.claim'):
+        job_id, worker_id, claim_ns = claim_path.stem.split('@')
+        if now - int(claim_ns)/1e9 < timeout:
+            continue
+        if requeue_job(spool_dir, str(claim_path), job_id, max_attempts, claimed_by=worker_id):
+            reclaimed.append(job_id)
+    return reclaimed
+
+def requeue_job(spool_dir: str, job_path: str, job_id: str, max_attempts: int, claimed_by: str = None) -> bool:
+    '''
+    Put the job of a dead worker back into the pending directory, or into the failed directory if it has been claimed max_attempts times.
+
+    Parameters
+    ----------
+    spool_dir : str
+        The spool directory path.
+
+    job_path : str
+        The file path of the running job, of the claimed job in the tmp directory or of a reclaim file left in the running directory.
+
+    job_id : str
+        The id of the job.
+
+    max_attempts : int
+        Jobs that have been claimed this number of times are moved to the failed directory instead.
+
+    claimed_by : str, optional
+        The id of the worker that stopped while claiming the job, the attempt is counted as the job was not written into the running directory.
+        Default None, the job is a running job.
+
+    Returns
+    -------
+    bool
+        True if the job was requeued, False if another worker requeued it first.
+    '''
+    # the reclaim time is in the name as the rename keeps the modification time of the last heartbeat
+    reclaim_path = Path(spool_dir).joinpath('running', f"{job_id}@{time.time_ns()}.reclaim")
+    try:
+        # only one worker wins the rename
+        os.rename(job_path, reclaim_path)
+    except FileNotFoundError:
+        return False
+    with open(reclaim_path) as f:
+        job = json.load(f)
+    if claimed_by is not None:
+        job['attempts'] += 1
+        job['worker'] = claimed_by
+    if job['attempts'] >= max_attempts:
+        job['error'] = f"worker {job.get('worker')} stopped sending heartbeats after {job['attempts']} attempts"
+        dest_path = Path(spool_dir).joinpath('failed', f"{job_id}.json")
+    else:
+        dest_path = Path(spool_dir).joinpath('pending', f"{job_id}.json")
+    write_json_atomic(str(dest_path), job, str(Path(spool_dir).joinpath('tmp')))
+    os.remove(reclaim_path)
+    return True
+
+def finish_job(spool_dir: str, running_path: str, job: dict, failed: bool = False) -> str:
+    '''
+    Write the job with its results into the done or failed directory and remove it from the running directory.
+
+    Parameters
+    ----------
+    spool_dir : str
+        The spool directory path.
+
+    running_path : str
+        The file path of the running job.
+
+    job : dict
+        The job descriptor with its results.
+
+    failed : bool, optional
+        True puts the job into the failed directory. Default False.
+
+    Returns
+    -------
+    str
+        The file path of the finished job.
+    '''
+    job['finished'] = time.time()
+    if failed:
+        dest_dir = 'failed'
+    else:
+        dest_dir = 'done'
+    dest_path = str(Path(spool_dir).joinpath(dest_dir, f"{job['job_id']}.json"))
+    write_json_atomic(dest_path, job, str(Path(spool_dir).joinpath('tmp')))
+    try:
+        os.remove(running_path)
+    except FileNotFoundError:
+        # the job was reclaimed while the worker was finishing it
+        pass
+    return dest_path
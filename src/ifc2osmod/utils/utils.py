@@ -1,3 +1,7 @@
+import json
+import hashlib
+from pathlib import Path
+
 def flatten_mat_dict(mat_dict: dict) -> dict:
     '''
     Remove the pset key and flatten all its values in the material dictionary.
@@ -23,7 +27,35 @@ def flatten_mat_dict(mat_dict: dict) -> dict:
     
     return new_dict
 
-def get_mat_layers_frm_constr(constr_dict: dict, mat_dicts: dict, mat_lib: dict) -> list[int]:
+def get_mat_fingerprint(mat_dict: dict, decimals: int = 9) -> tuple:
+    '''
+    Get the canonical fingerprint of the flatten material. Materials with the same properties apart from the name have the same fingerprint.
+
+    Parameters
+    ----------
+    mat_dict: dict
+        dict from the function flatten_mat_dict().
+
+    decimals: int, optional
+        the float properties are rounded to this number of decimals. Default 9.
+
+    Returns
+    -------
+    tuple
+        the (property name, value) pairs sorted by the property name, without the name.
+    '''
+    fingerprint = []
+    for key in sorted(mat_dict.keys()):
+        if key == 'name':
+            continue
+        val = mat_dict[key]
+        if isinstance(val, float):
+            # adding 0.0 turns -0.0 into 0.0
+            val = round(val, decimals) + 0.0
+        fingerprint.append((key, val))
+    return tuple(fingerprint)
+
+def get_mat_layers_frm_constr(constr_dict: dict, mat_dicts: dict, mat_lib: dict, mat_index: dict = None) -> list[int]:
     '''
     Get all the mat layers from a construction and store them in mat_lib with a unique id.
 
@@ -43,42 +75,243 @@ def get_mat_layers_frm_constr(constr_dict: dict, mat_dicts: dict, mat_lib: dict)
         nested dictionaries, the uniq_id of the material is used as the key on the top level
         - dict from the function flatten_mat_dict() 
 
+    mat_index: dict, optional
+        dictionary of the fingerprint from get_mat_fingerprint() to the uniq_id of the materials in mat_lib. It is updated as materials are added to mat_lib. 
+        Pass the same dictionary with the same mat_lib on every call, if None it is built from mat_lib on this call.
+
     Returns
     -------
     list[int]
         the unique_id of the materials in the mat_lib dictionary.
     '''
-    def rmv_name(mat_lib_vals):
-        mat_lib_vals_no_name = []
-        for mat_lib_val in mat_lib_vals:
-            mat_lib_val_no_name = dict(mat_lib_val)
-            mat_lib_val_no_name.pop('name')
-            mat_lib_vals_no_name.append(mat_lib_val_no_name)
-        return mat_lib_vals_no_name
+    if mat_index is None:
+        mat_index = {}
+        for uniq_id, mat in mat_lib.items():
+            mat_index.setdefault(get_mat_fingerprint(mat), uniq_id)
 
     # lets get all the materials 
     mat_handles = constr_dict['mat_handles']
+    flat_mats = [flatten_mat_dict(mat_dicts[mat_handle]) for mat_handle in mat_handles]
+    return add_mats2lib(flat_mats, mat_lib, mat_index)
+
+def add_mats2lib(flat_mats: list[dict], mat_lib: dict, mat_index: dict) -> list[int]:
+    '''
+    Store the flatten materials in mat_lib with a unique id, materials with the same fingerprint share the same unique id.
+
+    Parameters
+    ----------
+    flat_mats: list[dict]
+        list of dict from the function flatten_mat_dict().
+
+    mat_lib: dict
+        nested dictionaries, the uniq_id of the material is used as the key on the top level
+        - dict from the function flatten_mat_dict() 
+
+    mat_index: dict
+        dictionary of the fingerprint from get_mat_fingerprint() to the uniq_id of the materials in mat_lib. It is updated as materials are added to mat_lib.
+
+    Returns
+    -------
+    list[int]
+        the unique_id of the materials in the mat_lib dictionary.
+    '''
     uniq_ids = []
-    for mat_handle in mat_handles:
-        mat = mat_dicts[mat_handle]
-        mat = flatten_mat_dict(mat)
-        mat_no_name = dict(mat)
-        mat_no_name.pop('name')
-        mat_lib_vals = list(mat_lib.values())
-        mat_lib_vals_no_name = rmv_name(mat_lib_vals)
-        if mat_no_name not in mat_lib_vals_no_name:
-            uniq_id = len(mat_lib_vals)
+    for mat in flat_mats:
+        fingerprint = get_mat_fingerprint(mat)
+        if fingerprint not in mat_index.keys():
+            uniq_id = len(mat_lib)
             mat_lib[uniq_id] = mat
+            mat_index[fingerprint] = uniq_id
         else:
-            mat_lib_keys = list(mat_lib.keys())
-            key_indx = mat_lib_vals_no_name.index(mat_no_name)
-            uniq_id = mat_lib_keys[key_indx]
+            uniq_id = mat_index[fingerprint]
         uniq_ids.append(uniq_id)
     return uniq_ids
 
+def add_constrs2lib(constr_entries: list[tuple], constr_lib: dict, constr_index: dict, mat_lib: dict, mat_index: dict):
+    '''
+    Merge the constructions of one model into the construction library. The constructions with the same key and the same set of materials are only stored once.
+
+    Parameters
+    ----------
+    constr_entries: list[tuple]
+        list of (construction name, key, list of dict from the function flatten_mat_dict() of the layers), the key is the rounded value the library is indexed by.
+
+    constr_lib: dict
+        dictionary of the key to a dictionary with the keys name and material_layers. It is updated with the constructions.
+
+    constr_index: dict
+        dictionary of the key to the set of sorted material layers in constr_lib. It is updated with the constructions.
+
+    mat_lib: dict
+        nested dictionaries, the uniq_id of the material is used as the key on the top level
+        - dict from the function flatten_mat_dict() 
+
+    mat_index: dict
+        dictionary of the fingerprint from get_mat_fingerprint() to the uniq_id of the materials in mat_lib.
+    '''
+    for constr_name, key, flat_mats in constr_entries:
+        uniq_ids = add_mats2lib(flat_mats, mat_lib, mat_index)
+        sort_uniq_ids = tuple(sorted(uniq_ids))
+        if key not in constr_lib.keys():
+            constr_lib[key] = {'name': [constr_name], 'material_layers': [uniq_ids]}
+            constr_index[key] = {sort_uniq_ids}
+        elif sort_uniq_ids not in constr_index[key]:
+            constr_lib[key]['material_layers'].append(uniq_ids)
+            constr_lib[key]['name'].append(constr_name)
+            constr_index[key].add(sort_uniq_ids)
+
 def sort2dls(ls_2d: list[list[int]]) -> list[list[int]]:
     sorted_2d = []
     for ls in ls_2d:
         sorted_ls = sorted(ls)
         sorted_2d.append(sorted_ls)
-    return sorted_2d
\ No newline at end of file
+    return sorted_2d
+
+def write_constr_lib_benchmark(res_path: str, osmod_dir: str, timings: dict) -> str:
+    '''
+    Write the timings of building a construction library into <res stem>_benchmark.json next to the library.
+
+    Parameters
+    ----------
+    res_path: str
+        the path of the construction library json from extract_osmod_opq_constr or extract_osmod_smpl_glz_constr.
+
+    osmod_dir: str
+        the directory of the openstudio models the library is built from.
+
+    timings: dict
+        dictionary with the keys nfiles, read_time, library_time and optionally nreduced, nremoved and jobs.
+
+    Returns
+    -------
+    str
+        the path of the benchmark report.
+    '''
+    with open(res_path) as f:
+        lib = json.load(f)
+    nconstrs = sum([len(constr['name']) for constr in lib['construction_library'].values()])
+    report = {'osmod_dir': osmod_dir, 'library': res_path, 'materials': len(lib['material_library']), 'constructions': nconstrs}
+    report.update(timings)
+    if timings['nfiles'] != 0:
+        report['library_time_per_file'] = timings['library_time']/timings['nfiles']
+    res_path_obj = Path(res_path)
+    report_path = str(res_path_obj.parent.joinpath(f"{res_path_obj.stem}_benchmark.json"))
+    with open(report_path, 'w') as f:
+        f.write(json.dumps(report, indent=4))
+    return report_path
+
+def get_constr_lib_manifest_path(res_path: str) -> str:
+    '''
+    Get the path of the manifest of an incremental construction library, <res stem>_manifest.json next to the library.
+
+    Parameters
+    ----------
+    res_path: str
+        the path of the construction library json from extract_osmod_opq_constr or extract_osmod_smpl_glz_constr.
+
+    Returns
+    -------
+    str
+        the path of the manifest.
+    '''
+    res_path_obj = Path(res_path)
+    return str(res_path_obj.parent.joinpath(f"{res_path_obj.stem}_manifest.json"))
+
+def get_file_hash(file_path: str) -> str:
+    '''
+    Get the sha256 hash of the content of the file.
+
+    Parameters
+    ----------
+    file_path: str
+        the path of the file.
+
+    Returns
+    -------
+    str
+        the hex digest of the content.
+    '''
+    file_hash = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+def get_file_stat(file_path: str, prev_stat: dict = None) -> dict:
+    '''
+    Get the size, mtime and content hash of the file. The file is only hashed if its size or mtime differ from prev_stat.
+
+    Parameters
+    ----------
+    file_path: str
+        the path of the file.
+
+    prev_stat: dict, optional
+        the stat of the file from a previous call.
+
+    Returns
+    -------
+    dict
+        dictionary with the keys size, mtime in nanoseconds and hash from get_file_hash().
+    '''
+    os_stat = Path(file_path).stat()
+    file_stat = {'size': os_stat.st_size, 'mtime': os_stat.st_mtime_ns}
+    if prev_stat is not None and prev_stat['size'] == file_stat['size'] and prev_stat['mtime'] == file_stat['mtime']:
+        file_stat['hash'] = prev_stat['hash']
+    else:
+        file_stat['hash'] = get_file_hash(file_path)
+    return file_stat
+
+def read_constr_lib_manifest(manifest_path: str, text: bool) -> dict:
+    '''
+    Read the files of the manifest of an incremental construction library.
+
+    Parameters
+    ----------
+    manifest_path: str
+        the path of the manifest from get_constr_lib_manifest_path().
+
+    text: bool
+        if the library is built from the osm text. The manifest is only used if it is built the same way.
+
+    Returns
+    -------
+    dict
+        dictionary of the osm file name to a dictionary with the keys size, mtime, hash and constructions, the contributions of the file to the library.
+        Empty if there is no manifest or it is built the other way.
+    '''
+    if not Path(manifest_path).exists():
+        return {}
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest['text'] != text:
+        return {}
+    return manifest['files']
+
+def write_constr_lib_manifest(manifest_path: str, osmod_dir: str, text: bool, files: dict) -> str:
+    '''
+    Write the manifest of an incremental construction library.
+
+    Parameters
+    ----------
+    manifest_path: str
+        the path of the manifest from get_constr_lib_manifest_path().
+
+    osmod_dir: str
+        the directory of the openstudio models the library is built from.
+
+    text: bool
+        if the library is built from the osm text.
+
+    files: dict
+        dictionary of the osm file name to a dictionary with the keys size, mtime, hash and constructions.
+
+    Returns
+    -------
+    str
+        the path of the manifest.
+    '''
+    manifest = {'osmod_dir': osmod_dir, 'text': text, 'files': files}
+    with open(manifest_path, 'w') as f:
+        f.write(json.dumps(manifest))
+    return manifest_path